@@ -6,6 +6,10 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 import warnings
+from utils.probabilistic_forecast import DEFAULT_QUANTILES, block_bootstrap_paths, forecast_quantiles, seasonal_trend_fit
+from utils.hierarchy import RECONCILE_METHODS, RegionHierarchy, hierarchical_forecast
+from utils.seasonality import (SEASON_LABELS, data_fingerprint, load_season_profiles, save_season_profiles,
+                               seasonality_profiles)
 warnings.filterwarnings('ignore')
 
 st.set_page_config(
@@ -62,6 +66,9 @@ REGIONS_DATA = {
     }
 }
 
+# 每个省份/州的日销量下限（模拟数据与预测共用）
+MIN_DAILY_SALES = 10
+
 # 生成模拟数据
 @st.cache_data
 def generate_sample_data():
@@ -107,7 +114,7 @@ def generate_sample_data():
 
                     # 合成销量数据
                     sales = base_trend + seasonal + weekly + noise + special_events
-                    sales = np.maximum(sales, 10)  # 确保销量不为负
+                    sales = np.maximum(sales, MIN_DAILY_SALES)  # 确保销量不为负
 
                     for i, date in enumerate(dates):
                         data.append({
@@ -122,48 +129,96 @@ def generate_sample_data():
     
     return pd.DataFrame(data)
 
-# 简单的预测函数（替代Prophet）
-def simple_forecast(data, periods=30):
-    """简单的时间序列预测"""
-    # 计算趋势
-    x = np.arange(len(data))
-    y = data['sales'].values
-    
-    # 线性回归拟合趋势
-    z = np.polyfit(x, y, 1)
-    trend = np.poly1d(z)
-    
-    # 计算季节性（简化版）
-    seasonal_period = min(365, len(data))
-    if len(data) >= seasonal_period:
-        seasonal = []
-        for i in range(seasonal_period):
-            seasonal_values = y[i::seasonal_period]
-            seasonal.append(np.mean(seasonal_values) - np.mean(y))
-        seasonal = np.array(seasonal)
-    else:
-        seasonal = np.zeros(len(data))
-    
-    # 生成预测
-    future_x = np.arange(len(data), len(data) + periods)
-    future_trend = trend(future_x)
-    
-    # 添加季节性
-    future_seasonal = []
-    for i in range(periods):
-        season_idx = (len(data) + i) % len(seasonal) if len(seasonal) > 0 else 0
-        future_seasonal.append(seasonal[season_idx] if len(seasonal) > 0 else 0)
-    
-    forecast = future_trend + np.array(future_seasonal)
-    
-    # 生成预测日期
+# 地区层级（大洲 → 国家 → 省份/州）
+REGION_HIERARCHY = RegionHierarchy(REGIONS_DATA)
+
+# 叶子级销售立方体
+@st.cache_data
+def build_sales_cube():
+    """把明细数据整理为 [产品, 省份/州, 日期] 的销量和收入立方体"""
+    data = generate_sample_data()
+    products = list(data['product'].unique())
+    dates = pd.DatetimeIndex(sorted(data['date'].unique()))
+
+    leaf_index = pd.MultiIndex.from_tuples(
+        [(product,) + leaf for product in products for leaf in REGION_HIERARCHY.leaves],
+        names=['product', 'continent', 'country', 'province']
+    )
+    cube_shape = (len(products), REGION_HIERARCHY.n_leaves, len(dates))
+
+    cubes = []
+    for value in ['sales', 'revenue']:
+        matrix = data.pivot_table(
+            index=['product', 'continent', 'country', 'province'],
+            columns='date',
+            values=value,
+            aggfunc='sum',
+            fill_value=0
+        ).reindex(index=leaf_index, columns=dates, fill_value=0)
+        cubes.append(matrix.to_numpy(dtype=float).reshape(cube_shape))
+
+    return products, dates, cubes[0], cubes[1]
+
+# 层级预测：所有产品、所有地区节点一次性预测并协调
+@st.cache_data
+def reconciled_forecasts(start_date, end_date, periods, method):
+    """返回 [产品, 地区节点, 预测天数] 的协调后预测，侧边栏切换地区时直接取行"""
+    _, dates, sales_cube, _ = build_sales_cube()
+    mask = (dates.date >= start_date) & (dates.date <= end_date)
+    return hierarchical_forecast(REGION_HIERARCHY, sales_cube[:, :, mask], periods, method,
+                                 seasonal_periods=node_season_periods(), floor=MIN_DAILY_SALES)
+
+# 概率预测（残差块自助法）
+def quantile_forecast(data, point, seasonal_period, floor, n_paths=2000, block_size=7):
+    """以协调后的点预测为中心，叠加同一基础模型的残差块自助法，输出 P10/P50/P90 分位数"""
+    history = data['sales'].values[None, :].astype(float)
+    fitted, _ = seasonal_trend_fit(history, len(point), seasonal_period)
+    paths = block_bootstrap_paths(point[None, :], history - fitted, n_paths=n_paths, block_size=block_size,
+                                  non_negative=False)
+    quantiles = np.maximum(forecast_quantiles(paths, DEFAULT_QUANTILES), floor)
+
     last_date = data['date'].max()
-    future_dates = pd.date_range(start=last_date + timedelta(days=1), periods=periods, freq='D')
-    
-    return pd.DataFrame({
+    future_dates = pd.date_range(start=last_date + timedelta(days=1), periods=len(point), freq='D')
+
+    result = pd.DataFrame({
         'date': future_dates,
-        'forecast': np.maximum(forecast, 10)  # 确保预测值不为负
+        'forecast': point
     })
+    for q, values in zip(DEFAULT_QUANTILES, quantiles[:, 0, :]):
+        result[f'P{int(q * 100)}'] = values
+
+    return result
+
+# 各地区节点季节性画像的保存位置
+SEASON_PROFILE_FILE = 'data/region_season_profiles.csv'
+
+# 全品类季节性画像（所有 产品 × 地区节点 序列一次批量 FFT，结果连同销量数据指纹保存到磁盘）
+@st.cache_data
+def catalog_season_profiles():
+    """读取全部 产品 × 地区节点 的季节性画像，文件不存在或销量数据变化时批量检测并保存"""
+    products, dates, sales_cube, _ = build_sales_cube()
+    fingerprint = data_fingerprint(sales_cube, dates.asi8)
+    profiles = load_season_profiles(SEASON_PROFILE_FILE, fingerprint)
+    if not profiles.empty:
+        return profiles
+
+    node_cube = REGION_HIERARCHY.aggregate(sales_cube)
+    index = pd.MultiIndex.from_tuples(
+        [(product,) + node + ('全部',) * (3 - len(node)) for product in products for node in REGION_HIERARCHY.nodes],
+        names=['product', 'continent', 'country', 'province']
+    )
+    profiles = seasonality_profiles(node_cube.reshape(-1, len(dates)), index=index)
+    save_season_profiles(profiles, SEASON_PROFILE_FILE, fingerprint)
+    return profiles
+
+def node_season_periods():
+    """从季节性画像取 [产品, 地区节点] 的季节周期，无明显季节性时为1"""
+    products = build_sales_cube()[0]
+    index = pd.MultiIndex.from_tuples(
+        [(product,) + node + ('全部',) * (3 - len(node)) for product in products for node in REGION_HIERARCHY.nodes]
+    )
+    periods = catalog_season_profiles()['season_period'].reindex(index, fill_value=0).to_numpy(dtype=int)
+    return np.where(periods > 0, periods, 1).reshape(len(products), REGION_HIERARCHY.n_nodes)
 
 # 加载数据
 df = generate_sample_data()
@@ -220,6 +275,23 @@ forecast_days = st.sidebar.slider(
     step=7
 )
 
+# 预测模式
+forecast_mode = st.sidebar.radio(
+    "预测模式",
+    options=["点预测", "概率预测（分位数）"],
+    index=0,
+    help="概率预测基于残差块自助法模拟数千条需求路径，输出 P10/P50/P90 分位数"
+)
+
+# 层级协调方法
+reconcile_method = st.sidebar.selectbox(
+    "层级协调方法",
+    options=list(RECONCILE_METHODS),
+    format_func=lambda method: RECONCILE_METHODS[method],
+    index=0,
+    help="所有省份/州序列一次性预测，再协调汇总到国家、大洲和全部地区"
+)
+
 # 数据时间范围
 date_range = st.sidebar.date_input(
     "选择数据时间范围",
@@ -228,40 +300,27 @@ date_range = st.sidebar.date_input(
     max_value=df['date'].max().date()
 )
 
-# 筛选数据
-filtered_df = df[df['product'] == selected_product].copy()
-
-# 地区筛选
-if selected_continent != '全部':
-    filtered_df = filtered_df[filtered_df['continent'] == selected_continent]
-
-if selected_country != '全部':
-    filtered_df = filtered_df[filtered_df['country'] == selected_country]
-
-if selected_province != '全部':
-    filtered_df = filtered_df[filtered_df['province'] == selected_province]
-
-# 时间范围筛选
+# 时间范围
 if len(date_range) == 2:
     start_date, end_date = date_range
-    filtered_df = filtered_df[
-        (filtered_df['date'].dt.date >= start_date) &
-        (filtered_df['date'].dt.date <= end_date)
-    ]
-
-# 按日期聚合数据（如果有多个地区的数据）
-if len(filtered_df) > 0:
-    filtered_df = filtered_df.groupby(['date', 'product']).agg({
-        'sales': 'sum',
-        'revenue': 'sum'
-    }).reset_index()
-
-# 按日期聚合数据（如果有多个地区的数据）
-if len(filtered_df) > 0:
-    filtered_df = filtered_df.groupby(['date', 'product']).agg({
-        'sales': 'sum',
-        'revenue': 'sum'
-    }).reset_index()
+else:
+    start_date, end_date = df['date'].min().date(), df['date'].max().date()
+
+# 从立方体中汇总所选地区节点的数据
+products, cube_dates, sales_cube, revenue_cube = build_sales_cube()
+product_idx = products.index(selected_product)
+node_row = REGION_HIERARCHY.node_index[
+    REGION_HIERARCHY.node_key(selected_continent, selected_country, selected_province)
+]
+summing_row = REGION_HIERARCHY.S[node_row]
+date_mask = (cube_dates.date >= start_date) & (cube_dates.date <= end_date)
+
+filtered_df = pd.DataFrame({
+    'date': cube_dates[date_mask],
+    'product': selected_product,
+    'sales': (summing_row @ sales_cube[product_idx][:, date_mask]).ravel().astype(int),
+    'revenue': (summing_row @ revenue_cube[product_idx][:, date_mask]).ravel()
+})
 
 # 主要内容区域
 col1, col2 = st.columns([2, 1])
@@ -307,13 +366,29 @@ with col2:
 if st.button("🔮 开始预测", type="primary"):
     with st.spinner("正在进行智能预测..."):
         # 执行预测
-        forecast_df = simple_forecast(filtered_df, forecast_days)
+        # 季节周期取已保存的季节性画像，无明显季节性时为1
+        seasonal_period = int(node_season_periods()[product_idx, node_row])
+        
+        # 两种模式都取缓存的协调后预测，不再为每个地区组合单独拟合
+        forecasts = reconciled_forecasts(start_date, end_date, forecast_days, reconcile_method)
+        if forecast_mode == "概率预测（分位数）":
+            forecast_df = quantile_forecast(filtered_df, forecasts[product_idx, node_row], seasonal_period,
+                                            floor=MIN_DAILY_SALES * summing_row.sum())
+        else:
+            forecast_df = pd.DataFrame({
+                'date': pd.date_range(start=filtered_df['date'].max() + timedelta(days=1), periods=forecast_days, freq='D'),
+                'forecast': forecasts[product_idx, node_row]
+            })
         
         # 存储预测结果到session state
         st.session_state['forecast_result'] = forecast_df
         st.session_state['historical_data'] = filtered_df
         
         st.success(f"✅ 预测完成！已生成未来 {forecast_days} 天的需求预测")
+        if seasonal_period > 1:
+            st.info(f"🔍 检测到的季节周期: {seasonal_period} 天")
+        else:
+            st.info("🔍 未检测到明显季节性，预测仅包含趋势项")
 
 # 显示预测结果
 if 'forecast_result' in st.session_state:
@@ -335,6 +410,26 @@ if 'forecast_result' in st.session_state:
         line=dict(color='blue')
     ))
     
+    # 预测区间（概率预测模式）
+    if 'P10' in forecast_df.columns:
+        fig_forecast.add_trace(go.Scatter(
+            x=forecast_df['date'],
+            y=forecast_df['P90'],
+            mode='lines',
+            name='P90',
+            line=dict(width=0),
+            showlegend=False
+        ))
+        fig_forecast.add_trace(go.Scatter(
+            x=forecast_df['date'],
+            y=forecast_df['P10'],
+            mode='lines',
+            name='P10-P90 区间',
+            line=dict(width=0),
+            fill='tonexty',
+            fillcolor='rgba(255, 0, 0, 0.15)'
+        ))
+
     # 预测数据
     fig_forecast.add_trace(go.Scatter(
         x=forecast_df['date'],
@@ -360,8 +455,10 @@ if 'forecast_result' in st.session_state:
         st.subheader("📋 预测数据详情")
         forecast_display = forecast_df.copy()
         forecast_display['date'] = forecast_display['date'].dt.strftime('%Y-%m-%d')
-        forecast_display['forecast'] = forecast_display['forecast'].round(0).astype(int)
-        forecast_display.columns = ['日期', '预测销量']
+        quantile_columns = [col for col in forecast_display.columns if col.startswith('P')]
+        for col in ['forecast'] + quantile_columns:
+            forecast_display[col] = forecast_display[col].round(0).astype(int)
+        forecast_display.columns = ['日期', '预测销量'] + quantile_columns
         st.dataframe(forecast_display, use_container_width=True)
     
     with col2:
@@ -460,6 +557,27 @@ with col2:
     fig_weekly.update_layout(height=400)
     st.plotly_chart(fig_weekly, use_container_width=True)
 
+# 全品类季节性画像
+with st.expander("🔍 全品类季节性画像"):
+    profiles = catalog_season_profiles()
+    profiles = profiles[profiles.index.get_level_values('province') != '全部']
+    season_summary = profiles['season_type'].map(SEASON_LABELS).value_counts().reset_index()
+    season_summary.columns = ['季节类型', '序列数']
+
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.dataframe(season_summary, use_container_width=True)
+    with col2:
+        product_profiles = profiles.xs(selected_product, level='product').reset_index()
+        product_profiles['季节类型'] = product_profiles['season_type'].map(SEASON_LABELS)
+        product_profiles['主导周期(天)'] = product_profiles['dominant_period'].round(1)
+        st.dataframe(
+            product_profiles[['continent', 'country', 'province', '季节类型', '主导周期(天)']].rename(columns={
+                'continent': '大洲', 'country': '国家', 'province': '省份/州'
+            }),
+            use_container_width=True
+        )
+
 # 导出功能
 st.markdown("---")
 st.subheader("📥 数据导出")
@@ -511,6 +629,9 @@ with st.expander("❓ 使用帮助"):
     ### 🔧 技术说明
     
     - 使用时间序列分析方法
+    - 概率预测模式通过残差块自助法输出 P10/P50/P90 分位数区间
+    - 季节周期由 FFT 周期图自动检测（周/月/季度促销/年）
+    - 层级预测：所有省份/州一次性预测并协调（自下而上或 MinT），大洲、国家预测由叶子预测汇总得到
     - 考虑趋势、季节性和周期性因素
     - 提供多种评估指标
     - 支持数据导出和报告生成
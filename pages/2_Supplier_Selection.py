@@ -3,6 +3,11 @@ import pandas as pd
 import numpy as np
 import os
 
+from utils.skyline import skyline
+from utils.supplier_data import (ALIBABA_LISTING_FILE, AMAZON_SUPPLIER_FILE, LOCAL_PLATFORM, SUPPLIER_SKYLINE_CRITERIA,
+                                 load_supplier_table)
+from utils.supplier_index import SupplierIndex
+
 # 确保工作目录正确
 script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 os.chdir(script_dir)
@@ -15,6 +20,13 @@ st.write("基于多准则决策分析的智能供应商评估系统")
 # 检查数据文件
 data_file = 'data/enhanced_supplier_data.csv'
 
+# 统一供应商表（含亚马逊供应商表、阿里巴巴列表页的店铺标签，已合并各数据源中的重复供应商）及其倒排索引（只构建一次）
+@st.cache_data
+def load_supplier_search(local_file):
+    suppliers = load_supplier_table(local_file, listing_file=ALIBABA_LISTING_FILE, amazon_file=AMAZON_SUPPLIER_FILE,
+                                    resolve=True)
+    return suppliers, SupplierIndex(suppliers)
+
 try:
     # 显示当前目录信息
     st.info(f"📁 当前工作目录：{os.getcwd()}")
@@ -94,29 +106,19 @@ try:
         - 💬 评论数量：{top_supplier['店铺评论数量']:,} 条
         - 📊 综合得分：{top_supplier['综合得分']:.3f}
         """)
-        
-    else:
-        st.error(f"❌ 未找到数据文件：{data_file}")
-        st.write("📂 当前目录内容：")
-        if os.path.exists('.'):
-            for item in os.listdir('.'):
-                st.write(f"  - {item}")
-        
+
         # 智能供应商匹配
         st.subheader("🤖 智能供应商匹配系统")
 
-        # 加载爬取的供应商数据
-        try:
-            crawled_df = pd.read_csv('data/crawled_suppliers.csv')
-            st.success(f"✅ 加载了 {len(crawled_df)} 条爬取的供应商数据")
-
-            # 合并数据源
-            all_suppliers = pd.concat([df, crawled_df], ignore_index=True)
-            st.info(f"📊 总供应商数据: {len(all_suppliers)} 条")
-
-        except FileNotFoundError:
+        # 合并本地与爬取的供应商数据为统一供应商表
+        all_suppliers, supplier_index = load_supplier_search(data_file)
+        crawled_count = int((all_suppliers['平台来源'] != LOCAL_PLATFORM).sum())
+        if crawled_count:
+            st.success(f"✅ 加载了 {crawled_count} 条爬取的供应商数据")
+        else:
             st.warning("⚠️ 未找到爬取的供应商数据，仅使用本地数据")
-            all_suppliers = df
+        duplicate_count = int((all_suppliers['重复记录数'] - 1).sum())
+        st.info(f"📊 总供应商数据: {len(all_suppliers)} 家（已合并 {duplicate_count} 条重复记录）")
 
         # 需求输入
         st.markdown("### 📝 输入您的采购需求")
@@ -145,21 +147,56 @@ try:
                 value=20
             )
 
-        if st.button("🔍 开始智能匹配", type="primary"):
-            # 筛选符合条件的供应商
-            filtered_suppliers = all_suppliers.copy()
+        # 认证、地区、平台、等级、店铺标签条件（倒排索引位图查询）
+        with st.expander("🔎 更多筛选条件", expanded=False):
+            filter_col1, filter_col2, filter_col3 = st.columns(3)
+
+            with filter_col1:
+                required_certifications = st.multiselect(
+                    "认证要求（需同时具备）", supplier_index.values('认证情况')
+                )
+                required_tags = st.multiselect(
+                    "店铺标签（需同时具备）", supplier_index.values('店铺标签')
+                )
+
+            with filter_col2:
+                required_regions = st.multiselect("所在省份", supplier_index.values('所在省份'))
+                required_platforms = st.multiselect("平台来源", supplier_index.values('平台来源'))
+
+            with filter_col3:
+                required_price_levels = st.multiselect("价格等级", supplier_index.values('价格等级'))
+                required_quality_levels = st.multiselect("质量等级", supplier_index.values('质量等级'))
 
-            # 筛选产品类别
-            if '主营产品' in filtered_suppliers.columns:
-                filtered_suppliers = filtered_suppliers[
-                    filtered_suppliers['主营产品'] == required_category
-                ]
+        pareto_only = st.checkbox(
+            "仅保留帕累托最优供应商 (Skyline)",
+            value=False,
+            help="在价格等级、店铺评分、交货周期、月产能上不被其他供应商全面超越的供应商"
+        )
+
+        if st.button("🔍 开始智能匹配", type="primary"):
+            # 通过倒排索引筛选符合条件的供应商
+            conditions = {
+                '主营产品': required_category,
+                '认证情况': required_certifications,
+                '店铺标签': required_tags,
+                '所在省份': required_regions,
+                '平台来源': required_platforms,
+                '价格等级': required_price_levels,
+                '质量等级': required_quality_levels,
+            }
+            filtered_suppliers = supplier_index.filter(all_suppliers, conditions)
+
+            # Skyline 预筛选：去掉被其他供应商全面支配的候选
+            if pareto_only and len(filtered_suppliers) > 0:
+                candidate_count = len(filtered_suppliers)
+                filtered_suppliers = skyline(filtered_suppliers, SUPPLIER_SKYLINE_CRITERIA)
+                st.info(f"🧭 帕累托最优预筛选：{candidate_count} 家中保留 {len(filtered_suppliers)} 家")
 
             if len(filtered_suppliers) > 0:
                 st.success(f"🎯 找到 {len(filtered_suppliers)} 家 {required_category} 类别的供应商")
 
                 # 显示筛选结果
-                display_columns = ['店铺名称', '店铺评分', '月产能', '最小起订量', '交货周期', '所在地区']
+                display_columns = ['供应商ID', '店铺名称', '数据来源', '店铺评分', '月产能', '最小起订量', '交货周期', '所在地区', '认证情况']
                 available_columns = [col for col in display_columns if col in filtered_suppliers.columns]
 
                 if available_columns:
@@ -168,8 +205,15 @@ try:
                     st.dataframe(filtered_suppliers.head(20), use_container_width=True)
 
             else:
-                st.error(f"😔 没有找到主营 '{required_category}' 的供应商")
+                st.error(f"😔 没有找到满足条件的主营 '{required_category}' 供应商")
 
+    else:
+        st.error(f"❌ 未找到数据文件：{data_file}")
+        st.write("📂 当前目录内容：")
+        if os.path.exists('.'):
+            for item in os.listdir('.'):
+                st.write(f"  - {item}")
+        
         if os.path.exists('data'):
             st.write("📂 data 目录内容：")
             for item in os.listdir('data'):
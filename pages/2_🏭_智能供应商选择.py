@@ -5,6 +5,14 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from utils.ahp import CR_THRESHOLD, SAATY_SCALE, evaluate_matrix, group_weights, on_saaty_scale, saaty_matrix
+from utils.skyline import skyline
+from utils.supplier_performance import DEFAULT_WINDOW, apply_performance, load_kpis
+from utils.topsis import (
+    benefit_mask, closeness_from_distances, ideal_distances, normalize_weights, rank_reversal_points,
+    top_k, weight_sensitivity
+)
+
 st.set_page_config(
     page_title="智能供应商选择",
     page_icon="🏭",
@@ -54,36 +62,89 @@ def generate_supplier_data():
     
     return pd.DataFrame(suppliers)
 
-# TOPSIS多准则决策分析
-def topsis_analysis(data, weights):
-    """TOPSIS多准则决策分析"""
-    # 选择评估指标
-    criteria = ['价格评分', '质量评分', '交期评分', '服务评分', '信誉评分', '产能评分']
-    
-    # 提取决策矩阵
-    decision_matrix = data[criteria].values
-    
-    # 标准化决策矩阵
-    normalized_matrix = decision_matrix / np.sqrt(np.sum(decision_matrix**2, axis=0))
-    
-    # 加权标准化矩阵
-    weighted_matrix = normalized_matrix * weights
-    
-    # 确定正理想解和负理想解
-    ideal_best = np.max(weighted_matrix, axis=0)
-    ideal_worst = np.min(weighted_matrix, axis=0)
-    
-    # 计算距离
-    distance_best = np.sqrt(np.sum((weighted_matrix - ideal_best)**2, axis=1))
-    distance_worst = np.sqrt(np.sum((weighted_matrix - ideal_worst)**2, axis=1))
-    
-    # 计算相对接近度
-    closeness = distance_worst / (distance_best + distance_worst)
-    
-    return closeness
+# 叠加履约日志中的滚动表现
+@st.cache_data
+def load_supplier_pool():
+    """供应商数据叠加履约日志（按供应商ID）：
+
+    有记录的供应商，交货周期取滚动交期均值，交期评分按滚动准时率折算为10分制。
+    """
+    suppliers = generate_supplier_data()
+    kpis = load_kpis()
+    if kpis is None:
+        return suppliers
+
+    rolling = apply_performance(suppliers, kpis, keys=suppliers['供应商ID'])
+    lead_time = rolling[f'交期均值_{DEFAULT_WINDOW}天']
+    on_time = rolling[f'准时率_{DEFAULT_WINDOW}天']
+    suppliers['交货周期'] = lead_time.round().where(lead_time.notna(), suppliers['交货周期'])
+    suppliers['交期评分'] = (on_time / 10).where(on_time.notna(), suppliers['交期评分'])
+    return suppliers
+
+# TOPSIS评估指标：单价、交货周期为成本型指标（越小越好）
+TOPSIS_CRITERIA = ['价格评分', '质量评分', '交期评分', '服务评分', '信誉评分', '产能评分', '单价', '交货周期']
+COST_CRITERIA = ['单价', '交货周期']
+
+# Skyline 预筛选指标：价格、质量、交期、产能
+SKYLINE_CRITERIA = {'单价': 'min', '质量评分': 'max', '交货周期': 'min', '产能评分': 'max'}
+
+# 排名结果只展示评分最高的若干家（部分选择，不对全部候选排序）
+TOP_N = 100
+# 敏感性分析只对当前评分最高的若干家抽样（各供应商的距离仍以全部候选确定的理想解为准）
+SENSITIVITY_MAX = 200
+
+# 按筛选条件准备候选供应商和 TOPSIS 距离矩阵
+@st.cache_data
+def prepare_candidates(category, region, price_range, pareto_only):
+    """筛选候选供应商，并预先计算 TOPSIS 标准化后的逐指标距离平方
+
+    结果按筛选条件缓存，只调整权重时不再重新筛选和标准化，打分只是一次矩阵-向量乘法。
+    返回 (候选供应商, Skyline 前的候选数, 整体距离, 类别内距离)，没有候选时距离为 None。
+    """
+    candidates = load_supplier_pool()
+
+    if category != "全部":
+        candidates = candidates[candidates['产品类别'] == category]
+    if region != "全部":
+        candidates = candidates[candidates['所在地区'] == region]
+    candidates = candidates[(candidates['单价'] >= price_range[0]) & (candidates['单价'] <= price_range[1])]
+
+    candidate_count = len(candidates)
+    if pareto_only and candidate_count > 0:
+        candidates = skyline(candidates, SKYLINE_CRITERIA)
+    candidates = candidates.copy()
+
+    if len(candidates) == 0:
+        return candidates, candidate_count, None, None
+
+    decision_matrix = candidates[TOPSIS_CRITERIA].to_numpy(dtype=float)
+    benefit = benefit_mask(TOPSIS_CRITERIA, COST_CRITERIA)
+    distances = ideal_distances(decision_matrix, benefit)
+    # 类别内：各产品类别独立标准化并确定理想解
+    category_distances = ideal_distances(decision_matrix, benefit, groups=pd.factorize(candidates['产品类别'])[0])
+    return candidates, candidate_count, distances, category_distances
+
+# 各评估指标的默认权重（滑块默认值，合计为1；成本型指标默认不参与）
+DEFAULT_WEIGHTS = [0.2, 0.25, 0.2, 0.15, 0.15, 0.05, 0.0, 0.0]
+
+# AHP 默认判断矩阵：由默认权重按 Saaty 标度取整，权重为0的指标按最低重要性比较
+AHP_DEFAULT_MATRIX = saaty_matrix(DEFAULT_WEIGHTS)
+
+def load_buyer_matrices(uploaded_file):
+    """读取多位采购员的判断矩阵 CSV（列：采购员、指标、各评估指标）
+
+    返回 (采购员列表, [采购员数, 指标数, 指标数] 数组)。
+    """
+    data = pd.read_csv(uploaded_file)
+    buyers = list(data['采购员'].unique())
+    matrices = np.stack([
+        data[data['采购员'] == buyer].set_index('指标').loc[TOPSIS_CRITERIA, TOPSIS_CRITERIA].to_numpy(dtype=float)
+        for buyer in buyers
+    ])
+    return buyers, matrices
 
 # 加载数据
-df = generate_supplier_data()
+df = load_supplier_pool()
 
 # 侧边栏控制
 st.sidebar.header("🎯 筛选条件")
@@ -111,51 +172,127 @@ price_range = st.sidebar.slider(
     step=1.0
 )
 
-# 筛选数据
-filtered_df = df.copy()
-
-if selected_category != "全部":
-    filtered_df = filtered_df[filtered_df['产品类别'] == selected_category]
-
-if selected_region != "全部":
-    filtered_df = filtered_df[filtered_df['所在地区'] == selected_region]
+# Skyline 预筛选：只保留在价格、质量、交期、产能上不被其他供应商支配的候选
+pareto_only = st.sidebar.checkbox(
+    "仅保留帕累托最优供应商 (Skyline)",
+    value=False,
+    help="去掉在单价、质量评分、交货周期、产能评分上都不优于某一其他供应商的候选"
+)
 
-filtered_df = filtered_df[
-    (filtered_df['单价'] >= price_range[0]) & 
-    (filtered_df['单价'] <= price_range[1])
-]
+# 筛选数据（与标准化后的距离矩阵一起按筛选条件缓存）
+filtered_df, candidate_count, topsis_distances, category_distances = prepare_candidates(
+    selected_category, selected_region, tuple(price_range), pareto_only
+)
+if pareto_only and candidate_count > 0:
+    st.sidebar.caption(f"Skyline 候选: {len(filtered_df)} / {candidate_count}")
 
 # 权重设置
 st.sidebar.header("⚖️ 评估权重设置")
-st.sidebar.markdown("调整各项指标的重要性权重：")
-
-weight_price = st.sidebar.slider("价格权重", 0.0, 1.0, 0.2, 0.05)
-weight_quality = st.sidebar.slider("质量权重", 0.0, 1.0, 0.25, 0.05)
-weight_delivery = st.sidebar.slider("交期权重", 0.0, 1.0, 0.2, 0.05)
-weight_service = st.sidebar.slider("服务权重", 0.0, 1.0, 0.15, 0.05)
-weight_reputation = st.sidebar.slider("信誉权重", 0.0, 1.0, 0.15, 0.05)
-weight_capacity = st.sidebar.slider("产能权重", 0.0, 1.0, 0.05, 0.05)
-
-# 权重归一化
-total_weight = weight_price + weight_quality + weight_delivery + weight_service + weight_reputation + weight_capacity
-if total_weight > 0:
-    weights = np.array([weight_price, weight_quality, weight_delivery, weight_service, weight_reputation, weight_capacity]) / total_weight
+weight_mode = st.sidebar.radio("权重设置方式", ["手动滑块", "AHP两两比较"])
+
+if weight_mode == "手动滑块":
+    st.sidebar.markdown("调整各项指标的重要性权重：")
+
+    weight_price = st.sidebar.slider("价格权重", 0.0, 1.0, DEFAULT_WEIGHTS[0], 0.05)
+    weight_quality = st.sidebar.slider("质量权重", 0.0, 1.0, DEFAULT_WEIGHTS[1], 0.05)
+    weight_delivery = st.sidebar.slider("交期权重", 0.0, 1.0, DEFAULT_WEIGHTS[2], 0.05)
+    weight_service = st.sidebar.slider("服务权重", 0.0, 1.0, DEFAULT_WEIGHTS[3], 0.05)
+    weight_reputation = st.sidebar.slider("信誉权重", 0.0, 1.0, DEFAULT_WEIGHTS[4], 0.05)
+    weight_capacity = st.sidebar.slider("产能权重", 0.0, 1.0, DEFAULT_WEIGHTS[5], 0.05)
+    weight_unit_price = st.sidebar.slider("单价权重（越低越好）", 0.0, 1.0, DEFAULT_WEIGHTS[6], 0.05)
+    weight_lead_time = st.sidebar.slider("交货周期权重（越短越好）", 0.0, 1.0, DEFAULT_WEIGHTS[7], 0.05)
+
+    # 权重归一化
+    raw_weights = np.array([
+        weight_price, weight_quality, weight_delivery, weight_service,
+        weight_reputation, weight_capacity, weight_unit_price, weight_lead_time
+    ])
+    total_weight = raw_weights.sum()
+    weights = normalize_weights(raw_weights)
+
+    st.sidebar.markdown(f"**权重总和**: {total_weight:.2f}")
 else:
-    weights = np.array([1/6] * 6)
+    # AHP：由两两比较判断矩阵计算权重
+    with st.expander("📐 AHP 两两比较判断矩阵", expanded=True):
+        st.markdown(
+            "按 Saaty 1-9 标度填写**上三角**：第 i 行第 j 列表示“行指标相对列指标的重要程度”"
+            f"（{'，'.join(f'{k} {v}' for k, v in SAATY_SCALE.items())}，倒数表示反向），下三角自动取倒数。"
+        )
+
+        default_matrix = pd.DataFrame(
+            AHP_DEFAULT_MATRIX.round(2),
+            index=TOPSIS_CRITERIA, columns=TOPSIS_CRITERIA
+        )
+        edited_matrix = st.data_editor(default_matrix, use_container_width=True, key="ahp_matrix")
 
-st.sidebar.markdown(f"**权重总和**: {total_weight:.2f}")
+        uploaded_matrices = st.file_uploader(
+            "群体决策：上传多位采购员的判断矩阵（CSV，列为 采购员、指标 及各评估指标）",
+            type=['csv']
+        )
+        template = default_matrix.rename_axis('指标').reset_index()
+        template.insert(0, '采购员', '采购员A')
+        st.download_button(
+            "下载判断矩阵模板",
+            data=template.to_csv(index=False).encode('utf-8-sig'),
+            file_name="AHP判断矩阵模板.csv",
+            mime="text/csv"
+        )
+
+        matrix_values = edited_matrix.to_numpy(dtype=float)
+        if uploaded_matrices is not None:
+            buyers, buyer_matrices = load_buyer_matrices(uploaded_matrices)
+            if not on_saaty_scale(buyer_matrices):
+                st.warning("⚠️ 部分采购员的判断矩阵超出 Saaty 1/9 ~ 9 标度，请检查上传的比较值。")
+            ahp_result = group_weights(buyer_matrices)
+            st.success(f"已按几何平均聚合 {len(buyers)} 位采购员的判断矩阵")
+            st.dataframe(pd.DataFrame({
+                '采购员': buyers,
+                '一致性比率CR': ahp_result['individual_cr'].round(4),
+                '是否通过': np.where(ahp_result['individual_cr'] < CR_THRESHOLD, '✅', '❌'),
+            }), use_container_width=True)
+        elif np.isnan(matrix_values).any() or not on_saaty_scale(matrix_values):
+            st.error("判断矩阵中存在空值或超出 Saaty 1/9 ~ 9 标度的比较值，已使用默认判断矩阵。")
+            ahp_result = evaluate_matrix(AHP_DEFAULT_MATRIX)
+        else:
+            ahp_result = evaluate_matrix(matrix_values)
+
+        ahp_col1, ahp_col2, ahp_col3 = st.columns(3)
+        with ahp_col1:
+            st.metric("最大特征值 λmax", f"{ahp_result['lambda_max']:.4f}")
+        with ahp_col2:
+            st.metric("一致性比率 CR", f"{ahp_result['cr']:.4f}")
+        with ahp_col3:
+            st.metric("一致性检验", "通过" if ahp_result['consistent'] else "未通过")
+
+        if not ahp_result['consistent']:
+            st.warning(f"⚠️ CR ≥ {CR_THRESHOLD}，判断矩阵一致性不足，建议调整比较值。")
+
+        st.dataframe(
+            pd.DataFrame({'指标': TOPSIS_CRITERIA, 'AHP权重': ahp_result['weights'].round(4)}),
+            use_container_width=True
+        )
+
+    weights = ahp_result['weights']
+    (weight_price, weight_quality, weight_delivery, weight_service,
+     weight_reputation, weight_capacity, weight_unit_price, weight_lead_time) = weights
+    st.sidebar.markdown(f"**AHP一致性比率 CR**: {ahp_result['cr']:.4f}")
 
 # 主要内容区域
 if len(filtered_df) == 0:
     st.warning("⚠️ 没有符合筛选条件的供应商，请调整筛选条件。")
 else:
-    # 执行TOPSIS分析
-    topsis_scores = topsis_analysis(filtered_df, weights)
+    # 执行TOPSIS分析：距离矩阵已缓存，权重变化只需矩阵-向量乘法
+    topsis_scores = closeness_from_distances(*topsis_distances, weights)
     filtered_df['TOPSIS评分'] = topsis_scores
-    filtered_df['排名'] = filtered_df['TOPSIS评分'].rank(ascending=False, method='min').astype(int)
-    
-    # 按TOPSIS评分排序
-    ranked_df = filtered_df.sort_values('TOPSIS评分', ascending=False)
+
+    # 同类别供应商之间的排名（各类别独立计算理想解）
+    filtered_df['类别内评分'] = closeness_from_distances(*category_distances, weights)
+    filtered_df['类别内排名'] = filtered_df.groupby('产品类别')['类别内评分'].rank(ascending=False, method='min').astype(int)
+
+    # 只取评分最高的 TOP_N 家并排序
+    top_rows, top_ranks = top_k(topsis_scores, TOP_N)
+    ranked_df = filtered_df.iloc[top_rows].copy()
+    ranked_df['排名'] = top_ranks
     
     # 显示结果
     st.subheader("🏆 供应商排名结果")
@@ -164,7 +301,7 @@ else:
     
     with col1:
         # 排名表格
-        display_columns = ['排名', '公司名称', '产品类别', '所在地区', 'TOPSIS评分', '单价', '交货周期']
+        display_columns = ['排名', '公司名称', '产品类别', '类别内排名', '所在地区', 'TOPSIS评分', '单价', '交货周期']
         display_df = ranked_df[display_columns].head(10)
         display_df['TOPSIS评分'] = display_df['TOPSIS评分'].round(4)
         display_df['单价'] = display_df['单价'].round(2)
@@ -187,6 +324,90 @@ else:
         if st.button("📞 联系供应商", type="primary"):
             st.info("📧 联系信息已发送到您的邮箱")
 
+    # 权重敏感性分析
+    with st.expander("🎲 权重敏感性分析（蒙特卡洛）"):
+        st.markdown("在当前权重附近按 Dirichlet 分布抽样大量权重组合，检验推荐结果的稳健性。")
+
+        if len(filtered_df) < 2:
+            st.info("至少需要2家供应商才能进行敏感性分析。")
+        else:
+            sens_col1, sens_col2, sens_col3 = st.columns(3)
+            with sens_col1:
+                n_samples = st.selectbox("抽样次数", [1000, 5000, 10000, 20000], index=1)
+            with sens_col2:
+                concentration = st.slider("集中度（越大越接近当前权重）", 5, 200, 50, 5)
+            with sens_col3:
+                sensitivity_top_k = st.slider("Top-K", 1, min(10, len(filtered_df)), min(3, len(filtered_df)))
+
+            # 候选很多时只对当前评分最高的 SENSITIVITY_MAX 家抽样
+            sample_rows = top_k(topsis_scores, SENSITIVITY_MAX)[0]
+            if len(filtered_df) > SENSITIVITY_MAX:
+                st.caption(f"候选供应商较多，仅对当前评分最高的 {len(sample_rows)} 家进行抽样分析。")
+            sample_distances = tuple(d2[sample_rows] for d2 in topsis_distances)
+            sample_names = filtered_df['公司名称'].to_numpy()[sample_rows]
+
+            summary, rank_distribution = weight_sensitivity(
+                None, weights, n_samples=n_samples, concentration=concentration, top_k=sensitivity_top_k,
+                distances=sample_distances
+            )
+
+            sensitivity_df = pd.DataFrame({
+                '公司名称': sample_names,
+                '当前排名': summary['base_rank'],
+                '平均排名': summary['mean_rank'].round(2),
+                '排名标准差': summary['rank_std'].round(2),
+                '排名区间(P5-P95)': [f"{lo:.0f} - {hi:.0f}" for lo, hi in zip(summary['rank_p5'], summary['rank_p95'])],
+                '第一名概率': summary['prob_top1'],
+                f'前{sensitivity_top_k}名概率': summary['prob_top_k'],
+            }).sort_values('当前排名')
+
+            leader = sensitivity_df.iloc[0]
+            metric_col1, metric_col2, metric_col3 = st.columns(3)
+            with metric_col1:
+                st.metric("当前首选保持第一的概率", f"{leader['第一名概率']:.1%}")
+            with metric_col2:
+                st.metric(f"当前首选进入前{sensitivity_top_k}的概率", f"{leader[f'前{sensitivity_top_k}名概率']:.1%}")
+            with metric_col3:
+                st.metric("曾获得第一名的供应商数", int((sensitivity_df['第一名概率'] > 0).sum()))
+
+            st.dataframe(
+                sensitivity_df.head(10).style.format({'第一名概率': '{:.1%}', f'前{sensitivity_top_k}名概率': '{:.1%}'}),
+                use_container_width=True
+            )
+
+            # 排名分布热力图（当前前10名供应商）
+            heatmap_rows = np.argsort(summary['base_rank'])[:10]
+            n_ranks = min(10, rank_distribution.shape[1])
+            fig_rank = px.imshow(
+                rank_distribution[heatmap_rows][:, :n_ranks],
+                x=[f"第{r + 1}名" for r in range(n_ranks)],
+                y=sample_names[heatmap_rows],
+                color_continuous_scale='Blues',
+                labels=dict(color='概率'),
+                title="排名分布（抽样权重下各名次出现的概率）",
+                aspect='auto'
+            )
+            st.plotly_chart(fig_rank, use_container_width=True)
+
+            # 排名反转点：单个指标权重变化到多少时首选供应商会改变
+            reversals = rank_reversal_points(None, weights, distances=sample_distances)
+            if reversals:
+                names = sample_names
+                reversal_df = pd.DataFrame([
+                    {
+                        '指标': TOPSIS_CRITERIA[j],
+                        '当前权重': f"{weights[j]:.2f}",
+                        '临界权重': f"{point:.2f}",
+                        '变化前首选': names[before],
+                        '变化后首选': names[after],
+                    }
+                    for j, point, before, after in reversals
+                ])
+                st.markdown("**排名反转点**（单个指标权重从0调到1，其余指标按原比例分配剩余权重）")
+                st.dataframe(reversal_df, use_container_width=True)
+            else:
+                st.info("任一单个指标权重在0到1之间变化时，首选供应商都不会改变。")
+
     # 可视化分析
     st.markdown("---")
     st.subheader("📊 供应商分析")
@@ -313,6 +534,7 @@ else:
             st.markdown("#### 评估得分")
             st.write(f"**TOPSIS评分**: {detail_data['TOPSIS评分']:.4f}")
             st.write(f"**综合排名**: 第{detail_data['排名']}名")
+            st.write(f"**类别内排名**: 第{detail_data['类别内排名']}名")
             st.write(f"**价格评分**: {detail_data['价格评分']:.1f}/10")
             st.write(f"**质量评分**: {detail_data['质量评分']:.1f}/10")
             st.write(f"**交期评分**: {detail_data['交期评分']:.1f}/10")
@@ -325,7 +547,10 @@ col1, col2, col3 = st.columns(3)
 
 with col1:
     if st.button("📊 导出排名结果"):
-        csv = ranked_df.to_csv(index=False)
+        # 导出全部候选时才做完整排序
+        export_df = filtered_df.sort_values('TOPSIS评分', ascending=False)
+        export_df['排名'] = export_df['TOPSIS评分'].rank(ascending=False, method='min').astype(int)
+        csv = export_df.to_csv(index=False)
         st.download_button(
             label="下载排名 CSV",
             data=csv,
@@ -351,11 +576,14 @@ TOPSIS评分: {ranked_df.iloc[0]['TOPSIS评分']:.4f}
 - 服务权重: {weight_service:.2f}
 - 信誉权重: {weight_reputation:.2f}
 - 产能权重: {weight_capacity:.2f}
+- 单价权重: {weight_unit_price:.2f}
+- 交货周期权重: {weight_lead_time:.2f}
 
 筛选条件:
 - 产品类别: {selected_category}
 - 地区: {selected_region}
 - 价格范围: {price_range[0]:.2f} - {price_range[1]:.2f}
+- 帕累托最优预筛选: {'是' if pareto_only else '否'}
 
 候选供应商数量: {len(filtered_df)}
         """
@@ -377,9 +605,10 @@ with st.expander("❓ 使用帮助"):
     ### 📖 功能说明
     
     1. **筛选条件**: 根据产品类别、地区、价格等条件筛选供应商
-    2. **权重设置**: 调整各评估指标的重要性权重
+    2. **权重设置**: 手动调整各评估指标的权重，或用 AHP 两两比较矩阵（支持多位采购员群体决策）计算权重
     3. **TOPSIS分析**: 基于多准则决策的供应商排名
-    4. **可视化对比**: 雷达图、散点图等多种对比方式
+    4. **权重敏感性分析**: 蒙特卡洛抽样权重，查看排名分布、Top-K概率和排名反转点
+    5. **可视化对比**: 雷达图、散点图等多种对比方式
     
     ### 📊 评估指标说明
     
@@ -389,6 +618,7 @@ with st.expander("❓ 使用帮助"):
     - **服务评分**: 客户服务质量
     - **信誉评分**: 企业信誉和口碑
     - **产能评分**: 生产能力和规模
+    - **单价 / 交货周期**: 成本型指标，数值越小越好（默认权重为0）
     
     ### 🔧 TOPSIS方法
 
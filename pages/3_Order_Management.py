@@ -8,6 +8,9 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import warnings
 import os
+from utils.anomaly_detection import ANOMALY_LABELS, ROLLING_DAYS, anomalies_in, anomaly_summary, detect_cube_anomalies
+from utils.calendar_features import get_calendar_store
+from utils.abc_xyz import CLASSIFIER_STATE_FILE, classify_orders
 
 warnings.filterwarnings('ignore')
 
@@ -31,6 +34,16 @@ def load_order_data():
         st.error("未找到增强订单数据文件，请先运行数据生成器")
         return pd.DataFrame()
 
+# 产品 × 地区 需求立方体的异常检测（检测器状态保存在磁盘，只处理新日期；须传入未筛选的全部订单）
+@st.cache_data
+def detect_order_anomalies(df):
+    return detect_cube_anomalies(df)
+
+# 全品类 ABC/XYZ 分类（按全部订单计算，不随地区筛选变化；分类器状态保存在磁盘，只处理新日期）
+@st.cache_data
+def load_product_classes(df):
+    return classify_orders(df, path=CLASSIFIER_STATE_FILE)
+
 df = load_order_data()
 
 if not df.empty:
@@ -98,7 +111,19 @@ if not df.empty:
         else:
             filtered_df = df
 
-    # 使用筛选后的数据
+    # ABC/XYZ 分类筛选
+    product_classes = load_product_classes(df)
+    abc_filter = st.sidebar.multiselect("ABC 分类", list('ABC'), default=list('ABC'),
+                                        help="A 类贡献前 80% 销售额，B 类其后 15%，其余为 C 类")
+    xyz_filter = st.sidebar.multiselect("XYZ 分类", list('XYZ'), default=list('XYZ'),
+                                        help="按周销量变异系数：X ≤ 0.5 稳定，Y ≤ 1.0 波动，Z 不规则")
+    if len(abc_filter) < 3 or len(xyz_filter) < 3:
+        class_products = product_classes.index[product_classes['ABC'].isin(abc_filter) & product_classes['XYZ'].isin(xyz_filter)]
+        filtered_df = filtered_df[filtered_df['product_name'].isin(class_products)]
+        st.sidebar.metric("分类筛选后订单数", f"{len(filtered_df):,}")
+
+    # 使用筛选后的数据（异常检测仍基于全部订单）
+    all_orders = df
     df = filtered_df
 
     st.sidebar.markdown("---")
@@ -162,6 +187,20 @@ if not df.empty:
             line=dict(color='green')
         ))
         
+        # 标注出现 产品 × 地区 需求异常的日期：检测基于全部订单，再取筛选范围内的日期和序列
+        anomalies = anomalies_in(detect_order_anomalies(all_orders), df)
+        anomaly_days = daily_orders[daily_orders['日期'].isin(anomalies['date'])]
+        
+        if not anomaly_days.empty:
+            fig.add_trace(go.Scatter(
+                x=anomaly_days['日期'],
+                y=anomaly_days['销售数量'],
+                mode='markers',
+                name='需求异常日',
+                yaxis='y2',
+                marker=dict(color='red', size=10, symbol='x')
+            ))
+        
         fig.update_layout(
             title="订单数量与销售数量趋势",
             xaxis_title="日期",
@@ -172,6 +211,33 @@ if not df.empty:
         
         st.plotly_chart(fig, use_container_width=True)
         
+        # 异常检测结果
+        st.subheader("⚠️ 订单异常检测")
+        
+        summary = anomaly_summary(anomalies)
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("异常点总数", summary['total'])
+        with col2:
+            st.metric("激增", summary['spike'])
+        with col3:
+            st.metric("骤降", summary['drop'])
+        
+        if not anomalies.empty:
+            anomaly_display = anomalies.sort_values('date', ascending=False).copy()
+            anomaly_display['date'] = anomaly_display['date'].dt.strftime('%Y-%m-%d')
+            anomaly_display['anomaly'] = anomaly_display['anomaly'].map(ANOMALY_LABELS)
+            anomaly_display['expected'] = anomaly_display['expected'].round(1)
+            anomaly_display['robust_z'] = anomaly_display['robust_z'].round(2)
+            anomaly_display['product'] = anomaly_display['series'].str[0]
+            anomaly_display['region'] = anomaly_display['series'].str[1]
+            anomaly_display = anomaly_display[['date', 'product', 'region', 'anomaly', 'value', 'expected', 'robust_z']]
+            anomaly_display.columns = ['日期', '产品', '地区', '异常类型', f'近{ROLLING_DAYS}天销量', '正常水平', '稳健Z分数']
+            st.dataframe(anomaly_display, use_container_width=True)
+        else:
+            st.success("✅ 当前筛选范围内未检测到显著异常")
+        
         # 产品类别分析
         st.subheader("🏷️ 产品类别分析")
         
@@ -487,15 +553,13 @@ if not df.empty:
                 }).reset_index()
                 daily_data.columns = ['date', 'quantity', 'orders']
                 
-                # 创建特征
-                daily_data['day_of_week'] = daily_data['date'].dt.dayofweek
-                daily_data['month'] = daily_data['date'].dt.month
-                daily_data['day_of_year'] = daily_data['date'].dt.dayofyear
-                daily_data['days_since_start'] = (daily_data['date'] - daily_data['date'].min()).dt.days
+                # 从预计算的日历特征表按整数日索引取特征（含目标国家的节假日/购物节）
+                calendar_store = get_calendar_store()
+                calendar_country = selected_country if has_detailed_location and selected_country != '全部' else None
+                origin_date = daily_data['date'].min()
                 
                 # 准备训练数据
-                feature_cols = ['day_of_week', 'month', 'day_of_year', 'days_since_start']
-                X = daily_data[feature_cols]
+                X = calendar_store.features(daily_data['date'], calendar_country, origin=origin_date)
                 y_quantity = daily_data['quantity']
                 y_orders = daily_data['orders']
                 
@@ -515,12 +579,7 @@ if not df.empty:
                 )
                 
                 # 创建未来特征
-                future_features = pd.DataFrame({
-                    'day_of_week': future_dates.dayofweek,
-                    'month': future_dates.month,
-                    'day_of_year': future_dates.dayofyear,
-                    'days_since_start': (future_dates - daily_data['date'].min()).days
-                })
+                future_features = calendar_store.features(future_dates, calendar_country, origin=origin_date)
                 
                 # 预测
                 pred_quantity = model_quantity.predict(future_features)
@@ -584,6 +643,18 @@ if not df.empty:
                 
                 st.plotly_chart(fig, use_container_width=True)
                 
+                # 预测期内的节假日/购物节
+                upcoming_events = calendar_store.event_calendar(calendar_country)
+                upcoming_events = upcoming_events[
+                    (upcoming_events['日期'] >= future_dates.min()) &
+                    (upcoming_events['日期'] <= future_dates.max())
+                ]
+                if not upcoming_events.empty:
+                    st.info("📅 预测期内节假日/购物节: " + "、".join(
+                        f"{row['节日']}({row['日期'].strftime('%m-%d')})"
+                        for _, row in upcoming_events.drop_duplicates('节日').iterrows()
+                    ))
+                
                 # 显示详细预测数据
                 st.subheader("📋 详细预测数据")
                 forecast_display = forecast_df.copy()
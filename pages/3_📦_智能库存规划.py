@@ -5,7 +5,10 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
-import math
+
+from utils.inventory_metrics import calculate_inventory_metrics, category_lead_times
+from utils.supplier_data import load_supplier_table
+from utils.supplier_performance import apply_performance, load_kpis
 
 st.set_page_config(
     page_title="智能库存规划",
@@ -16,6 +19,24 @@ st.set_page_config(
 st.title("📦 智能库存规划系统")
 st.markdown("---")
 
+# 产品类别对应的供应商主营类别（没有对应供应商的类别取全部供应商的平均）
+SUPPLIER_CATEGORIES = {
+    "电子产品": "电子产品",
+    "笔记本电脑": "电子产品",
+    "耳机": "电子产品",
+    "女装系列": "女装",
+    "女装配饰": "女装",
+}
+
+def lead_time_variation(categories):
+    """各产品类别的交期变异系数（供应商交期标准差 / 交期均值）
+
+    交期均值和方差由供应商的交货周期、准时交货率（及履约日志实测）估计，见 utils.inventory_metrics.category_lead_times。
+    """
+    lead = category_lead_times(apply_performance(load_supplier_table(), load_kpis()))
+    cv = np.sqrt(lead['交期方差']) / lead['交期均值']
+    return categories.map(SUPPLIER_CATEGORIES).map(cv).fillna(cv.mean()).to_numpy()
+
 # 生成模拟库存数据
 @st.cache_data
 def generate_inventory_data():
@@ -69,61 +90,18 @@ def generate_inventory_data():
             "订货成本": ordering_cost,
             "当前库存": current_stock,
             "在途库存": np.random.randint(0, int(avg_demand * lead_time * 0.5)),
-            "安全库存": 0,  # 待计算
-            "再订货点": 0,  # 待计算
-            "经济订货量": 0,  # 待计算
-            "库存周转率": 0,  # 待计算
-            "缺货风险": 0,  # 待计算
+            "安全库存": 0.0,  # 待计算
+            "再订货点": 0.0,  # 待计算
+            "经济订货量": 0.0,  # 待计算
+            "库存周转率": 0.0,  # 待计算
+            "缺货风险": 0.0,  # 待计算
         })
     
-    return pd.DataFrame(inventory_data)
-
-# 库存优化计算函数
-def calculate_inventory_metrics(data, service_level=0.95):
-    """计算库存优化指标"""
-    from scipy import stats
-    
-    # 服务水平对应的Z值
-    z_score = stats.norm.ppf(service_level)
-    
-    for idx, row in data.iterrows():
-        avg_demand = row['平均日需求']
-        demand_std = row['需求标准差']
-        lead_time = row['采购提前期']
-        unit_cost = row['单位成本']
-        holding_cost_rate = row['库存持有成本率']
-        ordering_cost = row['订货成本']
-        current_stock = row['当前库存']
-        
-        # 计算安全库存
-        lead_time_demand_std = demand_std * math.sqrt(lead_time)
-        safety_stock = z_score * lead_time_demand_std
-        
-        # 计算再订货点
-        reorder_point = avg_demand * lead_time + safety_stock
-        
-        # 计算经济订货量 (EOQ)
-        annual_demand = avg_demand * 365
-        holding_cost = unit_cost * holding_cost_rate
-        eoq = math.sqrt(2 * annual_demand * ordering_cost / holding_cost)
-        
-        # 计算库存周转率
-        inventory_turnover = annual_demand / (current_stock + safety_stock)
-        
-        # 计算缺货风险
-        if current_stock < reorder_point:
-            shortage_risk = 1 - stats.norm.cdf(current_stock, reorder_point, lead_time_demand_std)
-        else:
-            shortage_risk = 0
-        
-        # 更新数据
-        data.at[idx, '安全库存'] = safety_stock
-        data.at[idx, '再订货点'] = reorder_point
-        data.at[idx, '经济订货量'] = eoq
-        data.at[idx, '库存周转率'] = inventory_turnover
-        data.at[idx, '缺货风险'] = shortage_risk
-    
-    return data
+    inventory_df = pd.DataFrame(inventory_data)
+    # 提前期标准差（交货延误波动）按所属类别供应商的交期变异系数折算
+    inventory_df.insert(inventory_df.columns.get_loc("采购提前期") + 1, "提前期标准差",
+                        inventory_df["采购提前期"] * lead_time_variation(inventory_df["产品类别"]))
+    return inventory_df
 
 # 加载数据
 df = generate_inventory_data()
@@ -161,7 +139,7 @@ filtered_df = df.copy()
 if selected_category != "全部":
     filtered_df = filtered_df[filtered_df['产品类别'] == selected_category]
 
-# 计算库存指标
+# 计算库存指标（全部产品一次列运算）
 filtered_df = calculate_inventory_metrics(filtered_df, service_level)
 
 # 根据库存状态筛选
@@ -450,7 +428,7 @@ with st.expander("❓ 使用帮助"):
     
     ### 🔧 计算方法
     
-    - **安全库存** = Z值 × 提前期需求标准差
+    - **安全库存** = Z值 × 提前期需求标准差，提前期需求标准差 = √(提前期 × 日需求方差 + 日需求² × 提前期方差)
     - **再订货点** = 提前期需求 + 安全库存
     - **EOQ** = √(2 × 年需求量 × 订货成本 / 库存持有成本)
     - **库存周转率** = 年需求量 / 平均库存
@@ -6,6 +6,20 @@ import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import warnings
 import os
+from scipy import stats
+from utils.abc_xyz import CLASSIFIER_STATE_FILE, class_matrix, classify_orders
+from utils.demand_cube import build_demand_matrix
+from utils.inventory_metrics import cheapest_supplier, category_lead_times, inventory_kernel, supplier_safety_stock
+from utils.inventory_simulation import simulate_inventory, summarize_simulation
+from utils.multi_location import (TRANSFER_LEAD_TIMES, network_tables, plan_network, regional_correlation,
+                                  regional_demand, transfer_lead_times)
+from utils.order_allocation import ORDERING_COST, allocate_orders
+from utils.policy_optimizer import (OPTIMAL_POLICY_FILE, POLICY_TYPES, QUANTITY_FACTORS, REVIEW_PERIODS,
+                                    SAFETY_FACTORS, optimize_policies)
+from utils.probabilistic_forecast import forecast_paths, lead_time_demand_quantiles
+from utils.skyline import skyline
+from utils.supplier_data import SUPPLIER_SKYLINE_CRITERIA, load_supplier_table
+from utils.supplier_performance import apply_performance, load_kpis
 
 warnings.filterwarnings('ignore')
 
@@ -25,33 +39,239 @@ def load_data():
         orders_df = pd.read_csv('data/enhanced_customer_orders.csv')
         orders_df['order_date'] = pd.to_datetime(orders_df['order_date'])
 
-        suppliers_df = pd.read_csv('data/enhanced_supplier_data.csv')
+        # 本地与爬取的供应商合并为统一供应商表（含解析后的数值列），
+        # 准时交货率、退货率、交货周期取履约日志中的滚动表现（有记录时）
+        suppliers_df = apply_performance(load_supplier_table(), load_kpis())
         
         return orders_df, suppliers_df
     except FileNotFoundError:
         st.error("未找到数据文件，请先运行增强数据生成器")
         return pd.DataFrame(), pd.DataFrame()
 
+# 全品类 ABC（销售额占比）/ XYZ（周销量变异系数）分类（分类器状态保存在磁盘，只处理新日期）
+@st.cache_data
+def load_product_classes(orders_df):
+    return classify_orders(orders_df, path=CLASSIFIER_STATE_FILE)
+
+# 残差自助法：一次性模拟全部产品的提前期需求
+@st.cache_data
+def bootstrap_lead_time_demand(orders_df, lead_time, service_level, n_paths=2000, block_size=7):
+    demand = build_demand_matrix(orders_df, 'product_name')
+
+    # 趋势 + 周季节点预测，残差取去趋势后的部分（趋势不计入波动）
+    _, paths = forecast_paths(demand.to_numpy(), lead_time, n_paths=n_paths, block_size=block_size)
+    quantile, mean_demand_lt = lead_time_demand_quantiles(paths, lead_time, service_level / 100)
+
+    return pd.DataFrame({
+        '提前期需求分位数': quantile,
+        '提前期需求均值': mean_demand_lt
+    }, index=demand.index)
+
+# 全品类采购分配：各产品按 EOQ 补货，一次混合整数规划分配给多个供应商
+@st.cache_data
+def plan_catalog_orders(orders_df, suppliers_df, lead_time, holding_cost_rate, stockout_cost):
+    products = orders_df.groupby('product_name').agg(
+        类别=('product_category', 'first'),
+        单价=('unit_price', 'mean'),
+        毛利率=('profit_margin', 'mean')
+    )
+    # 平均日需求与单品分析口径一致：按有订单的日期求平均
+    daily_demand = orders_df.groupby(['product_name', 'order_date'])['quantity'].sum().groupby(level=0).mean()
+    annual_demand = daily_demand.reindex(products.index) * 365
+    eoq = np.sqrt(2 * annual_demand * ORDERING_COST / (products['单价'] * holding_cost_rate))
+
+    skus = pd.DataFrame({
+        '类别': products['类别'],
+        '补货量': np.ceil(eoq),
+        '单位成本': products['单价'] * (1 - products['毛利率']),
+        '最长交期': lead_time + 5,
+    }, index=products.index)
+    return allocate_orders(skus, suppliers_df, stockout_cost=stockout_cost)
+
+# 全品类 SKU × 候选供应商的安全库存（考虑交期波动）
+@st.cache_data
+def catalog_safety_stock(orders_df, suppliers_df, service_level, holding_cost_rate):
+    daily = orders_df.groupby(['product_name', 'order_date'])['quantity'].sum()
+    products = orders_df.groupby('product_name')
+    skus = pd.DataFrame({
+        '类别': products['product_category'].first(),
+        '日均需求': daily.groupby(level=0).mean(),
+        '需求标准差': daily.groupby(level=0).std(),
+        '单位成本': products['unit_price'].mean(),
+    })
+    return supplier_safety_stock(skus, suppliers_df, service_level, holding_cost_rate)
+
+# 多区域库存规划：SKU × 区域仓，分仓与集中（风险分担）两种模式
+# positions 为 SKU × 区域 的库存位置表（现有 + 在途），区域间需求相关系数由区域需求立方体估计
+@st.cache_data
+def plan_regional_inventory(orders_df, suppliers_df, lead_time, service_level, holding_cost_rate, transport,
+                            positions):
+    demand, skus, locations = regional_demand(orders_df)
+    products = orders_df.groupby('product_name').agg(
+        类别=('product_category', 'first'),
+        单价=('unit_price', 'mean')
+    ).reindex(skus)
+    lead = category_lead_times(suppliers_df).reindex(products['类别'].to_numpy())
+    plan = plan_network(
+        demand,
+        lead['交期均值'].fillna(lead_time).to_numpy(),
+        lead['交期方差'].fillna(0.0).to_numpy(),
+        *transfer_lead_times(locations, transport),
+        products['单价'].to_numpy(),
+        holding_cost_rate,
+        ORDERING_COST,
+        service_level / 100,
+        positions=positions.reindex(index=skus, columns=locations).fillna(0.0).to_numpy(dtype=float),
+        correlation=regional_correlation(demand)
+    )
+    return network_tables(plan, skus, locations, products['单价'].to_numpy())
+
+# 安全库存交期来源：各产品取持有成本最低的供应商 / 手动交期（其余选项为供应商行号）
+BEST_SUPPLIER = -1
+MANUAL_LEAD_TIME = -2
+
+# 库存模拟与策略优化的需求路径数（优化要评估上千个候选策略，路径数取少一些）
+SIMULATION_PATHS = 1000
+OPTIMIZER_PATHS = 200
+
+def choose_supplier_pairs(safety_pairs, lead_time_supplier):
+    """各产品的交期来源：缺省取安全库存成本最低的供应商，选中某供应商时同类别产品改由它供货"""
+    best_pairs = cheapest_supplier(safety_pairs)
+    chosen_pairs = best_pairs.copy()
+    if lead_time_supplier >= 0:
+        switched = safety_pairs[safety_pairs['供应商序号'] == lead_time_supplier].set_index('SKU')
+        chosen_pairs.loc[switched.index] = switched
+    return best_pairs, chosen_pairs
+
+def catalog_policies(orders_df, suppliers_df, lead_time, lead_time_supplier, safety_stock_method,
+                     service_level, holding_cost_rate):
+    """全品类 (再订货点, 订货量) 补货策略，口径与单品备货建议一致"""
+    daily = orders_df.groupby(['product_name', 'order_date'])['quantity'].sum()
+    demand_mean = daily.groupby(level=0).mean()
+    demand_std = daily.groupby(level=0).std()
+    price = orders_df.groupby('product_name')['unit_price'].mean().reindex(demand_mean.index)
+
+    # 交期：正态分布假设且未选手动交期时取各产品的供应商交期，否则用滑块交期（无波动）
+    lead_mean = pd.Series(float(lead_time), index=demand_mean.index)
+    lead_std = pd.Series(0.0, index=demand_mean.index)
+    if safety_stock_method == "正态分布假设" and lead_time_supplier != MANUAL_LEAD_TIME:
+        safety_pairs = catalog_safety_stock(orders_df, suppliers_df, service_level / 100, holding_cost_rate)
+        if not safety_pairs.empty:
+            chosen_pairs = choose_supplier_pairs(safety_pairs, lead_time_supplier)[1]
+            lead_mean.update(chosen_pairs['交期均值'])
+            lead_std.update(chosen_pairs['交期标准差'])
+
+    metrics = inventory_kernel(demand_mean, demand_std.fillna(0.0), lead_mean, price, holding_cost_rate,
+                               ORDERING_COST, 0.0, stats.norm.ppf(service_level / 100), lead_std ** 2)
+    policies = pd.DataFrame({
+        '再订货点': metrics['再订货点'],
+        '订货量': metrics['经济订货量'],
+        '交期均值': lead_mean,
+        '交期标准差': lead_std,
+        '日持有成本': price * holding_cost_rate / 365,
+    }, index=demand_mean.index)
+    if safety_stock_method != "正态分布假设":
+        policies['再订货点'] = bootstrap_lead_time_demand(orders_df, lead_time, service_level)['提前期需求分位数']
+    return policies
+
+def catalog_demand_paths(orders_df, products, horizon, n_paths, block_size=7):
+    """残差自助法生成全品类需求路径 [路径数, 产品数, 天数]（趋势 + 周季节点预测，去趋势残差）"""
+    demand = build_demand_matrix(orders_df, 'product_name').reindex(products, fill_value=0)
+    return forecast_paths(demand.to_numpy(dtype=float), horizon, n_paths=n_paths, block_size=block_size)[1]
+
+# 全品类库存蒙特卡洛模拟：期初库存为 再订货点 + 订货量
+@st.cache_data
+def simulate_catalog_inventory(orders_df, policies, horizon, ordering_cost, stockout_cost,
+                               n_paths=SIMULATION_PATHS):
+    paths = catalog_demand_paths(orders_df, policies.index, horizon, n_paths)
+    result = simulate_inventory(
+        paths,
+        policies['再订货点'].to_numpy(),
+        order_quantity=policies['订货量'].to_numpy(),
+        lead_time=policies['交期均值'].to_numpy(),
+        lead_time_std=policies['交期标准差'].to_numpy(),
+        holding_cost=policies['日持有成本'].to_numpy(),
+        ordering_cost=ordering_cost,
+        stockout_cost=stockout_cost,
+        level_quantiles=(0.1, 0.5, 0.9)
+    )
+    return summarize_simulation(result, index=policies.index), result
+
+# 全品类补货策略优化：在候选网格上模拟，取 持有 + 订货 + 缺货 成本最低的策略（现行策略一并评估）
+@st.cache_data
+def optimize_catalog_policies(orders_df, policies, horizon, ordering_cost, stockout_cost, policy_type,
+                              n_paths=OPTIMIZER_PATHS):
+    paths = catalog_demand_paths(orders_df, policies.index, horizon, n_paths)
+    best, _ = optimize_policies(
+        paths, policies[['交期均值', '交期标准差', '日持有成本']], policy_type, ordering_cost, stockout_cost,
+        baseline=policies[['再订货点', '订货量']]
+    )
+    return best
+
 orders_df, suppliers_df = load_data()
 
 if not orders_df.empty and not suppliers_df.empty:
     
     st.sidebar.header("🎛️ 备货参数设置")
     
+    # 按 ABC/XYZ 分类筛选产品
+    product_classes = load_product_classes(orders_df)
+    abc_filter = st.sidebar.multiselect("ABC 分类", list('ABC'), default=list('ABC'),
+                                        help="A 类贡献前 80% 销售额，B 类其后 15%，其余为 C 类")
+    xyz_filter = st.sidebar.multiselect("XYZ 分类", list('XYZ'), default=list('XYZ'),
+                                        help="按周销量变异系数：X ≤ 0.5 稳定，Y ≤ 1.0 波动，Z 不规则")
+    products = orders_df['product_name'].unique()
+    product_class = product_classes['分类'].reindex(products)
+    class_products = products[product_classes['ABC'].reindex(products).isin(abc_filter).to_numpy()
+                              & product_classes['XYZ'].reindex(products).isin(xyz_filter).to_numpy()]
+    if len(class_products) == 0:
+        st.sidebar.warning("没有符合所选分类的产品，显示全部产品")
+        class_products = products
+
     # 选择产品
     selected_product = st.sidebar.selectbox(
         "选择产品",
-        orders_df['product_name'].unique()
+        class_products,
+        format_func=lambda product: f"{product}（{product_class[product]}）"
     )
     
     # 备货参数
     lead_time = st.sidebar.slider("供应商交货周期 (天)", 7, 60, 15)
     service_level = st.sidebar.slider("服务水平 (%)", 85, 99, 95)
+    safety_stock_method = st.sidebar.selectbox(
+        "安全库存计算方法",
+        ["需求分位数（残差自助法）", "正态分布假设"],
+        help="需求分位数法直接取模拟提前期需求的服务水平分位数作为再订货点"
+    )
     forecast_period = st.sidebar.slider("预测周期 (天)", 30, 180, 60)
     
     # 成本参数
     holding_cost_rate = st.sidebar.slider("库存持有成本率 (%/年)", 10, 50, 25) / 100
     stockout_cost = st.sidebar.number_input("缺货成本 ($/件)", 1.0, 100.0, 10.0)
+    policy_type = st.sidebar.selectbox(
+        "补货策略优化类型",
+        list(POLICY_TYPES),
+        format_func=POLICY_TYPES.get,
+        help="在候选策略网格上模拟，取持有、订货、缺货成本之和最低的策略"
+    )
+    pareto_only = st.sidebar.checkbox(
+        "推荐供应商仅保留帕累托最优",
+        value=False,
+        help="在价格、质量、交期、产能上不被其他供应商全面超越的供应商"
+    )
+
+    # 安全库存的交期来源：同类别供应商的交货周期和准时交货率
+    selected_category = orders_df.loc[orders_df['product_name'] == selected_product, 'product_category'].iloc[0]
+    category_supplier_rows = np.flatnonzero(suppliers_df['主营产品'].to_numpy() == selected_category)
+    lead_time_supplier = st.sidebar.selectbox(
+        "安全库存交期来源",
+        [BEST_SUPPLIER, MANUAL_LEAD_TIME] + category_supplier_rows.tolist(),
+        format_func=lambda option: {
+            BEST_SUPPLIER: "各产品取安全库存成本最低的供应商",
+            MANUAL_LEAD_TIME: "手动交期（滑块，不含交期波动）",
+        }.get(option, f"{selected_category}：{suppliers_df['店铺名称'].iloc[option] if option >= 0 else ''}"),
+        help="按供应商交货周期和准时交货率估计交期均值与波动；选择某个供应商时，同类别产品均改由该供应商供货"
+    )
     
     if st.sidebar.button("🚀 开始分析", type="primary"):
         
@@ -81,6 +301,10 @@ if not orders_df.empty and not suppliers_df.empty:
                 avg_price = product_data['unit_price'].mean()
                 st.metric("平均单价", f"${avg_price:.2f}")
             
+            selected_class = product_classes.loc[selected_product]
+            st.caption(f"分类：{selected_class['分类']}（销售额占比 {selected_class['销售额占比']:.1%}，"
+                       f"周销量变异系数 {selected_class['变异系数']:.2f}）")
+
             # 需求预测
             st.header("🔮 需求预测与备货建议")
             
@@ -91,14 +315,31 @@ if not orders_df.empty and not suppliers_df.empty:
             forecast_daily_demand = avg_daily_demand
             forecast_total_demand = forecast_daily_demand * forecast_period
             
-            # 计算安全库存
-            # 使用正态分布假设计算安全库存
-            from scipy import stats
-            z_score = stats.norm.ppf(service_level / 100)
-            safety_stock = z_score * demand_std * np.sqrt(lead_time)
-            
-            # 计算再订货点
-            reorder_point = (forecast_daily_demand * lead_time) + safety_stock
+            # 该产品在所选交期来源下的安全库存（需求波动 + 交期波动）
+            product_pairs = catalog_safety_stock(
+                orders_df, suppliers_df, service_level / 100, holding_cost_rate
+            ).query('SKU == @selected_product')
+            if lead_time_supplier >= 0:
+                product_pairs = product_pairs[product_pairs['供应商序号'] == lead_time_supplier]
+
+            if safety_stock_method == "正态分布假设" and lead_time_supplier != MANUAL_LEAD_TIME and not product_pairs.empty:
+                supplier_pair = product_pairs.loc[product_pairs['安全库存持有成本'].idxmin()]
+                safety_stock = supplier_pair['安全库存']
+                reorder_point = supplier_pair['再订货点']
+                st.caption(f"交期来源：{supplier_pair['店铺名称']}（交期均值 {supplier_pair['交期均值']:.1f} 天，"
+                           f"标准差 {supplier_pair['交期标准差']:.1f} 天）")
+            elif safety_stock_method == "正态分布假设":
+                # 使用正态分布假设计算安全库存（手动交期，不含交期波动）
+                z_score = stats.norm.ppf(service_level / 100)
+                safety_stock = z_score * demand_std * np.sqrt(lead_time)
+                
+                # 计算再订货点
+                reorder_point = (forecast_daily_demand * lead_time) + safety_stock
+            else:
+                # 再订货点直接取提前期需求的服务水平分位数
+                lead_time_demand = bootstrap_lead_time_demand(orders_df, lead_time, service_level).loc[selected_product]
+                reorder_point = lead_time_demand['提前期需求分位数']
+                safety_stock = max(0.0, reorder_point - lead_time_demand['提前期需求均值'])
             
             # 计算经济订货量 (EOQ)
             annual_demand = forecast_daily_demand * 365
@@ -178,38 +419,57 @@ if not orders_df.empty and not suppliers_df.empty:
             
             st.plotly_chart(fig, use_container_width=True)
             
-            # 库存模拟
+            # 库存模拟：全品类按各自 (再订货点, 订货量) 策略同时模拟，残差自助法生成需求路径
             st.subheader("📊 库存水平模拟")
-            
-            # 模拟未来库存水平
+
             simulation_days = min(forecast_period, 90)
-            current_inventory = eoq  # 假设当前库存为EOQ
-            
-            inventory_levels = [current_inventory]
-            dates = [datetime.now()]
-            
-            for day in range(1, simulation_days + 1):
-                # 模拟每日需求（使用正态分布）
-                daily_demand_sim = max(0, np.random.normal(forecast_daily_demand, demand_std))
-                
-                # 更新库存
-                current_inventory -= daily_demand_sim
-                
-                # 检查是否需要补货
-                if current_inventory <= reorder_point and day % lead_time == 0:
-                    current_inventory += eoq
-                
-                inventory_levels.append(current_inventory)
-                dates.append(datetime.now() + timedelta(days=day))
-            
+            policies = catalog_policies(
+                orders_df, suppliers_df, lead_time, lead_time_supplier, safety_stock_method,
+                service_level, holding_cost_rate
+            )
+            # 当前产品使用上面展示的再订货点和订货量
+            policies.loc[selected_product, ['再订货点', '订货量']] = [reorder_point, eoq]
+            simulation_summary, simulation = simulate_catalog_inventory(
+                orders_df, policies, simulation_days, ordering_cost, stockout_cost
+            )
+            product_column = policies.index.get_loc(selected_product)
+            product_summary = simulation_summary.loc[selected_product]
+
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("满足率", f"{product_summary['满足率均值']:.1%}",
+                          help=f"5%分位数 {product_summary['满足率P5']:.1%}")
+            with col2:
+                st.metric("缺货概率", f"{product_summary['缺货概率']:.1%}",
+                          help=f"模拟期内出现缺货的路径比例，平均缺货 {product_summary['平均缺货天数']:.1f} 天")
+            with col3:
+                st.metric("平均库存", f"{product_summary['平均库存']:.0f}件")
+            with col4:
+                st.metric(f"{simulation_days}天库存总成本", f"${product_summary['总成本均值']:,.0f}",
+                          help=f"持有 + 订货 + 缺货成本，95%分位数 ${product_summary['总成本P95']:,.0f}")
+
+            dates = [datetime.now() + timedelta(days=day) for day in range(1, simulation_days + 1)]
+            low, median, high = simulation['level_quantiles'][:, :, product_column].T
+
             # 绘制库存模拟图
             fig_sim = go.Figure()
-            
+
+            fig_sim.add_trace(go.Scatter(x=dates, y=high, mode='lines', line=dict(width=0),
+                                         showlegend=False, hoverinfo='skip'))
+            fig_sim.add_trace(go.Scatter(
+                x=dates,
+                y=low,
+                mode='lines',
+                line=dict(width=0),
+                fill='tonexty',
+                fillcolor='rgba(0, 128, 0, 0.2)',
+                name='10%~90%分位数'
+            ))
             fig_sim.add_trace(go.Scatter(
                 x=dates,
-                y=inventory_levels,
+                y=median,
                 mode='lines',
-                name='库存水平',
+                name='库存水平中位数',
                 line=dict(color='green')
             ))
             
@@ -228,13 +488,61 @@ if not orders_df.empty and not suppliers_df.empty:
             )
             
             fig_sim.update_layout(
-                title="库存水平模拟",
+                title=f"库存水平模拟（{SIMULATION_PATHS}条需求路径）",
                 xaxis_title="日期",
                 yaxis_title="库存数量",
                 hovermode='x unified'
             )
             
             st.plotly_chart(fig_sim, use_container_width=True)
+
+            fig_cost = px.histogram(
+                x=simulation['total_cost'][:, product_column],
+                nbins=40,
+                title=f"{simulation_days}天库存总成本分布",
+                labels={'x': '总成本 ($)'}
+            )
+            st.plotly_chart(fig_cost, use_container_width=True)
+
+            with st.expander("📋 全品类模拟结果"):
+                st.dataframe(simulation_summary.round(3), use_container_width=True)
+
+            # 补货策略优化
+            st.subheader("🎯 补货策略优化")
+            optimal_policies = optimize_catalog_policies(
+                orders_df, policies, simulation_days, ordering_cost, stockout_cost, policy_type
+            )
+            optimal = optimal_policies.loc[selected_product]
+
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                if policy_type == 'TS':
+                    st.metric("盘点周期", f"{optimal['盘点周期']:.0f}天")
+                else:
+                    st.metric("最优再订货点", f"{optimal['再订货点']:.0f}件", delta=f"{optimal['再订货点'] - reorder_point:+.0f}")
+            with col2:
+                if policy_type == 'RQ':
+                    st.metric("最优订货量", f"{optimal['订货量']:.0f}件", delta=f"{optimal['订货量'] - eoq:+.0f}")
+                else:
+                    st.metric("订货至水平", f"{optimal['订货至']:.0f}件")
+            with col3:
+                st.metric(f"{simulation_days}天模拟成本", f"${optimal['总成本']:,.0f}",
+                          delta=f"{optimal['总成本'] - optimal['现行成本']:+,.0f}（相对EOQ/再订货点）"
+                          if pd.notna(optimal['现行成本']) else None,
+                          delta_color="inverse")
+            with col4:
+                st.metric("满足率", f"{optimal['满足率']:.1%}", help=f"缺货概率 {optimal['缺货概率']:.1%}")
+
+            candidates = len(SAFETY_FACTORS) * (len(REVIEW_PERIODS) if policy_type == 'TS' else len(QUANTITY_FACTORS))
+            st.caption(f"{POLICY_TYPES[policy_type]}：每个产品在 {OPTIMIZER_PATHS} 条需求路径上评估 {candidates} 个候选策略；"
+                       "全品类夜间优化可运行 python -m utils.policy_optimizer")
+
+            with st.expander("📋 全品类最优策略"):
+                st.dataframe(optimal_policies.round(2), use_container_width=True)
+
+            if os.path.exists(OPTIMAL_POLICY_FILE):
+                with st.expander("🌙 夜间全量优化结果"):
+                    st.dataframe(pd.read_csv(OPTIMAL_POLICY_FILE, index_col=0).round(2), use_container_width=True)
             
             # 供应商匹配
             st.header("🏭 推荐供应商")
@@ -246,19 +554,16 @@ if not orders_df.empty and not suppliers_df.empty:
             relevant_suppliers = suppliers_df[suppliers_df['主营产品'] == product_category].copy()
             
             if not relevant_suppliers.empty:
-                # 清理数据
-                relevant_suppliers['店铺年份_数值'] = relevant_suppliers['店铺年份'].str.replace('年', '').astype(float)
-                relevant_suppliers['月产能_数值'] = relevant_suppliers['月产能'].str.replace('件', '').astype(float)
-                relevant_suppliers['最小起订量_数值'] = relevant_suppliers['最小起订量'].str.replace('件', '').astype(float)
-                relevant_suppliers['交货周期_数值'] = relevant_suppliers['交货周期'].str.replace('天', '').astype(float)
-                relevant_suppliers['准时交货率_数值'] = relevant_suppliers['准时交货率'].str.replace('%', '').astype(float)
-                
                 # 筛选满足条件的供应商
                 suitable_suppliers = relevant_suppliers[
                     (relevant_suppliers['月产能_数值'] >= eoq) &
                     (relevant_suppliers['最小起订量_数值'] <= eoq) &
                     (relevant_suppliers['交货周期_数值'] <= lead_time + 5)
                 ].copy()
+
+                # Skyline 预筛选：去掉在各维度都被其他供应商支配的候选
+                if pareto_only and not suitable_suppliers.empty:
+                    suitable_suppliers = skyline(suitable_suppliers, SUPPLIER_SKYLINE_CRITERIA).copy()
                 
                 if not suitable_suppliers.empty:
                     # 计算综合评分
@@ -315,9 +620,150 @@ if not orders_df.empty and not suppliers_df.empty:
                     st.warning("没有找到满足当前需求条件的供应商")
             else:
                 st.warning(f"没有找到主营 '{product_category}' 的供应商")
+
+            # 全品类采购分配
+            st.header("🧮 全品类采购分配")
+            st.caption("所有产品的补货量一次求解分配给多个供应商：满足月产能（跨产品共享）、最小起订量与交期上限，"
+                       "最小化采购成本 + 延迟/退货风险成本 + 订货成本")
+
+            allocations, allocation_summary, allocation_info = plan_catalog_orders(
+                orders_df, suppliers_df, lead_time, holding_cost_rate, stockout_cost
+            )
+
+            if allocation_summary.empty:
+                st.warning(f"采购分配求解失败：{allocation_info['message']}")
+            else:
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("产品数", len(allocation_summary))
+                with col2:
+                    st.metric("使用供应商数", allocation_info['suppliers_used'])
+                with col3:
+                    st.metric("总采购金额", f"${allocation_summary['采购金额'].sum():,.0f}")
+                with col4:
+                    st.metric("求解耗时", f"{allocation_info['elapsed'] * 1000:.0f} ms",
+                              help=f"{allocation_info['variables']} 个变量，{allocation_info['constraints']} 条约束")
+
+                shortage = allocation_summary[allocation_summary['缺口'] > 0]
+                if not shortage.empty:
+                    st.warning(f"⚠️ {len(shortage)} 个产品在交期上限内的供应商产能不足，存在采购缺口")
+
+                st.subheader(f"📦 {selected_product} 的采购分配")
+                product_allocations = allocations[allocations['SKU'] == selected_product]
+                if product_allocations.empty:
+                    st.info("该产品没有满足交期要求的供应商")
+                else:
+                    st.dataframe(product_allocations.drop(columns='SKU').round(2), use_container_width=True)
+
+                with st.expander("📋 全品类分配汇总"):
+                    st.dataframe(allocation_summary.round(2), use_container_width=True)
         
         else:
             st.error(f"未找到产品 '{selected_product}' 的历史数据")
 
+    with st.expander("📋 全品类 ABC/XYZ 分类"):
+        class_counts, class_revenue = class_matrix(product_classes)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("产品数")
+            st.dataframe(class_counts, use_container_width=True)
+        with col2:
+            st.write("销售额占比")
+            st.dataframe((class_revenue / class_revenue.to_numpy().sum()).round(3), use_container_width=True)
+        st.dataframe(product_classes.round(3), use_container_width=True)
+
+    # 交期波动对全品类安全库存的影响（不依赖“开始分析”按钮，切换交期来源后即时更新）
+    st.header("⏱️ 交期波动与安全库存")
+    st.caption("安全库存 = z × √(交期均值 × 日需求方差 + 日需求² × 交期方差)；"
+               "交期均值与方差由供应商交货周期和准时交货率估计，履约日志有收货记录时用实测值")
+
+    safety_pairs = catalog_safety_stock(orders_df, suppliers_df, service_level / 100, holding_cost_rate)
+    if safety_pairs.empty:
+        st.info("没有与产品类别匹配的供应商")
+    else:
+        best_pairs, chosen_pairs = choose_supplier_pairs(safety_pairs, lead_time_supplier)
+
+        chosen_cost = chosen_pairs['安全库存持有成本'].sum()
+        best_cost = best_pairs['安全库存持有成本'].sum()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("全品类安全库存持有成本", f"${chosen_cost:,.0f}/年",
+                      delta=f"{chosen_cost - best_cost:+,.0f}（相对各产品最优供应商）", delta_color="inverse")
+        with col2:
+            st.metric("全品类安全库存", f"{chosen_pairs['安全库存'].sum():,.0f}件")
+        with col3:
+            st.metric("平均交期标准差", f"{chosen_pairs['交期标准差'].mean():.1f}天")
+
+        st.subheader(f"📋 {selected_product} 的候选供应商")
+        candidate_pairs = safety_pairs[safety_pairs['SKU'] == selected_product].sort_values('安全库存持有成本')
+        st.dataframe(
+            candidate_pairs.drop(columns=['SKU', '供应商序号']).head(20).round(2),
+            use_container_width=True
+        )
+
+        with st.expander("📋 全品类安全库存（按当前交期来源）"):
+            catalog_view = chosen_pairs.drop(columns='供应商序号').copy()
+            catalog_view['最优供应商'] = best_pairs['店铺名称']
+            catalog_view['可节省'] = chosen_pairs['安全库存持有成本'] - best_pairs['安全库存持有成本']
+            st.dataframe(catalog_view.round(2), use_container_width=True)
+
+
+    # 多区域备货（不依赖“开始分析”按钮）
+    st.header("🌍 多区域备货与风险分担")
+    st.caption("区域需求取各大区的按日销量；分仓模式下各区域仓直接向供应商补货（供应商交期 + 调拨时间），"
+               "集中模式下中心仓按合计需求覆盖供应商交期，区域仓只覆盖调拨时间")
+
+    transport = st.radio("调拨运输方式", list(TRANSFER_LEAD_TIMES), horizontal=True)
+    with st.expander("📝 各区域仓库存位置（现有 + 在途，件）"):
+        positions = st.data_editor(
+            pd.DataFrame(0.0, index=pd.Index(sorted(orders_df['product_name'].unique()), name='SKU'),
+                         columns=sorted(orders_df['customer_region'].unique())),
+            use_container_width=True
+        )
+    location_table, pooling_table = plan_regional_inventory(
+        orders_df, suppliers_df, lead_time, service_level, holding_cost_rate, transport, positions
+    )
+
+    decentralized_total = pooling_table['分仓安全库存'].sum()
+    pooled_total = pooling_table['集中模式安全库存'].sum()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("分仓模式安全库存", f"{decentralized_total:,.0f}件")
+    with col2:
+        st.metric("集中模式安全库存", f"{pooled_total:,.0f}件",
+                  delta=f"{pooled_total - decentralized_total:+,.0f}件", delta_color="inverse")
+    pooled_skus = int((pooling_table['推荐模式'] == '集中').sum())
+    with col3:
+        st.metric("按推荐模式的安全库存占用节省", f"${pooling_table['节省金额'].sum():,.0f}",
+                  help=f"平均需求聚合系数 {pooling_table['需求聚合系数'].mean():.2f}（合计需求标准差 / 各区域标准差之和），"
+                       f"区域间平均相关系数 {pooling_table['平均相关系数'].mean():.2f}；"
+                       "各产品取安全库存较少的模式，只有集中模式更少时才计节省")
+    if pooled_skus < len(pooling_table):
+        st.info(f"💡 {len(pooling_table) - pooled_skus} 个产品推荐分仓：{transport}调拨时间较长，"
+                "区域仓要对调拨时间单独缓冲，加上中心仓对供应商交期的缓冲，超过了合计需求互补带来的风险分担收益；"
+                f"其余 {pooled_skus} 个产品集中备货更省")
+
+    st.subheader(f"📍 {selected_product} 的区域备货")
+    st.dataframe(
+        location_table[location_table['SKU'] == selected_product].drop(columns='SKU').set_index('区域').round(1),
+        use_container_width=True
+    )
+
+    region_safety = location_table.groupby('区域')[['安全库存', '集中模式安全库存']].sum().reset_index()
+    fig_region = px.bar(
+        region_safety.melt(id_vars='区域', var_name='模式', value_name='安全库存合计'),
+        x='区域',
+        y='安全库存合计',
+        color='模式',
+        barmode='group',
+        title="各区域仓全品类安全库存：分仓模式 vs 集中模式"
+    )
+    st.plotly_chart(fig_region, use_container_width=True)
+
+    with st.expander("📋 全品类风险分担对比"):
+        st.dataframe(pooling_table.sort_values('节省金额', ascending=False).round(2), use_container_width=True)
+    with st.expander("📋 全品类 × 区域备货参数"):
+        st.dataframe(location_table.round(2), use_container_width=True)
+
 else:
     st.error("无法加载数据，请检查数据文件是否存在")
@@ -6,9 +6,13 @@ import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import io
 import base64
-from scipy import stats
 import warnings
 import os
+from utils.anomaly_detection import ANOMALY_LABELS, anomaly_summary, detect_cube_anomalies
+from utils.inventory_metrics import catalog_replenishment, category_lead_times
+from utils.order_allocation import ORDERING_COST
+from utils.supplier_data import load_supplier_table
+from utils.supplier_performance import apply_performance, load_kpis
 
 # 确保工作目录正确
 script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -39,6 +43,46 @@ def load_all_data():
         st.error(f"数据文件加载失败: {e}")
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
+# 产品 × 地区 需求立方体的异常检测（检测器状态保存在磁盘，只处理新日期）
+@st.cache_data
+def detect_sales_anomalies(orders):
+    return detect_cube_anomalies(orders)
+
+def filter_anomalies(anomalies, date_range, region):
+    """按时间范围和大区筛选已检测的异常（'全部' 表示不筛选）"""
+    mask = pd.Series(True, index=anomalies.index)
+    if len(date_range) == 2:
+        start_date, end_date = date_range
+        anomaly_dates = pd.to_datetime(anomalies['date']).dt.date
+        mask &= (anomaly_dates >= start_date) & (anomaly_dates <= end_date)
+    if region != '全部':
+        mask &= anomalies['series'].str[1] == region
+    return anomalies[mask]
+
+# 各品类供应商的交期均值与方差（由交货周期、准时交货率估计，履约日志有记录时用实测值）
+@st.cache_data
+def load_category_lead_times():
+    return category_lead_times(apply_performance(load_supplier_table(), load_kpis()))
+
+def filter_orders(orders_df, date_range, region, country, state):
+    """按时间范围和 大区/国家/省份 筛选订单（'全部' 表示不筛选）"""
+    mask = pd.Series(True, index=orders_df.index)
+    if len(date_range) == 2:
+        start_date, end_date = date_range
+        order_dates = orders_df['order_date'].dt.date
+        mask &= (order_dates >= start_date) & (order_dates <= end_date)
+    for column, value in (('customer_region', region), ('customer_country', country), ('customer_state', state)):
+        if value != '全部':
+            mask &= orders_df[column] == value
+    return orders_df[mask]
+
+# 全品类补货参数，按筛选条件缓存（以筛选条件而不是筛选后的订单表作为缓存键）
+@st.cache_data
+def catalog_replenishment_report(filter_key, service_level, lead_time, holding_cost_rate):
+    orders = filter_orders(load_all_data()[0], *filter_key)
+    return catalog_replenishment(orders, load_category_lead_times(), service_level / 100, holding_cost_rate,
+                                 lead_time, ordering_cost=ORDERING_COST)
+
 orders_df, suppliers_df, crawled_suppliers_df = load_all_data()
 
 if not orders_df.empty:
@@ -111,27 +155,10 @@ if not orders_df.empty:
         selected_state = '全部'
     
     # 应用筛选条件
-    filtered_orders = orders_df.copy()
-
-    # 时间筛选
+    filter_key = (tuple(date_range), selected_region, selected_country, selected_state)
+    filtered_orders = filter_orders(orders_df, *filter_key)
     if len(date_range) == 2:
         start_date, end_date = date_range
-        filtered_orders = filtered_orders[
-            (filtered_orders['order_date'].dt.date >= start_date) &
-            (filtered_orders['order_date'].dt.date <= end_date)
-        ]
-
-    # 地区筛选
-    if has_detailed_location:
-        if selected_region != '全部':
-            filtered_orders = filtered_orders[filtered_orders['customer_region'] == selected_region]
-        if selected_country != '全部':
-            filtered_orders = filtered_orders[filtered_orders['customer_country'] == selected_country]
-        if selected_state != '全部':
-            filtered_orders = filtered_orders[filtered_orders['customer_state'] == selected_state]
-    else:
-        if selected_region != '全部':
-            filtered_orders = filtered_orders[filtered_orders['customer_region'] == selected_region]
 
     # 显示筛选信息
     filter_info = []
@@ -380,6 +407,20 @@ if not orders_df.empty:
             else:
                 insights.append(f"🚀 **扩展机会**: 当前有 {unique_products} 种产品，建议扩展产品线以满足更多需求")
             
+            # 销售异常
+            anomalies = filter_anomalies(detect_sales_anomalies(orders_df), date_range, selected_region)
+            summary = anomaly_summary(anomalies)
+            if summary['total'] > 0:
+                latest = anomalies.sort_values('date').iloc[-1]
+                insights.append(
+                    f"⚠️ **销售异常**: 识别出 {summary['total']} 个显著的销售异常点"
+                    f"（激增 {summary['spike']} 个，骤降 {summary['drop']} 个），"
+                    f"最近一次为 {latest['date'].strftime('%Y-%m-%d')} {latest['series'][0]}（{latest['series'][1]}）"
+                    f"{ANOMALY_LABELS[latest['anomaly']]}"
+                )
+            else:
+                insights.append("✅ **销售平稳**: 分析期内未识别出显著的销售异常点")
+            
             for insight in insights:
                 st.success(insight)
         
@@ -625,54 +666,21 @@ if not orders_df.empty:
             with col1:
                 service_level = st.slider("目标服务水平 (%)", 85, 99, 95)
             with col2:
-                lead_time = st.slider("平均交货周期 (天)", 7, 60, 15)
+                lead_time = st.slider("平均交货周期 (天)", 7, 60, 15, help="品类没有供应商数据时使用，此时不计交期波动")
             with col3:
                 holding_cost_rate = st.slider("年持有成本率 (%)", 10, 50, 25) / 100
 
             # 产品库存分析
             st.subheader("📊 产品库存分析")
 
-            # 计算每个产品的库存指标
-            product_inventory = []
-
-            for product in filtered_orders['product_name'].unique()[:10]:  # 分析前10个产品
-                product_data = filtered_orders[filtered_orders['product_name'] == product]
-
-                if len(product_data) > 5:
-                    # 计算基本统计
-                    daily_demand = product_data.groupby('order_date')['quantity'].sum()
-                    avg_demand = daily_demand.mean()
-                    demand_std = daily_demand.std()
-                    avg_price = product_data['unit_price'].mean()
+            # 全品类一次分组计算（需求波动 + 交期波动），交期取各品类供应商的交期均值与方差
+            inventory_df = catalog_replenishment_report(filter_key, service_level, lead_time, holding_cost_rate)
+            inventory_df = inventory_df.drop(columns='类别').round({
+                '平均日需求': 1, '需求标准差': 1, '交期均值': 1, '交期标准差': 1,
+                '安全库存': 0, '再订货点': 0, '经济订货量': 0, '平均单价': 2, '年需求量': 0
+            })
 
-                    # 计算库存指标
-                    z_score = stats.norm.ppf(service_level / 100)
-                    safety_stock = z_score * demand_std * np.sqrt(lead_time)
-                    reorder_point = (avg_demand * lead_time) + safety_stock
-
-                    # EOQ计算
-                    annual_demand = avg_demand * 365
-                    ordering_cost = 50
-                    holding_cost = avg_price * holding_cost_rate
-
-                    if holding_cost > 0:
-                        eoq = np.sqrt((2 * annual_demand * ordering_cost) / holding_cost)
-                    else:
-                        eoq = annual_demand / 12
-
-                    product_inventory.append({
-                        '产品名称': product,
-                        '平均日需求': round(avg_demand, 1),
-                        '需求标准差': round(demand_std, 1),
-                        '安全库存': round(safety_stock, 0),
-                        '再订货点': round(reorder_point, 0),
-                        '经济订货量': round(eoq, 0),
-                        '平均单价': round(avg_price, 2),
-                        '年需求量': round(annual_demand, 0)
-                    })
-
-            if product_inventory:
-                inventory_df = pd.DataFrame(product_inventory)
+            if not inventory_df.empty:
                 st.dataframe(inventory_df, use_container_width=True)
 
                 # 库存投资分析
@@ -702,7 +710,7 @@ if not orders_df.empty:
                 inventory_df['库存天数'] = 365 / inventory_df['库存周转率']
 
                 fig_turnover = px.bar(
-                    inventory_df.head(10),
+                    inventory_df.sort_values('库存周转率', ascending=False),
                     x='产品名称',
                     y='库存周转率',
                     title="产品库存周转率对比",
@@ -2,13 +2,87 @@ import pandas as pd
 import numpy as np
 import random
 import time
-from datetime import datetime
+import os
+from datetime import datetime, date
+import hashlib
 import json
+from urllib.parse import parse_qs, urlparse
+
+from utils.async_crawler import AsyncCrawler, CrawlRequest, CrawlResult, SimulatedFetcher, request_fingerprint
+from utils.crawl_frontier import DONE, IN_PROGRESS, CrawlFrontier, read_seed_csv
+from utils.listing_parser import parse_listing, parse_pages, parse_profile
+from utils.response_cache import ResponseCache
+from utils.supplier_data import ALIBABA_LISTING_FILE, LISTING_CATEGORIES
+from utils.supplier_performance import SupplierPerformanceLog
+from utils.supplier_store import SUPPLIER_STORE_FILE, SupplierStore, content_hash
+
+# 供应商类别
+CATEGORIES = ["女装", "男装", "童装", "电子产品", "美妆用品", "家居用品"]
+
+# 各平台的供应商搜索地址
+SEARCH_URLS = {
+    "1688": "https://s.1688.com/company/company_search.htm",
+    "阿里巴巴": "https://www.alibaba.com/trade/search",
+}
+
+# 各平台的店铺详情页地址（合作年限、退货率、准时交货率只在详情页提供），按店铺ID生成
+DETAIL_URLS = {
+    "1688": "https://{store_id}.1688.com/page/creditdetail.htm",
+    "阿里巴巴": "https://{store_id}.en.alibaba.com/company_profile.html",
+}
+
+# 种子列表页（供应商数据表 url 列中的阿里巴巴搜索分页）每页的店铺数
+SEED_PAGE_RESULTS = 20
+
+# 列表页字段：其内容哈希未变化时，增量爬取不再请求详情页
+LISTING_FIELDS = ["name", "category", "location", "years", "rating", "reviews", "min_order",
+                  "capacity", "delivery_time", "certifications", "price_level", "quality_level"]
+
+# 模拟抓取时各平台单次请求的网络延迟（秒）
+SIMULATED_LATENCY = {
+    "1688": 1.0,
+    "阿里巴巴": 1.5,
+}
+
+# 响应缓存有效期（秒）：列表页变化较快，详情页（信用数据）一天内视为不变
+CACHE_TTL = {
+    "listing": 6 * 3600,
+    "detail": 24 * 3600,
+}
+
+# 详情页刷新周期（天）：列表页未变化的店铺超过该天数也重新抓取详情页，准时交货率等变化才能被采集。
+# 每家店铺的周期在 [最短, 最长] 内按店铺固定，首次全量爬取后的刷新分散到不同日期
+DETAIL_REFRESH_DAYS = (4, 7)
+
+
+def _with_unit(value, unit, fmt=""):
+    """数值加单位；页面上没有该字段（None）时返回空字符串"""
+    return "" if value is None else f"{value:{fmt}}{unit}"
 
 class SupplierCrawler:
-    """供应商数据爬虫类 - 模拟从多个平台获取供应商数据"""
+    """供应商数据爬虫类 - 模拟从多个平台获取供应商数据
+
+    fetcher 为可插拔的异步抓取器（见 utils.async_crawler），缺省使用模拟抓取器；
+    所有平台、类别的请求由 AsyncCrawler 并发调度。
+    cache 为可选的 ResponseCache，命中缓存的页面不再访问网络；
+    frontier 为可选的 CrawlFrontier，记录任务 job（缺省按爬取日期命名）中每条请求的进度，
+    中断后以同一任务重新运行时只抓取未完成的请求。
+    真实抓取器返回的 HTML 由 utils.listing_parser 解析，parse_workers 为批量解析的进程数。
+    performance_log 为可选的 SupplierPerformanceLog，每次爬取后把准时交货率、退货率等快照追加到履约日志。
+    seed_file 为可选的供应商数据表（如 供应商数据.csv），其 url 列去重后作为种子列表页，与类别搜索页一起抓取。
+    """
     
-    def __init__(self):
+    def __init__(self, fetcher=None, platform_limits=None, crawl_date=None, cache=None, frontier=None, job=None,
+                 parse_workers=None, performance_log=None, seed_file=None):
+        self.crawl_date = crawl_date or date.today()
+        self.parse_workers = parse_workers
+        self.cache = cache
+        self.frontier = frontier
+        self.performance_log = performance_log
+        # 模拟详情页用到的列表页店铺年份 {(平台, 店铺ID): 年份}
+        self.listing_years = {}
+        self.seed_requests = read_seed_csv(seed_file) if seed_file else []
+        self.job = job or f"suppliers-{self.crawl_date}"
         self.platforms = {
             "1688": "https://www.1688.com",
             "阿里巴巴": "https://www.alibaba.com", 
@@ -20,6 +94,7 @@ class SupplierCrawler:
         self.real_suppliers_template = [
             {
                 "platform": "1688",
+                "store_id": "b2b-gzbyss",
                 "name": "广州市白云区时尚服饰厂",
                 "category": "女装",
                 "location": "广东广州",
@@ -35,6 +110,7 @@ class SupplierCrawler:
             },
             {
                 "platform": "阿里巴巴",
+                "store_id": "szlhyqdz",
                 "name": "深圳市龙华新区优质电子厂",
                 "category": "电子产品", 
                 "location": "广东深圳",
@@ -50,6 +126,7 @@ class SupplierCrawler:
             },
             {
                 "platform": "1688",
+                "store_id": "b2b-ywxspf",
                 "name": "义乌市小商品批发中心",
                 "category": "家居用品",
                 "location": "浙江义乌",
@@ -64,12 +141,31 @@ class SupplierCrawler:
                 "quality_level": "标准"
             }
         ]
+
+        self.fetcher = fetcher or SimulatedFetcher(self.simulated_response, latency=SIMULATED_LATENCY)
+        self.engine = AsyncCrawler(self.fetcher, platform_limits, cache=cache, cache_ttl=self.cache_ttl)
     
-    def simulate_crawl_1688(self, category, max_results=20):
-        """模拟从1688爬取供应商数据"""
-        print(f"🕷️ 正在爬取1688平台 - {category}类别供应商...")
-        time.sleep(1)  # 模拟网络延迟
-        
+    def _store_rng(self, *parts):
+        """按店铺（及日期）确定的随机数发生器：同一店铺每次爬取得到相同的基础数据"""
+        seed = int(hashlib.md5("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:12], 16)
+        return random.Random(seed)
+
+    def _daily_activity(self, store_id):
+        """模拟店铺当天是否有新成交（约一成店铺）；有成交的店铺评论数、评分和准时交货率可能变化"""
+        day_rng = self._store_rng(store_id, self.crawl_date, "activity")
+        return day_rng if day_rng.random() < 0.1 else None
+
+    def _daily_listing(self, store_id, rating, reviews, low, high):
+        """叠加当天的列表页变化：评论数增加，评分可能有 ±0.1 的波动"""
+        day_rng = self._daily_activity(store_id)
+        if day_rng is not None:
+            reviews += day_rng.randint(1, 200)
+            if day_rng.random() < 0.5:
+                rating = min(high, max(low, round(rating + day_rng.choice([-0.1, 0.1]), 1)))
+        return rating, reviews
+
+    def generate_1688_suppliers(self, category, max_results=20):
+        """生成模拟的1688供应商数据"""
         suppliers = []
         base_names = [
             "广州时尚", "深圳优质", "东莞精品", "佛山国际", "中山制造",
@@ -79,55 +175,64 @@ class SupplierCrawler:
         suffixes = ["有限公司", "制造厂", "贸易公司", "工厂", "企业", "集团"]
         
         for i in range(max_results):
-            name = f"{random.choice(base_names)}{category}{random.choice(suffixes)}"
+            store_id = f"b2b-{hashlib.md5(f'{category}|{i}'.encode('utf-8')).hexdigest()[:10]}"
+            rng = self._store_rng("1688", store_id)
+            name = f"{rng.choice(base_names)}{category}{rng.choice(suffixes)}"
+            rating, reviews = self._daily_listing(
+                store_id, round(rng.uniform(4.0, 5.0), 1), rng.randint(1000, 50000), 4.0, 5.0
+            )
             
             supplier = {
                 "platform": "1688",
+                "store_id": store_id,
                 "name": name,
                 "category": category,
-                "location": random.choice(["广东", "浙江", "江苏", "福建", "山东"]),
-                "years": random.randint(3, 20),
-                "rating": round(random.uniform(4.0, 5.0), 1),
-                "reviews": random.randint(1000, 50000),
-                "min_order": random.randint(50, 1000),
-                "capacity": random.randint(5000, 100000),
-                "delivery_time": random.randint(5, 25),
-                "certifications": random.sample(["ISO9001", "BSCI", "WRAP", "OEKO-TEX", "CE", "FCC"], 
-                                              random.randint(1, 3)),
-                "price_level": random.choice(["低价", "中价", "高价"]),
-                "quality_level": random.choice(["标准", "优质", "精品"]),
+                "location": rng.choice(["广东", "浙江", "江苏", "福建", "山东"]),
+                "years": rng.randint(3, 20),
+                "rating": rating,
+                "reviews": reviews,
+                "min_order": rng.randint(50, 1000),
+                "capacity": rng.randint(5000, 100000),
+                "delivery_time": rng.randint(5, 25),
+                "certifications": rng.sample(["ISO9001", "BSCI", "WRAP", "OEKO-TEX", "CE", "FCC"], 
+                                             rng.randint(1, 3)),
+                "price_level": rng.choice(["低价", "中价", "高价"]),
+                "quality_level": rng.choice(["标准", "优质", "精品"]),
                 "crawl_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
             suppliers.append(supplier)
         
         return suppliers
     
-    def simulate_crawl_alibaba(self, category, max_results=15):
-        """模拟从阿里巴巴爬取供应商数据"""
-        print(f"🕷️ 正在爬取阿里巴巴平台 - {category}类别供应商...")
-        time.sleep(1.5)  # 模拟网络延迟
-        
+    def generate_alibaba_suppliers(self, category, max_results=15, offset=0):
+        """生成模拟的阿里巴巴供应商数据（offset 为分页起始序号）"""
         suppliers = []
         regions = ["Guangdong", "Zhejiang", "Jiangsu", "Fujian", "Shandong"]
         
-        for i in range(max_results):
+        for i in range(offset, offset + max_results):
             name = f"{category} Manufacturer Co., Ltd"
+            store_id = hashlib.md5(f"{category}|{i}".encode("utf-8")).hexdigest()[:12]
+            rng = self._store_rng("阿里巴巴", store_id)
+            rating, reviews = self._daily_listing(
+                store_id, round(rng.uniform(4.2, 5.0), 1), rng.randint(2000, 80000), 4.2, 5.0
+            )
             
             supplier = {
                 "platform": "阿里巴巴",
+                "store_id": store_id,
                 "name": name,
                 "category": category,
-                "location": random.choice(regions),
-                "years": random.randint(5, 25),
-                "rating": round(random.uniform(4.2, 5.0), 1),
-                "reviews": random.randint(2000, 80000),
-                "min_order": random.randint(100, 2000),
-                "capacity": random.randint(10000, 200000),
-                "delivery_time": random.randint(7, 30),
-                "certifications": random.sample(["ISO9001", "BSCI", "WRAP", "CE", "FCC", "RoHS"], 
-                                              random.randint(2, 4)),
-                "price_level": random.choice(["低价", "中价", "高价"]),
-                "quality_level": random.choice(["标准", "优质", "精品"]),
+                "location": rng.choice(regions),
+                "years": rng.randint(5, 25),
+                "rating": rating,
+                "reviews": reviews,
+                "min_order": rng.randint(100, 2000),
+                "capacity": rng.randint(10000, 200000),
+                "delivery_time": rng.randint(7, 30),
+                "certifications": rng.sample(["ISO9001", "BSCI", "WRAP", "CE", "FCC", "RoHS"], 
+                                             rng.randint(2, 4)),
+                "price_level": rng.choice(["低价", "中价", "高价"]),
+                "quality_level": rng.choice(["标准", "优质", "精品"]),
                 "crawl_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "export_experience": True,
                 "trade_assurance": True
@@ -136,38 +241,213 @@ class SupplierCrawler:
         
         return suppliers
     
-    def crawl_suppliers_by_category(self, category, total_results=50):
-        """按类别爬取供应商数据"""
-        all_suppliers = []
-        
-        # 从不同平台爬取数据
-        suppliers_1688 = self.simulate_crawl_1688(category, max_results=total_results//2)
-        suppliers_alibaba = self.simulate_crawl_alibaba(category, max_results=total_results//2)
-        
-        all_suppliers.extend(suppliers_1688)
-        all_suppliers.extend(suppliers_alibaba)
-        
+    def simulated_response(self, request):
+        """模拟抓取器的返回内容：列表页返回供应商列表，详情页返回店铺信用数据"""
+        if self.is_detail_request(request):
+            return self.simulated_detail(request)
+        if request.params is None:
+            # 种子列表页：按 URL 中的页码生成该页的店铺
+            page = int(parse_qs(urlparse(request.url).query).get("page", ["1"])[0])
+            return self.generate_alibaba_suppliers(request.key, SEED_PAGE_RESULTS, (page - 1) * SEED_PAGE_RESULTS)
+        max_results = request.params["max_results"]
+        if request.platform == "1688":
+            return self.generate_1688_suppliers(request.key, max_results)
+        return self.generate_alibaba_suppliers(request.key, max_results)
+
+    def simulated_detail(self, request):
+        """模拟店铺详情页：合作年限、退货率按店铺固定，有新成交的店铺准时交货率小幅波动"""
+        store_id = request.key
+        rng = self._store_rng(request.platform, store_id, "detail")
+        on_time = round(rng.uniform(85, 99), 1)
+
+        day_rng = self._daily_activity(store_id)
+        if day_rng is not None:
+            on_time = round(min(99.9, max(80.0, on_time + day_rng.uniform(-1.5, 1.5))), 1)
+
+        years = self.listing_years.get((request.platform, store_id), 1)
+        return {
+            "cooperation_years": rng.randint(1, max(1, years)),
+            "return_rate": round(rng.uniform(0.5, 5.0), 1),
+            "on_time_rate": on_time,
+        }
+
+    def build_requests(self, categories, total_results=50):
+        """为每个类别、每个平台生成一条搜索请求"""
+        return [
+            CrawlRequest(platform, category, url, {"keywords": category, "max_results": total_results // 2})
+            for category in categories
+            for platform, url in SEARCH_URLS.items()
+        ]
+
+    def build_detail_requests(self, suppliers):
+        """为需要更新的店铺生成详情页请求（业务键为店铺ID）"""
+        self.listing_years.update({(s["platform"], s["store_id"]): s["years"] for s in suppliers})
+        return [
+            CrawlRequest(s["platform"], s["store_id"], DETAIL_URLS[s["platform"]].format(store_id=s["store_id"]))
+            for s in suppliers
+        ]
+
+    def is_detail_request(self, request):
+        """是否为店铺详情页请求"""
+        template = DETAIL_URLS.get(request.platform)
+        return template is not None and request.url == template.format(store_id=request.key)
+
+    def parse_response(self, request, payload):
+        """把列表页抓取结果转换为供应商记录列表（模拟数据直接返回，HTML 用 XPath 解析）"""
+        if isinstance(payload, list):
+            return payload
+        if isinstance(payload, (str, bytes)):
+            return parse_listing(payload, request.platform, request.key)
+        print(f"⚠️ {request.platform} - {request.key}: 暂不支持解析该返回内容")
+        return []
+
+    def parse_detail(self, request, payload):
+        """把详情页抓取结果转换为 合作年限、退货率、准时交货率 等字段"""
+        if isinstance(payload, (str, bytes)):
+            return parse_profile(payload, request.platform)
+        return payload
+
+    def parse_results(self, results, kind="listing"):
+        """批量解析一批抓取结果，失败的请求对应 None
+
+        HTML 页面一次性交给 parse_pages，页面多时在进程池中并行解析；模拟数据逐条转换。
+        """
+        parse_one = self.parse_response if kind == "listing" else self.parse_detail
+        html_rows = [i for i, result in enumerate(results)
+                     if result.error is None and isinstance(result.payload, (str, bytes))]
+        parsed = parse_pages(
+            [(kind, results[i].request.platform, results[i].payload, results[i].request.key) for i in html_rows],
+            workers=self.parse_workers
+        )
+
+        output = []
+        for result in results:
+            if result.error is not None or isinstance(result.payload, (str, bytes)):
+                output.append(None)
+            else:
+                output.append(parse_one(result.request, result.payload))
+        for i, value in zip(html_rows, parsed):
+            output[i] = value
+        return output
+
+    def cache_ttl(self, request):
+        """按页面类型返回响应缓存有效期"""
+        return CACHE_TTL["detail" if self.is_detail_request(request) else "listing"]
+
+    def fetch(self, crawl_requests):
+        """执行一批请求，按输入顺序返回 CrawlResult
+
+        配置了抓取队列时先把请求登记到当前任务：本任务中已完成的请求直接读缓存（不受有效期限制），
+        其余请求交给并发引擎，每完成一条立即记录状态，进程中断后可从断点继续。
+        """
+        if self.frontier is None:
+            return self.engine.run(crawl_requests)
+
+        self.frontier.add(self.job, crawl_requests)
+        self.frontier.reset_stale(self.job)
+        states = self.frontier.states(self.job)
+
+        results = [None] * len(crawl_requests)
+        todo = []
+        for i, request in enumerate(crawl_requests):
+            if self.cache is not None and states.get(request_fingerprint(request)) == DONE:
+                payload = self.cache.get(request, ttl=float("inf"))
+                if payload is not None:
+                    results[i] = CrawlResult(request, payload, 0, None)
+                    continue
+            todo.append(i)
+
+        pending = [crawl_requests[i] for i in todo]
+        self.frontier.mark(self.job, pending, IN_PROGRESS)
+        fetched = self.engine.run(pending, on_result=lambda result: self.frontier.record(self.job, result))
+        for i, result in zip(todo, fetched):
+            results[i] = result
+        return results
+
+    def finish_job(self):
+        """任务全部完成后从抓取队列中移除；仍有失败请求时保留，下次运行只重试这些请求"""
+        if self.frontier is None:
+            return
+        progress = self.frontier.progress(self.job)
+        if progress[DONE] and not any(n for state, n in progress.items() if state != DONE):
+            self.frontier.clear(self.job)
+
+    def listing_hash(self, supplier):
+        """列表页内容哈希"""
+        return content_hash(supplier, LISTING_FIELDS)
+
+    def detail_expired(self, key, detail_fetched):
+        """详情页是否超过该店铺的刷新周期（没有抓取记录视为过期）"""
+        if not detail_fetched:
+            return True
+        low, high = DETAIL_REFRESH_DAYS
+        period = self._store_rng(*key, "refresh").randint(low, high)
+        fetched = datetime.strptime(detail_fetched[:10], "%Y-%m-%d").date()
+        return (self.crawl_date - fetched).days >= period
+
+    def crawl(self, categories, total_results=50, known_listings=None):
+        """并发爬取多个类别在所有平台上的供应商数据
+
+        先抓列表页（类别搜索页和种子列表页），再只为新增、列表页内容有变化或详情页超过刷新周期的店铺抓详情页。
+        种子列表页的英文产品类目映射为主营产品（如 Women's T-shirt -> 女装）。
+        known_listings 为可选函数：接收 [(平台, 店铺ID)]，返回已入库店铺的 {主键: (列表页哈希, 详情页抓取时间)}
+        （见 SupplierStore.listing_states），缺省时所有店铺都抓详情页。
+        返回需要写入的完整供应商记录；未变化店铺的主键保存在 self.unchanged_keys。
+        """
+        results = self.fetch(self.build_requests(categories, total_results) + self.seed_requests)
+
+        listings = []
+        for result, parsed in zip(results, self.parse_results(results, "listing")):
+            if result.error is not None:
+                print(f"❌ {result.request.platform} - {result.request.key} 爬取失败: {result.error}")
+                continue
+            listings.extend(dict(s, category=LISTING_CATEGORIES.get(s["category"], s["category"])) for s in parsed)
+
         # 添加一些真实模板数据
         for template in self.real_suppliers_template:
-            if template["category"] == category:
-                all_suppliers.append(template.copy())
-        
+            if template["category"] in categories:
+                listings.append(template.copy())
+
+        keys = [(supplier["platform"], supplier["store_id"]) for supplier in listings]
+        known = known_listings(keys) if known_listings is not None else {}
+        self.listing_hashes = {}
+        self.unchanged_keys = []
+        to_fetch = []
+        for key, supplier in zip(keys, listings):
+            digest = self.listing_hash(supplier)
+            known_hash, detail_fetched = known.get(key, (None, None))
+            if known_hash == digest and not self.detail_expired(key, detail_fetched):
+                self.unchanged_keys.append(key)
+                continue
+            self.listing_hashes[key] = digest
+            to_fetch.append(supplier)
+
+        # 详情页：失败的店铺本次跳过，下次爬取时会重新抓取
+        all_suppliers = []
+        detail_results = self.fetch(self.build_detail_requests(to_fetch))
+        for supplier, result, detail in zip(to_fetch, detail_results, self.parse_results(detail_results, "profile")):
+            if result.error is not None:
+                print(f"❌ {supplier['platform']} - {supplier['name']} 详情页爬取失败: {result.error}")
+                continue
+            all_suppliers.append(dict(supplier, **detail))
+
         return all_suppliers
+
+    def crawl_suppliers_by_category(self, category, total_results=50):
+        """按类别爬取供应商数据（各平台并发）"""
+        return self.crawl([category], total_results)
     
-    def crawl_all_categories(self):
-        """爬取所有类别的供应商数据"""
-        categories = ["女装", "男装", "童装", "电子产品", "美妆用品", "家居用品"]
-        all_data = []
-        
+    def crawl_all_categories(self, known_listings=None):
+        """爬取所有类别的供应商数据（所有类别、平台一次并发调度）"""
         print("🚀 开始全面爬取供应商数据...")
-        
-        for category in categories:
-            print(f"\n📂 处理类别: {category}")
-            suppliers = self.crawl_suppliers_by_category(category, total_results=30)
-            all_data.extend(suppliers)
-            
-            # 模拟爬取间隔
-            time.sleep(0.5)
+
+        start = time.perf_counter()
+        all_data = self.crawl(CATEGORIES, total_results=30, known_listings=known_listings)
+
+        print(f"⏱️ 抓取详情 {len(all_data)} 家，未变化 {len(self.unchanged_keys)} 家，"
+              f"用时 {time.perf_counter() - start:.2f} 秒")
+        if self.cache is not None:
+            print(f"💾 响应缓存命中 {self.cache.stats['hits']} 次，写入 {self.cache.stats['writes']} 次")
         
         return all_data
     
@@ -179,21 +459,22 @@ class SupplierCrawler:
             processed_supplier = {
                 '店铺名称': supplier['name'],
                 '平台来源': supplier['platform'],
-                '店铺年份': f"{supplier['years']}年",
+                '店铺ID': supplier['store_id'],
+                '店铺年份': _with_unit(supplier['years'], "年"),
                 '店铺评分': supplier['rating'],
-                '店铺评论数量': f"{supplier['reviews']:,}",
+                '店铺评论数量': _with_unit(supplier['reviews'], "", ","),
                 '主营产品': supplier['category'],
-                '月产能': f"{supplier['capacity']}件",
-                '最小起订量': f"{supplier['min_order']}件",
-                '交货周期': f"{supplier['delivery_time']}天",
+                '月产能': _with_unit(supplier['capacity'], "件"),
+                '最小起订量': _with_unit(supplier['min_order'], "件"),
+                '交货周期': _with_unit(supplier['delivery_time'], "天"),
                 '所在地区': supplier['location'],
                 '认证情况': ', '.join(supplier['certifications']) if supplier['certifications'] else '无认证',
                 '价格等级': supplier['price_level'],
                 '质量等级': supplier['quality_level'],
                 '爬取时间': supplier.get('crawl_time', datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
-                '合作年限': f"{random.randint(1, supplier['years'])}年",
-                '退货率': f"{round(random.uniform(0.5, 5.0), 1)}%",
-                '准时交货率': f"{round(random.uniform(85, 99), 1)}%"
+                '合作年限': _with_unit(supplier.get('cooperation_years'), "年"),
+                '退货率': _with_unit(supplier.get('return_rate'), "%"),
+                '准时交货率': _with_unit(supplier.get('on_time_rate'), "%")
             }
             
             # 添加特殊字段（如果存在）
@@ -201,13 +482,29 @@ class SupplierCrawler:
                 processed_supplier['出口经验'] = '是' if supplier['export_experience'] else '否'
             if 'trade_assurance' in supplier:
                 processed_supplier['贸易保障'] = '是' if supplier['trade_assurance'] else '否'
+            if supplier.get('tags'):
+                processed_supplier['店铺标签'] = ';'.join(supplier['tags'])
+            if supplier.get('products'):
+                processed_supplier['提供的产品'] = supplier['products']
+            if supplier.get('response_time'):
+                processed_supplier['平均回复时间'] = supplier['response_time']
+            if supplier.get('url'):
+                processed_supplier['店铺链接'] = supplier['url']
             
             processed_data.append(processed_supplier)
         
         return pd.DataFrame(processed_data)
     
-    def update_supplier_database(self, output_file='跨境电商/data/crawled_suppliers.csv'):
-        """更新供应商数据库"""
+    def update_supplier_database(self, output_file='跨境电商/data/crawled_suppliers.csv', incremental=False,
+                                 store_path=SUPPLIER_STORE_FILE):
+        """更新供应商数据库
+
+        incremental=True 时按 平台+店铺ID 增量更新：只抓取、写入变化的店铺，
+        并在供应商存储中记录评分与准时交货率的变化历史。
+        """
+        if incremental:
+            return self.update_supplier_store(output_file, store_path)
+
         print("🔄 开始更新供应商数据库...")
         
         # 爬取最新数据
@@ -218,6 +515,8 @@ class SupplierCrawler:
         
         # 保存到文件
         df.to_csv(output_file, index=False, encoding='utf-8')
+        self.log_performance(df)
+        self.finish_job()
         
         print(f"✅ 成功爬取并保存了 {len(df)} 条供应商数据到 {output_file}")
         
@@ -230,12 +529,67 @@ class SupplierCrawler:
         
         return df
 
+    def log_performance(self, df, observed_at=None):
+        """把本次爬取的供应商快照追加到履约日志"""
+        if self.performance_log is not None and not df.empty:
+            count = self.performance_log.record_snapshots(df, observed_at)
+            print(f"📈 已记录 {count} 条供应商履约快照")
+
+    def update_supplier_store(self, output_file, store_path=SUPPLIER_STORE_FILE):
+        """增量更新供应商存储，有变化时再导出 CSV"""
+        print("🔄 开始增量更新供应商数据库...")
+
+        store = SupplierStore(store_path)
+        try:
+            suppliers_data = self.crawl_all_categories(known_listings=store.listing_states)
+            seen_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            records = self.save_to_dataframe(suppliers_data).to_dict('records') if suppliers_data else []
+            stats = store.upsert(records, self.listing_hashes, seen_at)
+            store.touch(self.unchanged_keys, seen_at)
+            stats['unchanged'] += len(self.unchanged_keys)
+
+            df = store.to_dataframe()
+            if stats['new'] or stats['changed'] or not os.path.exists(output_file):
+                df.to_csv(output_file, index=False, encoding='utf-8')
+            # 未变化的店铺也是一次观测，全部记入履约日志
+            self.log_performance(df, seen_at)
+            self.finish_job()
+        finally:
+            store.close()
+
+        print(f"✅ 新增 {stats['new']} 家，变化 {stats['changed']} 家，未变化 {stats['unchanged']} 家；"
+              f"供应商总数 {len(df)}")
+        return df
+
 def main():
-    """主函数 - 演示爬虫功能"""
-    crawler = SupplierCrawler()
+    """主函数 - 演示爬虫功能
+
+    --incremental 为增量模式；缺省启用响应缓存和可续爬的抓取队列，--no-cache 关闭二者，
+    启用缓存时先清理超过最长有效期的缓存文件。--seed 把 供应商数据.csv 的 url 列作为种子列表页加入抓取队列。
+    每次爬取的供应商快照追加到履约日志（见 utils.supplier_performance）。
+    """
+    import sys
+
+    performance_log = SupplierPerformanceLog()
+    seed_file = ALIBABA_LISTING_FILE if '--seed' in sys.argv else None
+    if '--no-cache' in sys.argv:
+        crawler = SupplierCrawler(performance_log=performance_log, seed_file=seed_file)
+    else:
+        cache = ResponseCache()
+        removed = cache.prune(max(CACHE_TTL.values()))
+        if removed:
+            print(f"🧹 已清理过期的响应缓存文件 {removed} 个")
+        crawler = SupplierCrawler(cache=cache, frontier=CrawlFrontier(), performance_log=performance_log,
+                                  seed_file=seed_file)
     
     # 更新供应商数据库
-    df = crawler.update_supplier_database()
+    try:
+        df = crawler.update_supplier_database(incremental='--incremental' in sys.argv)
+    finally:
+        if crawler.frontier is not None:
+            crawler.frontier.close()
+        performance_log.close()
     
     # 显示前几条数据
     print("\n📋 爬取数据预览:")
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""utils.async_crawler 对本地桩 HTTP 服务器的并发、限速与重试测试"""
+
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from utils.async_crawler import AsyncCrawler, CrawlRequest, HttpFetcher, TokenBucket, is_retryable
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """桩服务器路由：
+    /ok?delay=秒         延迟后返回 200
+    /status/<码>         总是返回该状态码
+    /flaky/<码>/<次数>   前若干次返回该状态码，之后返回 200
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.hits[url.path] += 1
+        parts = url.path.strip('/').split('/')
+        status = 200
+        if parts[0] == 'ok':
+            time.sleep(float(parse_qs(url.query).get('delay', ['0'])[0]))
+        elif parts[0] == 'status':
+            status = int(parts[1])
+        elif parts[0] == 'flaky' and self.server.hits[url.path] <= int(parts[2]):
+            status = int(parts[1])
+        body = f'{status} {url.path}'.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.hits = Counter()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = HttpFetcher(timeout=5)
+    yield fetcher
+    fetcher.close()
+
+
+def make_crawler(fetcher, concurrency=8, rate=100.0, burst=8):
+    limits = {'stub': {'concurrency': concurrency, 'rate': rate, 'burst': burst}}
+    return AsyncCrawler(fetcher, limits, max_retries=3, backoff=0.01, max_backoff=0.05)
+
+
+def test_requests_run_concurrently(stub_server, fetcher):
+    crawl_requests = [CrawlRequest('stub', i, f'{stub_server.base_url}/ok', {'delay': 0.3, 'i': i})
+                      for i in range(8)]
+    start = time.perf_counter()
+    results = make_crawler(fetcher).run(crawl_requests)
+    elapsed = time.perf_counter() - start
+
+    assert [result.error for result in results] == [None] * 8
+    assert [result.request.key for result in results] == list(range(8))
+    # 串行需要 2.4 秒
+    assert elapsed < 1.2
+
+
+def test_concurrency_limit(stub_server, fetcher):
+    crawl_requests = [CrawlRequest('stub', i, f'{stub_server.base_url}/ok', {'delay': 0.2, 'i': i})
+                      for i in range(4)]
+    start = time.perf_counter()
+    make_crawler(fetcher, concurrency=2).run(crawl_requests)
+    assert time.perf_counter() - start >= 0.4
+
+
+def test_token_bucket_rate(stub_server, fetcher):
+    crawl_requests = [CrawlRequest('stub', i, f'{stub_server.base_url}/ok', {'i': i}) for i in range(6)]
+    start = time.perf_counter()
+    make_crawler(fetcher, rate=10.0, burst=1).run(crawl_requests)
+    # 首个请求用掉突发额度，其余 5 个按每秒 10 个放行
+    assert time.perf_counter() - start >= 0.45
+
+
+def test_not_found_is_not_retried(stub_server, fetcher):
+    crawler = make_crawler(fetcher)
+    [result] = crawler.run([CrawlRequest('stub', 'missing', f'{stub_server.base_url}/status/404')])
+
+    assert isinstance(result.error, requests.HTTPError)
+    assert result.attempts == 1
+    assert stub_server.hits['/status/404'] == 1
+    assert crawler.stats['failed'] == 1 and crawler.stats['retries'] == 0
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_transient_errors_are_retried(stub_server, fetcher, status):
+    path = f'/flaky/{status}/2'
+    crawler = make_crawler(fetcher)
+    [result] = crawler.run([CrawlRequest('stub', 'flaky', stub_server.base_url + path)])
+
+    assert result.error is None
+    assert result.payload == f'200 {path}'
+    assert result.attempts == 3
+    assert stub_server.hits[path] == 3
+    assert crawler.stats['retries'] == 2
+
+
+def test_retries_exhausted(stub_server, fetcher):
+    [result] = make_crawler(fetcher).run([CrawlRequest('stub', 'down', f'{stub_server.base_url}/status/503')])
+
+    assert result.error.response.status_code == 503
+    assert result.attempts == 4
+    assert stub_server.hits['/status/503'] == 4
+
+
+def test_timeout_is_retried(stub_server):
+    fetcher = HttpFetcher(timeout=0.1)
+    try:
+        [result] = make_crawler(fetcher).run([CrawlRequest('stub', 'slow', f'{stub_server.base_url}/ok',
+                                                           {'delay': 0.3})])
+    finally:
+        fetcher.close()
+
+    assert isinstance(result.error, requests.Timeout)
+    assert result.attempts == 4
+    assert is_retryable(requests.ConnectionError())
+    assert not is_retryable(ValueError())
+
+
+@pytest.mark.parametrize('rate, capacity', [(0, 1), (-1.0, 1), (1.0, 0)])
+def test_token_bucket_rejects_invalid_limits(rate, capacity):
+    with pytest.raises(ValueError):
+        TokenBucket(rate, capacity)
+
+
+class BrokenCache:
+    """读不到缓存、写缓存总是失败的缓存"""
+
+    def get(self, request, ttl=None):
+        return None
+
+    def put(self, request, payload):
+        raise OSError("磁盘已满")
+
+
+def test_cache_write_error_does_not_retry(stub_server, fetcher):
+    crawler = make_crawler(fetcher)
+    crawler.cache = BrokenCache()
+    [result] = crawler.run([CrawlRequest('stub', 'ok', f'{stub_server.base_url}/ok')])
+
+    assert result.error is None
+    assert result.attempts == 1
+    assert stub_server.hits['/ok'] == 1
+    assert crawler.stats['cache_errors'] == 1
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ABC/XYZ 分类工具模块
+ABC/XYZ Classification
+
+ABC 按销售额累计占比分类（A 类贡献前 80% 的销售额，B 类其后 15%，其余为 C 类），
+XYZ 按周销量的变异系数分类（X ≤ 0.5 稳定，Y ≤ 1.0 波动，Z 不规则）。
+分类器对最近 window_weeks 周维护 SKU × 周 的销量/销售额环形数组，
+输入按日的需求立方体（utils.demand_cube.build_demand_matrix）时只累加 last_date 之后的新日期，
+分类对全部 SKU 一次向量化重算。状态连同版本、参数和已处理订单的指纹保存到磁盘（CLASSIFIER_STATE_FILE），
+页面再次加载时只聚合上次之后的新订单日期；不一致时从头重建。
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.demand_cube import build_demand_matrix, history_fingerprint
+from utils.model_state import load_state, save_state
+
+# 销售额累计占比阈值：A / B 类的上限
+ABC_THRESHOLDS = (0.8, 0.95)
+
+# 周销量变异系数阈值：X / Y 类的上限
+XYZ_THRESHOLDS = (0.5, 1.0)
+
+# 分类器状态文件
+CLASSIFIER_STATE_FILE = 'data/abc_xyz_classifier.pkl'
+
+# 周编号的起点（周一）
+_EPOCH = pd.Timestamp('1970-01-05')
+
+# 没有销量的 SKU 的首周（大于任何实际周编号）
+_NEVER = np.iinfo(np.int64).max
+
+
+def abc_xyz_classes(revenue, cv, abc_thresholds=ABC_THRESHOLDS, xyz_thresholds=XYZ_THRESHOLDS):
+    """由销售额和变异系数分类，返回 (ABC 数组, XYZ 数组, 销售额累计占比)
+
+    SKU 按销售额从高到低排序，排在它之前的累计占比低于阈值即归入该类；
+    变异系数为 NaN（没有销量）时归入 Z 类。
+    """
+    revenue = np.asarray(revenue, dtype=float)
+    cv = np.asarray(cv, dtype=float)
+    total = revenue.sum()
+
+    order = np.argsort(-revenue, kind='stable')
+    cumulative = np.empty_like(revenue)
+    cumulative[order] = np.cumsum(revenue[order]) / total if total > 0 else 1.0
+    preceding = cumulative - (revenue / total if total > 0 else 0.0)
+    abc = np.select([preceding < abc_thresholds[0], preceding < abc_thresholds[1]], ['A', 'B'], 'C')
+    abc = np.where(revenue > 0, abc, 'C')
+
+    xyz = np.select([cv <= xyz_thresholds[0], cv <= xyz_thresholds[1]], ['X', 'Y'], 'Z')
+    return abc, xyz, cumulative
+
+
+class ABCXYZClassifier:
+    """基于滚动周销量的增量 ABC/XYZ 分类器"""
+
+    # 状态格式版本（状态字段变化时递增，旧状态文件随之失效）
+    STATE_VERSION = 2
+
+    def __init__(self, window_weeks=52, abc_thresholds=ABC_THRESHOLDS, xyz_thresholds=XYZ_THRESHOLDS):
+        self.window_weeks = window_weeks
+        self.abc_thresholds = abc_thresholds
+        self.xyz_thresholds = xyz_thresholds
+
+        self.keys = []
+        self.key_index = {}
+        self.quantity = np.zeros((0, window_weeks))
+        self.revenue = np.zeros((0, window_weeks))
+        self.first_week = np.zeros(0, dtype=np.int64)
+        self.current_week = None
+        self.last_date = None
+        # 已处理订单（last_date 及之前）的指纹，见 _order_fingerprint
+        self.source = None
+
+    def params(self):
+        """构造参数"""
+        return {'window_weeks': self.window_weeks, 'abc_thresholds': tuple(self.abc_thresholds),
+                'xyz_thresholds': tuple(self.xyz_thresholds)}
+
+    def _rows(self, keys):
+        """取 SKU 所在行，新 SKU 自动追加状态"""
+        new_keys = [key for key in keys if key not in self.key_index]
+        if new_keys:
+            for key in new_keys:
+                self.key_index[key] = len(self.keys)
+                self.keys.append(key)
+            n_new = len(new_keys)
+            self.quantity = np.vstack([self.quantity, np.zeros((n_new, self.window_weeks))])
+            self.revenue = np.vstack([self.revenue, np.zeros((n_new, self.window_weeks))])
+            self.first_week = np.concatenate([self.first_week, np.full(n_new, _NEVER, dtype=np.int64)])
+        return np.array([self.key_index[key] for key in keys], dtype=int)
+
+    def _advance(self, week):
+        """推进到第 week 周，清空滚出窗口的周"""
+        if self.current_week is not None and week <= self.current_week:
+            return
+        if self.current_week is None or week - self.current_week >= self.window_weeks:
+            self.quantity[:] = 0.0
+            self.revenue[:] = 0.0
+        else:
+            slots = np.arange(self.current_week + 1, week + 1) % self.window_weeks
+            self.quantity[:, slots] = 0.0
+            self.revenue[:, slots] = 0.0
+        self.current_week = week
+
+    def process(self, quantity_matrix, revenue_matrix):
+        """输入 SKU × 日期 的销量和销售额矩阵，只累加 last_date 之后的日期"""
+        dates = pd.to_datetime(quantity_matrix.columns)
+        new = np.ones(len(dates), dtype=bool) if self.last_date is None else np.asarray(dates > self.last_date)
+        if not new.any():
+            return self
+        dates = dates[new]
+        quantity = quantity_matrix.to_numpy(dtype=float)[:, new]
+        revenue = revenue_matrix.reindex(index=quantity_matrix.index, columns=quantity_matrix.columns,
+                                         fill_value=0).to_numpy(dtype=float)[:, new]
+        rows = self._rows(list(quantity_matrix.index))
+
+        # 日期列按周汇总（日期升序，同一周相邻）
+        weeks = np.asarray((dates - _EPOCH).days // 7, dtype=np.int64)
+        starts = np.flatnonzero(np.r_[True, weeks[1:] != weeks[:-1]])
+        weeks = weeks[starts]
+        weekly_quantity = np.add.reduceat(quantity, starts, axis=1)
+        weekly_revenue = np.add.reduceat(revenue, starts, axis=1)
+
+        sold = weekly_quantity > 0
+        first = np.where(sold.any(axis=1), weeks[sold.argmax(axis=1)], _NEVER)
+        self.first_week[rows] = np.minimum(self.first_week[rows], first)
+
+        self._advance(int(weeks[-1]))
+        keep = weeks > self.current_week - self.window_weeks
+        slots = weeks[keep] % self.window_weeks
+        self.quantity[rows[:, None], slots[None, :]] += weekly_quantity[:, keep]
+        self.revenue[rows[:, None], slots[None, :]] += weekly_revenue[:, keep]
+        self.last_date = dates[-1]
+        return self
+
+    def classify(self):
+        """对全部 SKU 分类，返回以 SKU 为索引的表
+
+        列：销售额、销售额占比、累计占比、ABC、周均销量、变异系数、XYZ、分类（如 AX）。
+        周均销量和变异系数只统计窗口内、该 SKU 首次有销量之后的周。
+        """
+        if self.current_week is None:
+            return pd.DataFrame(columns=['销售额', '销售额占比', '累计占比', 'ABC', '周均销量', '变异系数', 'XYZ', '分类'])
+        slot_week = self.current_week - (self.current_week - np.arange(self.window_weeks)) % self.window_weeks
+        active = slot_week[None, :] >= self.first_week[:, None]
+        n_weeks = active.sum(axis=1)
+        quantity = np.where(active, self.quantity, 0.0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = quantity.sum(axis=1) / n_weeks
+            variance = np.maximum((quantity ** 2).sum(axis=1) / n_weeks - mean ** 2, 0.0)
+            cv = np.where(mean > 0, np.sqrt(variance) / mean, np.nan)
+        revenue = self.revenue.sum(axis=1)
+        abc, xyz, cumulative = abc_xyz_classes(revenue, cv, self.abc_thresholds, self.xyz_thresholds)
+
+        total = revenue.sum()
+        return pd.DataFrame({
+            '销售额': revenue,
+            '销售额占比': revenue / total if total > 0 else 0.0,
+            '累计占比': cumulative,
+            'ABC': abc,
+            '周均销量': np.where(n_weeks > 0, mean, 0.0),
+            '变异系数': cv,
+            'XYZ': xyz,
+            '分类': np.char.add(abc.astype(str), xyz.astype(str)),
+        }, index=pd.Index(self.keys, name='SKU'))
+
+    def save(self, path, meta=None):
+        """保存分类器状态（连同版本、构造参数和附加信息 meta）"""
+        save_state(self, path, self.params(), meta)
+
+    @classmethod
+    def load(cls, path, meta=None, **kwargs):
+        """加载与当前版本、构造参数 kwargs 和 meta 一致的分类器状态，不一致或不存在时返回 None"""
+        return load_state(cls, path, cls(**kwargs).params(), meta)
+
+
+def _order_fingerprint(orders_df, until):
+    """until（含）之前订单的指纹：销量和销售额两份 history_fingerprint"""
+    return (history_fingerprint(orders_df, until),
+            history_fingerprint(orders_df, until, value_col='total_amount'))
+
+
+def _process_orders(classifier, orders_df, key):
+    """把订单明细中 last_date 之后的日期累加到分类器（销售额取 total_amount）"""
+    if classifier.last_date is not None:
+        orders_df = orders_df[pd.to_datetime(orders_df['order_date']) > classifier.last_date]
+    if not orders_df.empty:
+        classifier.process(build_demand_matrix(orders_df, key),
+                           build_demand_matrix(orders_df, key, value_col='total_amount'))
+    return classifier
+
+
+def advance_classifier(orders_df, key='product_name', path=CLASSIFIER_STATE_FILE, **kwargs):
+    """加载已保存的分类器，只处理新日期的订单后保存，返回分类器
+
+    保存的状态与当前版本、参数和分类维度 key 不一致，或其已处理的订单（last_date 及之前）
+    与 orders_df 中的不一致（订单重新生成、补录了更早的日期）时，从头重建。
+    orders_df 应为未经筛选的全部订单。
+    """
+    meta = {'key': key}
+    classifier = ABCXYZClassifier.load(path, meta, **kwargs)
+    if classifier is None or classifier.source != _order_fingerprint(orders_df, classifier.last_date):
+        classifier = ABCXYZClassifier(**kwargs)
+
+    last_date = classifier.last_date
+    _process_orders(classifier, orders_df, key)
+    if classifier.last_date != last_date:
+        classifier.source = _order_fingerprint(orders_df, classifier.last_date)
+        classifier.save(path, meta)
+    return classifier
+
+
+def classify_orders(orders_df, key='product_name', path=None, **kwargs):
+    """对订单明细做 ABC/XYZ 分类
+
+    path 缺省时做一次完整的分类；给出时使用磁盘上的分类器状态，只处理上次之后的新日期（见 advance_classifier）。
+    """
+    if path is not None:
+        return advance_classifier(orders_df, key, path, **kwargs).classify()
+    return _process_orders(ABCXYZClassifier(**kwargs), orders_df, key).classify()
+
+
+def class_matrix(classes, value='销售额'):
+    """ABC × XYZ 交叉表：各格的 SKU 数和 value 合计"""
+    counts = pd.crosstab(classes['ABC'], classes['XYZ']).reindex(index=list('ABC'), columns=list('XYZ'), fill_value=0)
+    totals = classes.pivot_table(index='ABC', columns='XYZ', values=value, aggfunc='sum', fill_value=0)
+    return counts, totals.reindex(index=list('ABC'), columns=list('XYZ'), fill_value=0)
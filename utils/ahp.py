@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AHP 层次分析法工具模块
+Analytic Hierarchy Process Utilities
+
+由两两比较判断矩阵计算指标权重（主特征向量）和一致性比率 CR，
+支持把多位采购员的判断矩阵按几何平均批量聚合为群体决策矩阵。
+单个矩阵的计算结果按矩阵内容哈希缓存，重复评估不再计算。
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+# Saaty 1-9 标度
+SAATY_SCALE = {
+    1: '同等重要',
+    3: '稍微重要',
+    5: '明显重要',
+    7: '强烈重要',
+    9: '极端重要',
+}
+
+# Saaty 标度的取值范围（1/9 ~ 9）
+SAATY_MIN = 1 / 9
+SAATY_MAX = 9
+
+# 平均随机一致性指标 RI（按矩阵阶数 1-15）
+RANDOM_INDEX = np.array([0.0, 0.0, 0.58, 0.90, 1.12, 1.24, 1.32, 1.41, 1.45, 1.49, 1.51, 1.48, 1.56, 1.57, 1.59])
+
+# 一致性比率阈值，CR 小于该值认为判断矩阵可接受
+CR_THRESHOLD = 0.1
+
+
+def reciprocal_matrix(matrix):
+    """以上三角为准生成互反判断矩阵：a_ji = 1 / a_ij，对角线为1"""
+    a = np.asarray(matrix, dtype=float)
+    n = a.shape[-1]
+    upper = np.triu(np.ones((n, n), dtype=bool), k=1)
+
+    result = np.ones_like(a)
+    result[..., upper] = a[..., upper]
+    result[..., upper.T] = 1.0 / np.swapaxes(a, -1, -2)[..., upper.T]
+    return result
+
+
+def consistent_matrix(weights):
+    """由权重向量生成完全一致的判断矩阵 a_ij = w_i / w_j"""
+    w = np.asarray(weights, dtype=float)
+    return w[..., :, None] / w[..., None, :]
+
+
+def saaty_matrix(weights):
+    """由权重向量生成 Saaty 标度的判断矩阵：w_i / w_j 取最接近的 1-9 整数或其倒数
+
+    权重为 0 的指标无法按比值表达，按标度上限（9，极端重要）比较。
+    """
+    w = np.asarray(weights, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = w[:, None] / w[None, :]
+    ratio = np.clip(np.where(np.isnan(ratio), 1.0, ratio), SAATY_MIN, SAATY_MAX)
+    scale = np.clip(np.rint(np.maximum(ratio, 1.0 / ratio)), 1, SAATY_MAX)
+    return np.where(ratio >= 1, scale, 1.0 / scale)
+
+
+def on_saaty_scale(matrix, tolerance=0.005):
+    """判断矩阵（上三角）的元素是否都在 Saaty 标度范围内，tolerance 容许两位小数的舍入"""
+    a = np.asarray(matrix, dtype=float)
+    upper = a[..., np.triu(np.ones(a.shape[-2:], dtype=bool), k=1)]
+    return bool(np.all((upper >= SAATY_MIN - tolerance) & (upper <= SAATY_MAX + tolerance)))
+
+
+def ahp_weights(matrices):
+    """批量计算 AHP 权重和一致性
+
+    matrices 为 [..., n, n] 的判断矩阵（可一次传入多个）。
+    返回 (权重 [..., n], 最大特征值 [...], 一致性比率 CR [...])。
+    """
+    a = np.asarray(matrices, dtype=float)
+    n = a.shape[-1]
+
+    eigenvalues, eigenvectors = np.linalg.eig(a)
+    principal = np.argmax(eigenvalues.real, axis=-1)
+
+    lambda_max = np.take_along_axis(eigenvalues.real, principal[..., None], axis=-1)[..., 0]
+    vector = np.take_along_axis(eigenvectors.real, principal[..., None, None], axis=-1)[..., 0]
+    weights = np.abs(vector) / np.abs(vector).sum(axis=-1, keepdims=True)
+
+    # CI = (λmax - n) / (n - 1)，CR = CI / RI
+    if n <= 2:
+        cr = np.zeros_like(lambda_max)
+    else:
+        ci = (lambda_max - n) / (n - 1)
+        ri = RANDOM_INDEX[min(n, len(RANDOM_INDEX)) - 1]
+        cr = np.maximum(ci / ri, 0.0)
+
+    return weights, lambda_max, cr
+
+
+def aggregate_judgments(matrices, axis=-3):
+    """按几何平均聚合多位决策者的判断矩阵
+
+    matrices 为 [..., 决策者数, n, n]，可同时聚合多个决策组，
+    返回 [..., n, n] 的群体判断矩阵（几何平均保持互反性）。
+    """
+    a = np.asarray(matrices, dtype=float)
+    return np.exp(np.log(a).mean(axis=axis))
+
+
+@lru_cache(maxsize=1024)
+def _evaluate_cached(matrix_bytes, n):
+    matrix = np.frombuffer(matrix_bytes, dtype=float).reshape(n, n)
+    weights, lambda_max, cr = ahp_weights(matrix)
+    return weights, float(lambda_max), float(cr)
+
+
+def evaluate_matrix(matrix):
+    """计算单个判断矩阵的权重和一致性（按矩阵内容缓存）
+
+    返回 dict：weights、lambda_max、cr、consistent。
+    """
+    a = np.ascontiguousarray(reciprocal_matrix(matrix), dtype=float)
+    weights, lambda_max, cr = _evaluate_cached(a.tobytes(), a.shape[-1])
+    return {
+        'weights': weights.copy(),
+        'lambda_max': lambda_max,
+        'cr': cr,
+        'consistent': cr < CR_THRESHOLD,
+    }
+
+
+def group_weights(matrices):
+    """群体决策：几何平均聚合后计算权重
+
+    matrices 为 [决策者数, n, n]，返回 evaluate_matrix 的结果，
+    另附 individual_cr 为各决策者自身判断矩阵的一致性比率。
+    """
+    stack = reciprocal_matrix(matrices)
+    result = evaluate_matrix(aggregate_judgments(stack))
+    result['individual_cr'] = ahp_weights(stack)[2]
+    return result
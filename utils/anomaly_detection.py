@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式异常检测工具模块
+Streaming Anomaly Detection Utilities
+
+对 产品 × 地区 需求立方体的每条序列做增量异常检测：每条序列只维护稳健水平/偏差
+（Huber 截断的指数平滑，相当于流式的中位数/MAD）和 EWMA 均值方差，
+每来一天数据每条序列只做 O(1) 的计算，不需要回扫历史。
+日需求大多为零的 产品 × 地区 序列先换算为滚动 N 天需求再检测（从第一个完整窗口开始），
+连续多天的同一异常只报告首日。
+检测器状态和已发现的异常保存到磁盘（带版本、参数和已处理订单的指纹，不一致时重建），
+新订单到达后加载并继续更新；调用方始终传入未经筛选的全部订单，再按需筛选返回的异常。
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.demand_cube import build_demand_matrix, history_fingerprint
+from utils.model_state import load_state, save_state
+
+ANOMALY_LABELS = {
+    'spike': '激增',
+    'drop': '骤降',
+}
+
+# 平均绝对偏差换算为正态标准差的系数
+DEVIATION_SCALE = np.sqrt(np.pi / 2)
+
+# 检测器状态的保存位置
+DETECTOR_STATE_FILE = 'data/anomaly_detector.pkl'
+
+# 需求立方体的序列维度
+CUBE_KEYS = ('product_name', 'customer_region')
+
+# 产品 × 地区 序列按滚动 N 天需求检测
+ROLLING_DAYS = 28
+
+ANOMALY_COLUMNS = ['date', 'series', 'value', 'expected', 'robust_z', 'ewma_z', 'anomaly']
+
+
+class StreamingAnomalyDetector:
+    """基于稳健指数平滑（流式中位数/MAD）与 EWMA 的增量异常检测器"""
+
+    # 状态格式版本，状态属性变化时递增
+    STATE_VERSION = 2
+
+    def __init__(self, alpha=0.1, long_alpha=0.01, threshold=3.5, ewma_threshold=3.0, min_periods=14, clip=2.0):
+        self.alpha = alpha
+        self.long_alpha = long_alpha
+        self.threshold = threshold
+        self.ewma_threshold = ewma_threshold
+        self.min_periods = min_periods
+        self.clip = clip
+
+        self.keys = []
+        self.key_index = {}
+        self.level = np.zeros(0)
+        self.deviation = np.zeros(0)
+        self.count = np.zeros(0, dtype=int)
+        self.ewma_mean = np.zeros(0)
+        self.ewma_var = np.zeros(0)
+        self.long_mean = np.zeros(0)
+        self.long_var = np.zeros(0)
+        self.flagged = np.zeros(0, dtype=bool)
+        self.last_date = None
+        self.source = None
+        self.anomalies = pd.DataFrame(columns=ANOMALY_COLUMNS)
+
+    def params(self):
+        """构造参数"""
+        return {'alpha': self.alpha, 'long_alpha': self.long_alpha, 'threshold': self.threshold,
+                'ewma_threshold': self.ewma_threshold, 'min_periods': self.min_periods, 'clip': self.clip}
+
+    def _rows(self, keys):
+        """取序列所在行，新序列自动追加状态"""
+        new_keys = [key for key in keys if key not in self.key_index]
+        if new_keys:
+            for key in new_keys:
+                self.key_index[key] = len(self.keys)
+                self.keys.append(key)
+            n_new = len(new_keys)
+            self.level = np.concatenate([self.level, np.zeros(n_new)])
+            self.deviation = np.concatenate([self.deviation, np.zeros(n_new)])
+            self.count = np.concatenate([self.count, np.zeros(n_new, dtype=int)])
+            self.ewma_mean = np.concatenate([self.ewma_mean, np.zeros(n_new)])
+            self.ewma_var = np.concatenate([self.ewma_var, np.zeros(n_new)])
+            self.long_mean = np.concatenate([self.long_mean, np.zeros(n_new)])
+            self.long_var = np.concatenate([self.long_var, np.zeros(n_new)])
+            self.flagged = np.concatenate([self.flagged, np.zeros(n_new, dtype=bool)])
+        return np.array([self.key_index[key] for key in keys], dtype=int)
+
+    def update(self, keys, values):
+        """输入一天的观测值，先按旧状态打分，再更新状态
+
+        返回每条序列的 期望值、稳健Z分数、EWMA Z分数 和异常类型（spike/drop/空）；
+        前一天已报告异常的序列不重复报告。
+        """
+        rows = self._rows(list(keys))
+        x = np.asarray(values, dtype=float)
+        count = self.count[rows]
+        level = self.level[rows]
+        # 预热满 min_periods 天且出现过非零需求后才打分
+        ready = (count >= self.min_periods) & (self.long_mean[rows] > 0)
+
+        # 按更新前的状态打分；尺度不低于长期（long_alpha）标准差，
+        # 避免间歇性序列在一段零需求后把任意一笔正常需求判为激增
+        ewma_std = np.sqrt(self.ewma_var[rows])
+        scale = DEVIATION_SCALE * self.deviation[rows]
+        scale = np.where(scale > 0, scale, ewma_std)
+        scale = np.maximum(np.maximum(scale, np.sqrt(self.long_var[rows])), 1e-9)
+
+        residual = x - level
+        robust_z = residual / scale
+        ewma_z = (x - self.ewma_mean[rows]) / np.maximum(ewma_std, 1e-9)
+
+        spike = ready & (robust_z > self.threshold) & (ewma_z > self.ewma_threshold)
+        drop = ready & (robust_z < -self.threshold) & (ewma_z < -self.ewma_threshold)
+        anomaly = np.where(spike, 'spike', np.where(drop, 'drop', ''))
+        reported = np.where(self.flagged[rows], '', anomaly)
+        self.flagged[rows] = spike | drop
+
+        # 更新稳健水平和偏差：预热期内为算术平均，之后为截断残差的指数平滑
+        weight = np.where(count >= self.min_periods, self.alpha, 1.0 / (count + 1))
+        width = np.where(ready, self.clip * scale, np.inf)
+        self.level[rows] = level + weight * np.clip(residual, -width, width)
+        self.deviation[rows] += weight * (np.minimum(np.abs(residual), width) - self.deviation[rows])
+
+        # 更新 EWMA 均值和方差（首个观测直接作为初值）
+        first = count == 0
+        diff = x - self.ewma_mean[rows]
+        self.ewma_mean[rows] = np.where(first, x, self.ewma_mean[rows] + self.alpha * diff)
+        self.ewma_var[rows] = np.where(first, 0.0, (1 - self.alpha) * (self.ewma_var[rows] + self.alpha * diff ** 2))
+        long_weight = np.where(count >= self.min_periods, self.long_alpha, weight)
+        long_diff = x - self.long_mean[rows]
+        self.long_mean[rows] += long_weight * long_diff
+        self.long_var[rows] = (1 - long_weight) * (self.long_var[rows] + long_weight * long_diff ** 2)
+        self.count[rows] += 1
+
+        return pd.DataFrame({
+            'series': list(keys),
+            'value': x,
+            'expected': np.where(ready, level, np.nan),
+            'robust_z': np.where(ready, robust_z, np.nan),
+            'ewma_z': np.where(ready, ewma_z, np.nan),
+            'anomaly': reported
+        })
+
+    def process(self, matrix):
+        """按日期顺序处理 序列×日期 需求矩阵，只处理 last_date 之后的新日期
+
+        返回新检测到的异常点列表，并追加到 self.anomalies。
+        """
+        dates = pd.to_datetime(matrix.columns)
+        if self.last_date is not None:
+            matrix = matrix.loc[:, dates > self.last_date]
+            dates = pd.to_datetime(matrix.columns)
+
+        keys = list(matrix.index)
+        values = matrix.to_numpy(dtype=float)
+
+        results = []
+        for j, current_date in enumerate(dates):
+            day_result = self.update(keys, values[:, j])
+            flagged = day_result[day_result['anomaly'] != '']
+            if not flagged.empty:
+                results.append(flagged.assign(date=current_date))
+            self.last_date = current_date
+
+        if not results:
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+
+        anomalies = pd.concat(results, ignore_index=True)[ANOMALY_COLUMNS]
+        self.anomalies = anomalies if self.anomalies.empty else pd.concat([self.anomalies, anomalies],
+                                                                          ignore_index=True)
+        return anomalies
+
+    def save(self, path, meta=None):
+        """保存检测器状态（连同版本、构造参数和附加信息 meta）"""
+        save_state(self, path, self.params(), meta)
+
+    @classmethod
+    def load(cls, path, meta=None, **kwargs):
+        """加载与当前版本、构造参数 kwargs 和 meta 一致的检测器状态，不一致或不存在时返回 None"""
+        return load_state(cls, path, cls(**kwargs).params(), meta)
+
+
+def rolling_demand(matrix, days=ROLLING_DAYS):
+    """序列×日期 需求矩阵换算为滚动 days 天需求，只保留窗口完整的日期（不足 days 天时为空）"""
+    return matrix.T.rolling(days, min_periods=days).sum().T.iloc[:, days - 1:]
+
+
+def detect_anomalies(matrix, **kwargs):
+    """对需求矩阵做一次完整的异常检测"""
+    return StreamingAnomalyDetector(**kwargs).process(matrix)
+
+
+def advance_detector(orders_df, keys=CUBE_KEYS, days=ROLLING_DAYS, path=DETECTOR_STATE_FILE, **kwargs):
+    """加载已保存的检测器，只处理新日期后保存，返回检测器
+
+    保存的状态与当前版本、参数、序列维度和滚动天数不一致，或其已处理的订单（last_date 及之前）
+    与 orders_df 中的不一致（订单重新生成、补录了更早的日期）时，从头重建。
+    orders_df 应为未经筛选的全部订单：检测器跳过 last_date 之前的日期，筛选后的订单会让其他序列漏检。
+    """
+    meta = {'keys': list(keys), 'days': days}
+    detector = StreamingAnomalyDetector.load(path, meta, **kwargs)
+    if detector is None or detector.source != history_fingerprint(orders_df, detector.last_date):
+        detector = StreamingAnomalyDetector(**kwargs)
+
+    last_date = detector.last_date
+    if not orders_df.empty:
+        matrix = rolling_demand(build_demand_matrix(orders_df, list(keys)), days)
+        if not matrix.empty:
+            detector.process(matrix)
+    if detector.last_date != last_date:
+        detector.source = history_fingerprint(orders_df, detector.last_date)
+        detector.save(path, meta)
+    return detector
+
+
+def anomalies_in(anomalies, orders_df, keys=CUBE_KEYS, date_col='order_date'):
+    """只保留日期在 orders_df 的日期范围内、且序列在 orders_df 中出现过的异常"""
+    if anomalies.empty or orders_df.empty:
+        return anomalies.iloc[0:0]
+    dates = pd.to_datetime(orders_df[date_col]).dt.normalize()
+    series = set(orders_df[list(keys)].drop_duplicates().itertuples(index=False, name=None))
+    anomaly_dates = pd.to_datetime(anomalies['date'])
+    mask = (anomaly_dates >= dates.min()) & (anomaly_dates <= dates.max()) & anomalies['series'].isin(series)
+    return anomalies[mask.to_numpy()]
+
+
+def detect_cube_anomalies(orders_df, keys=CUBE_KEYS, days=ROLLING_DAYS, path=DETECTOR_STATE_FILE):
+    """产品 × 地区 需求立方体的增量异常检测，返回 orders_df 的日期范围和序列内的异常（series 为 (产品, 地区)）"""
+    if orders_df.empty:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+    return anomalies_in(advance_detector(orders_df, keys, days, path).anomalies, orders_df, keys)
+
+
+def anomaly_summary(anomalies):
+    """统计异常数量：总数、激增数、骤降数"""
+    counts = anomalies['anomaly'].value_counts() if not anomalies.empty else pd.Series(dtype=int)
+    return {
+        'total': int(len(anomalies)),
+        'spike': int(counts.get('spike', 0)),
+        'drop': int(counts.get('drop', 0)),
+    }
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步并发爬取引擎
+Asyncio Crawl Engine
+
+所有平台、所有类别的请求一次性并发调度：
+- 每个平台独立的并发上限（信号量）和令牌桶限速；
+- 超时、连接错误、429 和 5xx 响应按指数退避（带随机抖动）重试，404 等其他 4xx 直接记为失败；
+- 可插拔的抓取器：HttpFetcher 通过带连接池的 requests.Session 发请求，
+  SimulatedFetcher 用 asyncio.sleep 模拟网络延迟，也可传入任意 async 函数对接本地测试服务器。
+- 可选的响应缓存（见 utils.response_cache）：命中缓存的请求不占用平台的并发和限速额度，
+  缓存的磁盘读写放到线程中执行，不阻塞事件循环；写缓存失败只计数，不影响抓取结果。
+总耗时约等于最慢的单条请求链，而不是所有请求耗时之和。
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 一次抓取请求：平台、业务键（如类别）、URL 和附加参数
+CrawlRequest = namedtuple('CrawlRequest', ['platform', 'key', 'url', 'params'], defaults=(None, None))
+
+# 一次抓取结果：请求、返回内容、尝试次数、错误信息（成功时为 None）
+CrawlResult = namedtuple('CrawlResult', ['request', 'payload', 'attempts', 'error'])
+
+# 各平台默认的并发数、每秒请求数和突发容量
+DEFAULT_PLATFORM_LIMITS = {
+    '1688': {'concurrency': 8, 'rate': 5.0, 'burst': 8},
+    '阿里巴巴': {'concurrency': 6, 'rate': 4.0, 'burst': 6},
+}
+FALLBACK_LIMITS = {'concurrency': 2, 'rate': 2.0, 'burst': 2}
+
+# 平台限流时返回的状态码，与 5xx 一样可以重试
+RATE_LIMITED_STATUS = 429
+
+
+def request_fingerprint(request):
+    """请求指纹：平台、URL 和参数相同的请求指纹相同（与业务键无关）"""
+    payload = json.dumps([request.platform, request.url, request.params or {}],
+                         ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_retryable(exc):
+    """超时、连接错误以及 429 / 5xx 响应可以重试；404 等其他 4xx 重试也不会成功"""
+    if isinstance(exc, requests.HTTPError):
+        status = exc.response.status_code if exc.response is not None else None
+        return status is None or status == RATE_LIMITED_STATUS or status >= 500
+    return isinstance(exc, (requests.Timeout, requests.ConnectionError, asyncio.TimeoutError,
+                            TimeoutError, ConnectionError))
+
+
+class TokenBucket:
+    """异步令牌桶：平均每秒 rate 个请求，最多允许 capacity 个突发"""
+
+    def __init__(self, rate, capacity):
+        if rate <= 0:
+            raise ValueError(f"令牌桶速率必须大于0: {rate}")
+        if capacity < 1:
+            raise ValueError(f"令牌桶容量至少为1: {capacity}")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HttpFetcher:
+    """基于 requests.Session 的 HTTP 抓取器
+
+    每个平台复用一个带连接池的 Session，阻塞请求放到专用线程池中执行，不阻塞事件循环。
+    """
+
+    def __init__(self, timeout=10, pool_size=8, max_workers=16, headers=None):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.headers = headers or {'User-Agent': 'Mozilla/5.0 (supplier-crawler)'}
+        self.sessions = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='crawler')
+
+    def _session(self, platform):
+        if platform not in self.sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(self.headers)
+            self.sessions[platform] = session
+        return self.sessions[platform]
+
+    def _get(self, request):
+        response = self._session(request.platform).get(request.url, params=request.params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    async def __call__(self, request):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._get, request)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        for session in self.sessions.values():
+            session.close()
+        self.sessions.clear()
+
+
+class SimulatedFetcher:
+    """模拟抓取器：按平台等待固定延迟后调用 handler(request) 生成返回内容"""
+
+    def __init__(self, handler, latency=None, default_latency=1.0):
+        self.handler = handler
+        self.latency = latency or {}
+        self.default_latency = default_latency
+
+    async def __call__(self, request):
+        await asyncio.sleep(self.latency.get(request.platform, self.default_latency))
+        return self.handler(request)
+
+
+class AsyncCrawler:
+    """按平台限流、带重试的并发爬取引擎
+
+    fetcher 为 async 可调用对象：接收 CrawlRequest，返回内容或抛出异常。
+    retry_on 中的异常会被捕获并记为失败，其中 retryable(exc) 为真的才会退避重试。
+    cache 为可选的 ResponseCache；cache_ttl 为可选函数，按请求返回缓存有效期（秒），
+    返回 None 时使用缓存的缺省有效期。命中缓存的结果 attempts 为 0；
+    写缓存时的 OSError 不参与重试，只计入 stats['cache_errors']。
+    """
+
+    def __init__(self, fetcher, platform_limits=None, max_retries=3, backoff=0.5, max_backoff=8.0,
+                 retry_on=(requests.RequestException, asyncio.TimeoutError, ConnectionError),
+                 cache=None, cache_ttl=None, retryable=is_retryable):
+        self.fetcher = fetcher
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.platform_limits = dict(DEFAULT_PLATFORM_LIMITS, **(platform_limits or {}))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_on = retry_on
+        self.retryable = retryable
+        self.cache_errors = 0
+        self.stats = {}
+
+    def _limits(self, platform):
+        return self.platform_limits.get(platform, FALLBACK_LIMITS)
+
+    async def _cached(self, request):
+        if self.cache is None:
+            return None
+        ttl = self.cache_ttl(request) if self.cache_ttl else None
+        return await asyncio.to_thread(self.cache.get, request, ttl)
+
+    async def _store(self, request, payload):
+        if self.cache is None:
+            return
+        try:
+            await asyncio.to_thread(self.cache.put, request, payload)
+        except OSError:
+            self.cache_errors += 1
+
+    async def _fetch_one(self, request, semaphores, buckets):
+        payload = await self._cached(request)
+        if payload is not None:
+            return CrawlResult(request, payload, 0, None)
+
+        for attempt in range(1, self.max_retries + 2):
+            await buckets[request.platform].acquire()
+            async with semaphores[request.platform]:
+                try:
+                    payload = await self.fetcher(request)
+                    error = None
+                except self.retry_on as exc:
+                    error = exc
+
+            if error is None:
+                await self._store(request, payload)
+                return CrawlResult(request, payload, attempt, None)
+            if not self.retryable(error):
+                break
+            if attempt <= self.max_retries:
+                # 指数退避 + 随机抖动，避免重试请求同时打到平台
+                delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+        return CrawlResult(request, None, attempt, error)
+
+    async def crawl(self, crawl_requests, on_result=None):
+        """并发执行全部请求，按输入顺序返回 CrawlResult 列表
+
+        on_result 为可选回调，每条请求完成时立即以 CrawlResult 调用（用于持久化抓取进度）。
+        """
+        platforms = {request.platform for request in crawl_requests}
+        semaphores = {p: asyncio.Semaphore(self._limits(p)['concurrency']) for p in platforms}
+        buckets = {p: TokenBucket(self._limits(p)['rate'], self._limits(p)['burst']) for p in platforms}
+
+        async def fetch(request):
+            result = await self._fetch_one(request, semaphores, buckets)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        start = time.perf_counter()
+        self.cache_errors = 0
+        results = await asyncio.gather(*(fetch(r) for r in crawl_requests))
+
+        self.stats = {
+            'requests': len(results),
+            'cached': sum(result.attempts == 0 for result in results),
+            'failed': sum(result.error is not None for result in results),
+            'retries': sum(max(result.attempts - 1, 0) for result in results),
+            'cache_errors': self.cache_errors,
+            'elapsed': time.perf_counter() - start,
+        }
+        return results
+
+    def run(self, crawl_requests, on_result=None):
+        """同步入口：在新的事件循环中执行 crawl"""
+        return asyncio.run(self.crawl(list(crawl_requests), on_result))
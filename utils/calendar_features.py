@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日历与节假日特征库
+Calendar & Holiday Feature Store
+
+按 国家 × 日期 预先计算日历特征和购物节/节假日标记，缓存为一张整型数组表。
+各模型通过整数日索引（相对 CALENDAR_EPOCH 的天数）直接取行，无需重复解析日期；
+查询日期超出表的范围时按整年自动扩展。
+"""
+
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# 整数日索引的起点
+CALENDAR_EPOCH = np.datetime64('2000-01-01', 'D')
+
+# 未指定国家时使用的全球市场行
+GLOBAL_MARKET = '全球'
+
+# 节日/购物节代码及中文名称
+EVENT_NAMES = {
+    'new_year': '元旦',
+    'spring_festival': '春节',
+    'valentines_day': '情人节',
+    'ramadan': '斋月',
+    'eid_al_fitr': '开斋节',
+    'mid_year_sale': '618年中大促',
+    'thanksgiving': '感恩节',
+    'black_friday': '黑色星期五',
+    'cyber_monday': '网络星期一',
+    'singles_day': '双11',
+    'double_twelve': '双12',
+    'christmas': '圣诞节',
+    'boxing_day': '节礼日',
+}
+
+# 促销型购物节：节前一周通常开始备货和预热
+SHOPPING_EVENTS = ['mid_year_sale', 'black_friday', 'cyber_monday', 'singles_day', 'double_twelve', 'christmas']
+
+# 农历/伊斯兰历节日的公历日期（近似值），表外年份不标记这两类节日
+SPRING_FESTIVAL_DATES = {
+    2020: '2020-01-25', 2021: '2021-02-12', 2022: '2022-02-01', 2023: '2023-01-22', 2024: '2024-02-10',
+    2025: '2025-01-29', 2026: '2026-02-17', 2027: '2027-02-06', 2028: '2028-01-26', 2029: '2029-02-13',
+    2030: '2030-02-03',
+}
+RAMADAN_PERIODS = {
+    2020: ('2020-04-24', '2020-05-23'), 2021: ('2021-04-13', '2021-05-12'), 2022: ('2022-04-02', '2022-05-01'),
+    2023: ('2023-03-23', '2023-04-20'), 2024: ('2024-03-11', '2024-04-09'), 2025: ('2025-03-01', '2025-03-29'),
+    2026: ('2026-02-18', '2026-03-19'), 2027: ('2027-02-08', '2027-03-08'), 2028: ('2028-01-28', '2028-02-25'),
+    2029: ('2029-01-16', '2029-02-13'), 2030: ('2030-01-06', '2030-02-03'),
+}
+
+_GLOBAL_EVENTS = ['new_year', 'black_friday', 'cyber_monday', 'singles_day', 'christmas']
+_WESTERN_EVENTS = _GLOBAL_EVENTS + ['valentines_day']
+_COMMONWEALTH_EVENTS = _WESTERN_EVENTS + ['boxing_day']
+_CHINESE_EVENTS = ['new_year', 'spring_festival', 'valentines_day', 'mid_year_sale', 'singles_day', 'double_twelve']
+_MUSLIM_EVENTS = ['new_year', 'ramadan', 'eid_al_fitr', 'black_friday', 'singles_day']
+
+# 各销售国家适用的节日
+COUNTRY_EVENTS = {
+    GLOBAL_MARKET: _GLOBAL_EVENTS,
+    # 东亚
+    '中国': _CHINESE_EVENTS,
+    '台湾': _CHINESE_EVENTS,
+    '日本': _WESTERN_EVENTS,
+    '韩国': _WESTERN_EVENTS + ['spring_festival'],
+    # 北美
+    '美国': _WESTERN_EVENTS + ['thanksgiving'],
+    '加拿大': _COMMONWEALTH_EVENTS + ['thanksgiving'],
+    '墨西哥': _WESTERN_EVENTS,
+    # 欧洲
+    '德国': _COMMONWEALTH_EVENTS,
+    '英国': _COMMONWEALTH_EVENTS,
+    '法国': _WESTERN_EVENTS,
+    '意大利': _WESTERN_EVENTS,
+    '西班牙': _WESTERN_EVENTS,
+    # 东南亚
+    '新加坡': _GLOBAL_EVENTS + ['spring_festival', 'double_twelve', 'eid_al_fitr'],
+    '马来西亚': _MUSLIM_EVENTS + ['spring_festival', 'double_twelve', 'christmas'],
+    '印度尼西亚': _MUSLIM_EVENTS + ['double_twelve', 'christmas'],
+    '泰国': _GLOBAL_EVENTS + ['double_twelve'],
+    '菲律宾': _WESTERN_EVENTS + ['double_twelve'],
+    '越南': _GLOBAL_EVENTS + ['spring_festival', 'double_twelve'],
+    # 澳洲
+    '澳大利亚': _COMMONWEALTH_EVENTS,
+    '新西兰': _COMMONWEALTH_EVENTS,
+    # 南美
+    '巴西': _WESTERN_EVENTS,
+    '阿根廷': _WESTERN_EVENTS,
+    '智利': _WESTERN_EVENTS,
+    '哥伦比亚': _WESTERN_EVENTS,
+    '秘鲁': _WESTERN_EVENTS,
+    # 中东
+    '阿联酋': _MUSLIM_EVENTS,
+    '沙特阿拉伯': _MUSLIM_EVENTS,
+    '卡塔尔': _MUSLIM_EVENTS,
+    '科威特': _MUSLIM_EVENTS,
+    '土耳其': _MUSLIM_EVENTS + ['christmas'],
+    '以色列': ['new_year', 'black_friday', 'cyber_monday', 'singles_day'],
+}
+
+BASE_FEATURES = ['day_of_week', 'month', 'day_of_year', 'is_weekend']
+EVENT_FEATURES = list(EVENT_NAMES)
+DERIVED_FEATURES = ['is_holiday', 'pre_shopping_event']
+FEATURE_COLUMNS = BASE_FEATURES + EVENT_FEATURES + DERIVED_FEATURES
+
+
+def day_index(dates):
+    """将日期转换为相对 CALENDAR_EPOCH 的整数日索引"""
+    values = np.asarray(pd.to_datetime(dates), dtype='datetime64[D]')
+    return (values - CALENDAR_EPOCH).astype(np.int64)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """某月第 n 个星期几（weekday: 周一为0）"""
+    first = date(year, month, 1)
+    offset = (weekday - first.weekday()) % 7
+    return first + timedelta(days=offset + 7 * (n - 1))
+
+
+def event_dates(event, year):
+    """返回某节日在指定年份的所有公历日期"""
+    if event == 'new_year':
+        return [date(year, 1, 1)]
+    if event == 'valentines_day':
+        return [date(year, 2, 14)]
+    if event == 'mid_year_sale':
+        return [date(year, 6, 18)]
+    if event == 'singles_day':
+        return [date(year, 11, 11)]
+    if event == 'double_twelve':
+        return [date(year, 12, 12)]
+    if event == 'christmas':
+        return [date(year, 12, 25)]
+    if event == 'boxing_day':
+        return [date(year, 12, 26)]
+    if event == 'thanksgiving':
+        return [_nth_weekday(year, 11, 3, 4)]
+    if event == 'black_friday':
+        return [_nth_weekday(year, 11, 3, 4) + timedelta(days=1)]
+    if event == 'cyber_monday':
+        return [_nth_weekday(year, 11, 3, 4) + timedelta(days=4)]
+    if event == 'spring_festival':
+        if year not in SPRING_FESTIVAL_DATES:
+            return []
+        return [pd.Timestamp(SPRING_FESTIVAL_DATES[year]).date()]
+    if event in ('ramadan', 'eid_al_fitr'):
+        if year not in RAMADAN_PERIODS:
+            return []
+        start, end = (pd.Timestamp(d) for d in RAMADAN_PERIODS[year])
+        if event == 'eid_al_fitr':
+            return [(end + pd.Timedelta(days=1)).date()]
+        return list(pd.date_range(start, end, freq='D').date)
+    raise ValueError(f"未知节日代码: {event}")
+
+
+class CalendarFeatureStore:
+    """按 国家 × 日期 预计算的日历特征表"""
+
+    def __init__(self, start='2020-01-01', end='2030-12-31', pre_event_days=7):
+        self.pre_event_days = pre_event_days
+        self.countries = list(COUNTRY_EVENTS)
+        self.country_codes = {country: i for i, country in enumerate(self.countries)}
+        self.feature_columns = list(FEATURE_COLUMNS)
+        self._build(start, end)
+
+    def _build(self, start, end):
+        """计算 [start, end] 范围的特征表"""
+        pre_event_days = self.pre_event_days
+        self.start_index = int(day_index([start])[0])
+        dates = pd.date_range(start, end, freq='D')
+        n_days = len(dates)
+
+        table = np.zeros((len(self.countries), n_days, len(FEATURE_COLUMNS)), dtype=np.int16)
+
+        # 基础日历特征对所有国家相同
+        table[:, :, 0] = dates.dayofweek
+        table[:, :, 1] = dates.month
+        table[:, :, 2] = dates.dayofyear
+        table[:, :, 3] = dates.dayofweek >= 5
+
+        # 每个节日只计算一次日期，再按国家写入
+        years = range(dates.year.min(), dates.year.max() + 1)
+        event_offsets = {}
+        for event in EVENT_FEATURES:
+            days = [d for year in years for d in event_dates(event, year)]
+            offsets = day_index(days) - self.start_index if days else np.array([], dtype=np.int64)
+            event_offsets[event] = offsets[(offsets >= 0) & (offsets < n_days)]
+
+        shopping = np.array([e in SHOPPING_EVENTS for e in EVENT_FEATURES])
+        for country, events in COUNTRY_EVENTS.items():
+            c = self.country_codes[country]
+            for event in events:
+                table[c, event_offsets[event], len(BASE_FEATURES) + EVENT_FEATURES.index(event)] = 1
+
+            event_block = table[c, :, len(BASE_FEATURES):len(BASE_FEATURES) + len(EVENT_FEATURES)]
+            table[c, :, -2] = event_block.any(axis=1)
+
+            # 购物节前 pre_event_days 天的预热期（不含节日当天）
+            shopping_days = event_block[:, shopping].any(axis=1).astype(np.int32)
+            window = np.convolve(shopping_days[::-1], np.ones(pre_event_days + 1, dtype=np.int32))[:n_days][::-1]
+            table[c, :, -1] = (window > 0) & (shopping_days == 0)
+
+        self.table = table
+        self.n_days = n_days
+
+    def country_code(self, country=None):
+        """国家名称转行号，未知国家回退到全球市场"""
+        return self.country_codes.get(country, self.country_codes[GLOBAL_MARKET])
+
+    def extend(self, day_indices):
+        """日期超出特征表范围时按整年扩展并重建特征表"""
+        day_indices = np.asarray(day_indices, dtype=np.int64)
+        if not day_indices.size:
+            return
+        low = min(int(day_indices.min()), self.start_index)
+        high = max(int(day_indices.max()), self.start_index + self.n_days - 1)
+        if low == self.start_index and high == self.start_index + self.n_days - 1:
+            return
+        start = pd.Timestamp(CALENDAR_EPOCH + low)
+        end = pd.Timestamp(CALENDAR_EPOCH + high)
+        self._build(f'{start.year}-01-01', f'{end.year}-12-31')
+
+    def lookup(self, day_indices, country=None):
+        """按整数日索引取特征，返回 [日期数, 特征数] 的数组（超出范围时先扩展特征表）"""
+        day_indices = np.asarray(day_indices, dtype=np.int64)
+        self.extend(day_indices)
+        offsets = day_indices - self.start_index
+        return self.table[self.country_code(country), offsets]
+
+    def features(self, dates, country=None, origin=None):
+        """返回日期对应的特征 DataFrame，并附加相对 origin 的 days_since_start"""
+        indices = day_index(dates)
+        frame = pd.DataFrame(self.lookup(indices, country), columns=self.feature_columns)
+
+        origin_index = indices.min() if origin is None else int(day_index([origin])[0])
+        frame['days_since_start'] = indices - origin_index
+        return frame
+
+    def event_calendar(self, country=None):
+        """列出某国所有节日日期，便于页面展示"""
+        c = self.country_code(country)
+        rows = []
+        for event in COUNTRY_EVENTS[self.countries[c]]:
+            offsets = np.flatnonzero(self.table[c, :, len(BASE_FEATURES) + EVENT_FEATURES.index(event)])
+            dates = CALENDAR_EPOCH + (offsets + self.start_index)
+            rows.extend({'日期': pd.Timestamp(d), '节日': EVENT_NAMES[event]} for d in dates)
+        return pd.DataFrame(rows, columns=['日期', '节日']).sort_values('日期').reset_index(drop=True)
+
+
+@lru_cache(maxsize=None)
+def get_calendar_store(start='2020-01-01', end='2030-12-31'):
+    """进程内共享的日历特征表（只构建一次）"""
+    return CalendarFeatureStore(start, end)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可续爬的抓取队列
+Resumable Crawl Frontier
+
+把每次爬取任务要抓的类别页、分页 URL 和详情页持久化到 SQLite，并记录每条请求的状态：
+pending（待抓）、in_progress（抓取中）、done（完成）、failed（失败）。
+进程中断后以同一任务名重新运行，只会抓取尚未完成的请求；
+已完成请求的返回内容从响应缓存读取（见 utils.response_cache）。
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from utils.async_crawler import CrawlRequest, request_fingerprint
+
+CRAWL_FRONTIER_FILE = 'data/crawl_frontier.db'
+
+PENDING, IN_PROGRESS, DONE, FAILED = 'pending', 'in_progress', 'done', 'failed'
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def read_seed_csv(path, url_column='url', key_column='产品类目', platform='阿里巴巴'):
+    """从供应商数据表的 url 列生成去重后的列表页请求（兼容 UTF-8 与 GBK 编码）"""
+    for encoding in ('utf-8', 'gbk', 'gb18030'):
+        try:
+            df = pd.read_csv(path, encoding=encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError(f"无法识别文件编码: {path}")
+
+    seeds = df[[key_column, url_column]].dropna().drop_duplicates(subset=url_column)
+    return [CrawlRequest(platform, key, url, None) for key, url in seeds.itertuples(index=False)]
+
+
+class CrawlFrontier:
+    """基于 SQLite 的抓取队列，按 任务名 + 请求指纹 去重"""
+
+    def __init__(self, path=CRAWL_FRONTIER_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS frontier (
+                job TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                platform TEXT NOT NULL,
+                key TEXT,
+                url TEXT NOT NULL,
+                params TEXT,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (job, fingerprint)
+            );
+            CREATE INDEX IF NOT EXISTS idx_frontier_state ON frontier (job, state);
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def add(self, job, crawl_requests):
+        """加入请求（已存在的请求保持原状态），返回新加入的数量"""
+        seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM frontier WHERE job = ?", (job,)).fetchone()[0]
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO frontier VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, NULL, ?)",
+            [(job, request_fingerprint(r), seq + i + 1, r.platform, r.key, r.url,
+              json.dumps(r.params, ensure_ascii=False, default=str), PENDING, _now())
+             for i, r in enumerate(crawl_requests)]
+        )
+        self.conn.commit()
+        return self.conn.total_changes - before
+
+    def states(self, job):
+        """{请求指纹: 状态}"""
+        rows = self.conn.execute("SELECT fingerprint, state FROM frontier WHERE job = ?", (job,))
+        return dict(rows.fetchall())
+
+    def mark(self, job, crawl_requests, state, error=None):
+        """批量设置请求状态；开始抓取（in_progress）时累加尝试次数"""
+        attempts = 1 if state == IN_PROGRESS else 0
+        self.conn.executemany(
+            "UPDATE frontier SET state = ?, attempts = attempts + ?, error = ?, updated_at = ? "
+            "WHERE job = ? AND fingerprint = ?",
+            [(state, attempts, error, _now(), job, request_fingerprint(r)) for r in crawl_requests]
+        )
+        self.conn.commit()
+
+    def record(self, job, result):
+        """记录一条抓取结果（供 AsyncCrawler 的 on_result 回调使用）"""
+        if result.error is None:
+            self.mark(job, [result.request], DONE)
+        else:
+            self.mark(job, [result.request], FAILED, str(result.error))
+
+    def reset_stale(self, job):
+        """把上次中断时仍处于抓取中的请求放回待抓，返回数量"""
+        cursor = self.conn.execute(
+            "UPDATE frontier SET state = ?, updated_at = ? WHERE job = ? AND state = ?",
+            (PENDING, _now(), job, IN_PROGRESS)
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def progress(self, job):
+        """各状态的请求数量"""
+        rows = self.conn.execute("SELECT state, COUNT(*) FROM frontier WHERE job = ? GROUP BY state", (job,))
+        counts = {PENDING: 0, IN_PROGRESS: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows.fetchall()))
+        return counts
+
+    def clear(self, job):
+        """删除一个任务的全部请求"""
+        self.conn.execute("DELETE FROM frontier WHERE job = ?", (job,))
+        self.conn.commit()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+需求数据立方体工具模块
+Demand Cube Utilities
+"""
+
+import pandas as pd
+
+
+def build_demand_matrix(df, keys, date_col='order_date', value_col='quantity', freq='D'):
+    """将订单明细聚合为 序列×日期 的需求矩阵
+
+    缺少订单的日期补零，返回的 DataFrame 以 keys 为行索引、连续日期为列。
+    """
+    if isinstance(keys, str):
+        keys = [keys]
+
+    if df.empty:
+        return pd.DataFrame()
+
+    dates = pd.to_datetime(df[date_col]).dt.normalize()
+    grouped = df.assign(**{date_col: dates}).groupby(keys + [date_col])[value_col].sum()
+
+    matrix = grouped.unstack(date_col, fill_value=0)
+    full_range = pd.date_range(dates.min(), dates.max(), freq=freq)
+    matrix = matrix.reindex(columns=full_range, fill_value=0)
+
+    return matrix.astype(float)
+
+
+
+def history_fingerprint(df, until, date_col='order_date', value_col='quantity'):
+    """until（含）之前订单的指纹：(最早日期, 行数, value_col 合计)，until 为 None 时返回 None
+
+    增量模型据此判断已处理的历史是否仍然一致（订单数据重新生成或补录了更早的日期时会变化）。
+    """
+    if until is None:
+        return None
+    dates = pd.to_datetime(df[date_col]).dt.normalize()
+    history = dates <= pd.Timestamp(until)
+    if not history.any():
+        return (None, 0, 0.0)
+    return (str(dates[history].min().date()), int(history.sum()), round(float(df.loc[history, value_col].sum()), 6))
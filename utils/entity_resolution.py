@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+供应商实体识别工具模块
+Supplier Entity Resolution
+
+同一家工厂会以略有不同的名称出现在本地供应商表、爬取数据、亚马逊供应商表和阿里巴巴列表页中。
+本模块对中英文公司名称做规范化后取字符 n-gram，计算 MinHash 签名并按 LSH 分桶，
+只比较落入同一桶的候选对（近似线性扩展），再结合地区、主营产品校验和并查集合并为规范供应商ID。
+同一平台上店铺ID相同的记录（如同一店铺出现在多个类目、多个分页）直接合并；
+店铺ID不同的记录视为不同供应商，不会被合并；没有店铺ID的记录只按名称和地区合并。
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# 规范化时去掉的公司后缀（中英文）
+_LEGAL_SUFFIXES = re.compile(
+    r'股份有限公司|有限责任公司|有限公司|公司|'
+    r'\bco\b\.?,?\s*\bltd\b\.?|\bcompany\b|\blimited\b|\bltd\b\.?|\binc\b\.?|\bcorp\b\.?|\bco\b\.?',
+    re.IGNORECASE
+)
+_ADMIN_UNITS = re.compile(r'[省市]')
+_NON_WORD = re.compile(r'[\W_]+')
+_CJK = re.compile(r'[一-鿿]')
+
+# MinHash 使用的梅森素数（shingle 编号和系数都小于它，乘积不会溢出 int64）
+_PRIME = (1 << 31) - 1
+
+# 缺省参数：64 个哈希分 16 段，每段 4 行，相似度约 0.5 以上的名称大概率成为候选对
+NUM_PERM = 64
+BANDS = 16
+SIMILARITY_THRESHOLD = 0.7
+
+# 单个 LSH 桶内最多比较的记录数（防止“服饰有限公司”这类通用名称产生平方级候选对）
+MAX_BUCKET = 50
+
+
+def normalize_name(name):
+    """公司名称规范化：小写，去掉公司后缀、省/市字样、空格和标点"""
+    if pd.isna(name):
+        return ''
+    text = _LEGAL_SUFFIXES.sub(' ', str(name).lower())
+    text = _ADMIN_UNITS.sub('', text)
+    return _NON_WORD.sub('', text)
+
+
+def shingles(text):
+    """字符 n-gram：含中文时取 2-gram，纯英文取 3-gram，过短的名称整体作为一个 shingle"""
+    n = 2 if _CJK.search(text) else 3
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def minhash_signatures(shingle_sets, num_perm=NUM_PERM, seed=42, chunk=16):
+    """计算 MinHash 签名矩阵 [记录数, num_perm]
+
+    所有 shingle 统一编码为整数后展平，按记录用 np.minimum.reduceat 求每个哈希函数的最小值。
+    空集合的签名全部为 _PRIME（不会与任何记录相同）。
+    """
+    n = len(shingle_sets)
+    lengths = np.fromiter((len(s) for s in shingle_sets), dtype=np.int64, count=n)
+    flat = [value for s in shingle_sets for value in s]
+    codes = pd.factorize(pd.Series(flat, dtype=object))[0].astype(np.int64) if flat else np.zeros(0, np.int64)
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, num_perm, dtype=np.int64)
+    b = rng.integers(0, _PRIME, num_perm, dtype=np.int64)
+
+    signatures = np.full((n, num_perm), _PRIME, dtype=np.int64)
+    nonempty = lengths > 0
+    if not nonempty.any():
+        return signatures
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])[nonempty]
+
+    # 分块计算，控制 [shingle 数, chunk] 中间矩阵的内存
+    for begin in range(0, num_perm, chunk):
+        end = min(begin + chunk, num_perm)
+        hashed = (codes[:, None] * a[None, begin:end] + b[None, begin:end]) % _PRIME
+        signatures[nonempty, begin:end] = np.minimum.reduceat(hashed, starts, axis=0)
+    return signatures
+
+
+def lsh_candidate_pairs(signatures, bands=BANDS, max_bucket=MAX_BUCKET):
+    """LSH 分桶，返回去重后的候选对 [对数, 2]（i < j）
+
+    每段签名合成一个 64 位桶键，排序后同一桶内的记录两两组成候选对；
+    超过 max_bucket 条记录的桶（通用名称）在该段跳过，由其他段的分桶决定是否成为候选。
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    multipliers = np.random.default_rng(0).integers(1, 1 << 62, rows, dtype=np.int64).astype(np.uint64)
+    valid = np.flatnonzero(signatures[:, 0] != _PRIME)
+
+    pairs = []
+    for band in range(bands):
+        block = signatures[valid, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = (block * multipliers).sum(axis=1)  # uint64 溢出回绕，相当于取模哈希
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        # 各桶的起止位置与大小，只保留 2 ~ max_bucket 条记录的桶
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, len(sorted_keys)])
+        bucket_size = np.repeat(sizes, sizes)
+        members = valid[order[(bucket_size >= 2) & (bucket_size <= max_bucket)]]
+        member_keys = sorted_keys[(bucket_size >= 2) & (bucket_size <= max_bucket)]
+
+        # 同一桶内相距 d 的记录组成候选对
+        for d in range(1, min(max_bucket, len(members))):
+            same = member_keys[d:] == member_keys[:-d]
+            if not same.any():
+                break
+            pairs.append(np.stack([members[:-d][same], members[d:][same]], axis=1))
+
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster_pairs(n, pairs, scores, store_keys=None):
+    """并查集合并候选对，返回每条记录的簇根
+
+    store_keys 为每条记录的 (平台, 店铺ID) 或 None：主键相同的记录先直接合并；
+    之后候选对按相似度从高到低合并，两个簇在同一平台上存在不同店铺ID时不合并。
+    """
+    parent = list(range(n))
+    size = [1] * n
+    stores = [{} if store_keys is None or store_keys[i] is None else {store_keys[i][0]: store_keys[i][1]}
+              for i in range(n)]
+
+    def union(ra, rb):
+        if size[ra] < size[rb]:
+            ra, rb = rb, ra
+        parent[rb] = ra
+        size[ra] += size[rb]
+        stores[ra].update(stores[rb])
+
+    first = {}
+    for i, key in enumerate(store_keys if store_keys is not None else []):
+        if key is None:
+            continue
+        if key in first:
+            union(_find(parent, first[key]), _find(parent, i))
+        else:
+            first[key] = i
+
+    for k in np.argsort(-scores, kind='stable'):
+        ra, rb = _find(parent, int(pairs[k, 0])), _find(parent, int(pairs[k, 1]))
+        if ra == rb:
+            continue
+        if any(stores[rb].get(platform, store) != store for platform, store in stores[ra].items()):
+            continue
+        union(ra, rb)
+
+    return np.array([_find(parent, i) for i in range(n)], dtype=np.int64)
+
+
+def _compatible(values, pairs):
+    """候选对两端的属性是否相容：任一方缺失或双方相同"""
+    values = pd.Series(values).astype(object).where(pd.notna(values), None).to_numpy()
+    left, right = values[pairs[:, 0]], values[pairs[:, 1]]
+    return np.array([l is None or r is None or l == r for l, r in zip(left, right)], dtype=bool)
+
+
+def resolve_entities(names, regions=None, store_keys=None, categories=None, threshold=SIMILARITY_THRESHOLD,
+                     num_perm=NUM_PERM, bands=BANDS, max_bucket=MAX_BUCKET):
+    """供应商实体识别，返回每条记录的簇编号（按首次出现的顺序从 0 编号）
+
+    names:      公司名称（中英文均可）
+    regions:    可选的地区（如统一后的省份），双方都有且不同时不合并
+    store_keys: 可选的 (平台, 店铺ID) 列表（没有店铺ID的记录为 None），
+                主键相同的记录直接合并，同一平台不同店铺ID的记录不合并
+    categories: 可选的主营产品，双方都有且不同时不合并
+    threshold:  MinHash 估计的 Jaccard 相似度阈值
+    """
+    normalized = [normalize_name(name) for name in names]
+    n = len(normalized)
+    signatures = minhash_signatures([shingles(text) for text in normalized], num_perm)
+    pairs = lsh_candidate_pairs(signatures, bands, max_bucket)
+
+    # 候选对校验：签名相同位置的比例即 Jaccard 相似度的估计
+    scores = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    keep = scores >= threshold
+    if regions is not None:
+        keep &= _compatible(regions, pairs)
+    if categories is not None:
+        keep &= _compatible(categories, pairs)
+
+    roots = cluster_pairs(n, pairs[keep], scores[keep], store_keys)
+    return pd.factorize(roots)[0]
+
+
+def assign_supplier_ids(df, name_col='店铺名称', region_col='所在省份', platform_col='平台来源',
+                        store_col='店铺ID', category_col='主营产品', prefix='SUP', **kwargs):
+    """为供应商表每行分配规范供应商ID（如 SUP000001）
+
+    同一平台内以平台自身的店铺ID为准：店铺ID相同的记录合并，店铺ID不同的记录不会合并；
+    没有店铺ID的记录（如亚马逊供应商表、旧的爬取数据）按名称相似度、地区和主营产品合并。
+    """
+    regions = df[region_col].to_numpy() if region_col in df.columns else None
+    categories = df[category_col].to_numpy() if category_col in df.columns else None
+    store_keys = None
+    if platform_col in df.columns and store_col in df.columns:
+        store_keys = [None if pd.isna(platform) or pd.isna(store) or str(store) in ('', 'nan')
+                      else (platform, str(store))
+                      for platform, store in zip(df[platform_col], df[store_col])]
+
+    clusters = resolve_entities(df[name_col].to_numpy(), regions, store_keys, categories, **kwargs)
+    return pd.Series([f"{prefix}{c + 1:06d}" for c in clusters], index=df.index, name='供应商ID')
+
+
+def merge_duplicates(df, ids, source_col='平台来源'):
+    """按规范供应商ID合并重复记录
+
+    每列取该供应商第一条非空的值（表中靠前的数据源优先），
+    并增加 重复记录数 与 数据来源（所有来源平台）两列。
+    """
+    grouped = df.groupby(ids.to_numpy(), sort=False)
+    merged = grouped.first()
+    merged['重复记录数'] = grouped.size()
+    if source_col in df.columns:
+        merged['数据来源'] = grouped[source_col].agg(lambda values: '、'.join(pd.unique(values.dropna().astype(str))))
+    merged.index.name = '供应商ID'
+    return merged.reset_index()
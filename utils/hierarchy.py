@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+层级预测协调工具模块
+Hierarchical Forecast Reconciliation Utilities
+
+在 大洲 / 国家 / 省份 地区树上做层级预测：所有底层序列一次性预测，
+通过稀疏汇总矩阵 S 做自下而上（Bottom-up）或 MinT(WLS) 协调，
+任意大洲、国家的预测都是对缓存叶子预测的廉价汇总。
+"""
+
+import numpy as np
+from scipy import sparse
+
+from utils.probabilistic_forecast import seasonal_trend_fit
+from utils.seasonality import seasonality_profiles
+
+RECONCILE_METHODS = {
+    'bottom_up': '自下而上 (Bottom-up)',
+    'mint_wls': 'MinT (WLS)',
+}
+
+
+class RegionHierarchy:
+    """大洲 → 国家 → 省份/州 的地区层级及其汇总矩阵"""
+
+    def __init__(self, tree):
+        self.leaves = [
+            (continent, country, province)
+            for continent, countries in tree.items()
+            for country, provinces in countries.items()
+            for province in provinces
+        ]
+
+        # 节点按层级自上而下排列：全部 → 大洲 → 国家 → 省份/州
+        self.nodes = [()]
+        self.nodes += [(continent,) for continent in tree]
+        self.nodes += [(continent, country) for continent, countries in tree.items() for country in countries]
+        self.nodes += self.leaves
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.leaf_rows = np.arange(len(self.nodes) - len(self.leaves), len(self.nodes))
+
+        # 每个叶子对自身及所有祖先节点记 1
+        rows, cols = [], []
+        for j, leaf in enumerate(self.leaves):
+            for depth in range(len(leaf) + 1):
+                rows.append(self.node_index[leaf[:depth]])
+                cols.append(j)
+        self.S = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(self.nodes), len(self.leaves))
+        )
+
+    @property
+    def n_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def n_leaves(self):
+        return len(self.leaves)
+
+    def node_key(self, continent='全部', country='全部', province='全部'):
+        """把侧边栏的级联选择转换为节点键"""
+        key = []
+        for value in (continent, country, province):
+            if value == '全部':
+                break
+            key.append(value)
+        return tuple(key)
+
+    def aggregate(self, leaf_values):
+        """把 [..., 叶子数, T] 的叶子数据汇总为 [..., 节点数, T]"""
+        values = np.asarray(leaf_values, dtype=float)
+        lead_shape = values.shape[:-2]
+        n_leaves, n_obs = values.shape[-2:]
+
+        flat = np.moveaxis(values.reshape(-1, n_leaves, n_obs), 1, 0).reshape(n_leaves, -1)
+        aggregated = (self.S @ flat).reshape(self.n_nodes, -1, n_obs)
+        return np.moveaxis(aggregated, 0, 1).reshape(*lead_shape, self.n_nodes, n_obs)
+
+    def reconcile_leaves(self, base_forecasts, method='bottom_up', residual_var=None):
+        """协调各节点的基础预测，返回协调后的叶子预测 [..., 叶子数, H]
+
+        base_forecasts: [..., 节点数, H]
+        residual_var:   [..., 节点数] 样本内残差方差（MinT(WLS) 使用）
+        """
+        base = np.asarray(base_forecasts, dtype=float)
+
+        if method == 'bottom_up':
+            return base[..., self.leaf_rows, :]
+
+        if method != 'mint_wls':
+            raise ValueError(f"未知协调方法: {method}")
+
+        # MinT(WLS)：G = (Sᵀ W⁻¹ S)⁻¹ Sᵀ W⁻¹，W 为残差方差对角阵
+        if residual_var is None:
+            residual_var = np.asarray(self.S.sum(axis=1)).ravel()
+        weights = 1.0 / np.maximum(np.asarray(residual_var, dtype=float), 1e-9)
+        weights = np.broadcast_to(weights, base.shape[:-1])
+
+        S = self.S.toarray()
+        st_w = S.T * weights[..., None, :]
+        gram = st_w @ S
+        return np.linalg.solve(gram, st_w @ base)
+
+    def reconcile(self, base_forecasts, method='bottom_up', residual_var=None):
+        """协调各节点的基础预测，使任意节点预测等于其下属叶子之和"""
+        return self.aggregate(self.reconcile_leaves(base_forecasts, method, residual_var))
+
+
+def base_forecasts(history, periods, seasonal_periods=None):
+    """批量生成所有节点的基础预测
+
+    history 为 [序列数, T]；seasonal_periods 为每条序列的季节周期（1 表示无季节项），
+    缺省时由周期图批量检测。相同周期的序列一起拟合。
+    返回 (样本内拟合值, 预测值)。
+    """
+    y = np.atleast_2d(np.asarray(history, dtype=float))
+
+    if seasonal_periods is None:
+        detected = seasonality_profiles(y)['season_period'].to_numpy()
+        seasonal_periods = np.where(detected > 0, detected, 1)
+    seasonal_periods = np.broadcast_to(np.asarray(seasonal_periods, dtype=int), (y.shape[0],))
+
+    fitted = np.empty_like(y)
+    forecast = np.empty((y.shape[0], periods))
+    for period in np.unique(seasonal_periods):
+        rows = seasonal_periods == period
+        fitted[rows], forecast[rows] = seasonal_trend_fit(y[rows], periods, period)
+
+    return fitted, forecast
+
+
+def hierarchical_forecast(hierarchy, leaf_history, periods, method='bottom_up', seasonal_periods=None, floor=0.0):
+    """层级预测：汇总历史 → 批量基础预测 → 协调
+
+    leaf_history 为 [..., 叶子数, T]，seasonal_periods 为可选的 [..., 节点数] 各节点季节周期，
+    返回 [..., 节点数, periods] 的协调后预测。
+    协调后的叶子预测截断到 floor 以上再用 S 汇总，截断后各层级仍然一致。
+    """
+    node_history = hierarchy.aggregate(leaf_history)
+    lead_shape = node_history.shape[:-2]
+    n_obs = node_history.shape[-1]
+
+    flat_history = node_history.reshape(-1, n_obs)
+    if seasonal_periods is not None:
+        seasonal_periods = np.reshape(seasonal_periods, -1)
+    fitted, forecast = base_forecasts(flat_history, periods, seasonal_periods)
+
+    base = forecast.reshape(*lead_shape, hierarchy.n_nodes, periods)
+    residual_var = (flat_history - fitted).var(axis=1).reshape(*lead_shape, hierarchy.n_nodes)
+
+    leaves = hierarchy.reconcile_leaves(base, method, residual_var)
+    return hierarchy.aggregate(np.maximum(leaves, floor))
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+库存指标计算工具模块
+Inventory Metrics
+
+安全库存同时考虑需求波动和交期波动：
+    SS = z × sqrt(L × σd² + d² × σL²)
+其中 d、σd 为日需求均值和标准差，L、σL² 为交期均值和方差。
+交期均值/方差由供应商的 交货周期 与 准时交货率 估计（履约日志有足够收货记录时用实测值），
+对每个 SKU × 候选供应商组合一次广播计算，切换供应商时可直接比较全品类的库存成本。
+
+inventory_kernel / calculate_inventory_metrics 以列运算一次算出全部 SKU 的
+安全库存、再订货点、经济订货量、周转率和缺货风险（几十万个 SKU 也只需几十毫秒）；
+catalog_replenishment 直接从订单明细分组得到全品类的补货参数。
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import special, stats
+
+from utils.supplier_performance import DEFAULT_WINDOW
+
+# 迟交时的平均延误占报价交期的比例（延误天数按指数分布）
+LATE_DELAY_RATIO = 0.25
+
+# 缺少准时交货率时的假设值（%）
+DEFAULT_ON_TIME_RATE = 90.0
+
+# 履约日志窗口内至少有这么多次收货，才用实测交期统计代替估计值
+MIN_RECEIPTS = 2
+
+
+def lead_time_moments(quoted_lead_time, on_time_rate, late_delay_ratio=LATE_DELAY_RATIO):
+    """由报价交货周期和准时交货率（%）估计实际交期的均值和方差
+
+    准时（概率 p）按报价交期 L 到货；迟交时延误服从均值 δ = late_delay_ratio × L 的指数分布，
+    因此 均值 = L + (1 - p)δ，方差 = (1 - p)(1 + p)δ²。
+    """
+    lead = np.asarray(quoted_lead_time, dtype=float)
+    rate = np.asarray(on_time_rate, dtype=float)
+    p = np.clip(np.where(np.isnan(rate), DEFAULT_ON_TIME_RATE, rate) / 100, 0.0, 1.0)
+    delay = late_delay_ratio * lead
+    return lead + (1 - p) * delay, (1 - p) * (1 + p) * delay ** 2
+
+
+def supplier_lead_times(suppliers_df, window=DEFAULT_WINDOW, min_receipts=MIN_RECEIPTS):
+    """各供应商的交期均值和方差
+
+    缺省由 交货周期_数值 和 准时交货率_数值 估计；供应商表叠加了履约日志
+    （utils.supplier_performance.apply_performance）且窗口内收货次数足够时，直接用实测的交期均值和方差。
+    """
+    quoted = suppliers_df['交货周期_数值'].to_numpy(dtype=float)
+    on_time = suppliers_df['准时交货率_数值'].to_numpy(dtype=float) if '准时交货率_数值' in suppliers_df.columns \
+        else np.full(len(suppliers_df), np.nan)
+    mean, variance = lead_time_moments(quoted, on_time)
+
+    receipts = f'收货次数_{window}天'
+    if receipts in suppliers_df.columns and '交期标准差_数值' in suppliers_df.columns:
+        measured_std = suppliers_df['交期标准差_数值'].to_numpy(dtype=float)
+        measured = (suppliers_df[receipts].to_numpy() >= min_receipts) & ~np.isnan(measured_std)
+        mean = np.where(measured, quoted, mean)
+        variance = np.where(measured, measured_std ** 2, variance)
+    return mean, variance
+
+
+def combined_safety_stock(z, demand_mean, demand_std, lead_mean, lead_variance=0.0):
+    """安全库存 SS = z × sqrt(L × σd² + d² × σL²)，参数可互相广播
+
+    交期方差为0时退化为 z × σd × sqrt(L)。
+    """
+    demand_mean = np.asarray(demand_mean, dtype=float)
+    demand_std = np.asarray(demand_std, dtype=float)
+    return z * np.sqrt(np.asarray(lead_mean, dtype=float) * demand_std ** 2
+                       + demand_mean ** 2 * np.asarray(lead_variance, dtype=float))
+
+
+def inventory_kernel(demand_mean, demand_std, lead_mean, unit_cost, holding_cost_rate, ordering_cost,
+                     current_stock, z, lead_variance=0.0):
+    """库存指标内核：全部为逐元素的数组运算，参数可互相广播
+
+    返回 dict：提前期需求标准差、安全库存、再订货点、经济订货量、库存周转率、缺货风险。
+    缺货风险在当前库存低于再订货点时为 1 - Φ((当前库存 - 再订货点) / 提前期需求标准差)，否则为0；
+    持有成本为0时经济订货量为 NaN。
+    """
+    demand_mean = np.asarray(demand_mean, dtype=float)
+    current_stock = np.asarray(current_stock, dtype=float)
+    lead_mean = np.asarray(lead_mean, dtype=float)
+
+    lead_demand_std = np.sqrt(lead_mean * np.asarray(demand_std, dtype=float) ** 2
+                              + demand_mean ** 2 * np.asarray(lead_variance, dtype=float))
+    safety = z * lead_demand_std
+    reorder_point = demand_mean * lead_mean + safety
+
+    annual_demand = demand_mean * 365
+    holding_cost = np.asarray(unit_cost, dtype=float) * holding_cost_rate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eoq = np.sqrt(2 * annual_demand * ordering_cost / np.where(holding_cost > 0, holding_cost, np.nan))
+        turnover = annual_demand / (current_stock + safety)
+        gap = (reorder_point - current_stock) / lead_demand_std
+
+    # 提前期需求无波动时，低于再订货点即视为必然缺货
+    risk = np.where(lead_demand_std > 0, special.ndtr(gap), 1.0)
+    return {
+        '提前期需求标准差': lead_demand_std,
+        '安全库存': safety,
+        '再订货点': reorder_point,
+        '经济订货量': eoq,
+        '库存周转率': turnover,
+        '缺货风险': np.where(current_stock < reorder_point, risk, 0.0),
+    }
+
+
+def calculate_inventory_metrics(data, service_level=0.95):
+    """计算全部产品的库存优化指标，返回增加（或覆盖）指标列的新表
+
+    data 列：平均日需求、需求标准差、采购提前期、单位成本、库存持有成本率、订货成本、当前库存，
+    可选 提前期标准差（没有时不计提前期波动）。
+    """
+    lead_std = data['提前期标准差'].to_numpy(dtype=float) if '提前期标准差' in data.columns else 0.0
+    metrics = inventory_kernel(
+        data['平均日需求'].to_numpy(dtype=float),
+        data['需求标准差'].to_numpy(dtype=float),
+        data['采购提前期'].to_numpy(dtype=float),
+        data['单位成本'].to_numpy(dtype=float),
+        data['库存持有成本率'].to_numpy(dtype=float),
+        data['订货成本'].to_numpy(dtype=float),
+        data['当前库存'].to_numpy(dtype=float),
+        stats.norm.ppf(service_level),
+        np.square(lead_std),
+    )
+    metrics.pop('提前期需求标准差')
+    return data.assign(**metrics)
+
+
+def catalog_replenishment(orders_df, lead_times, service_level, holding_cost_rate, default_lead_time,
+                          ordering_cost=50.0, min_orders=6):
+    """全品类补货参数：一次分组得到各产品的日需求均值和标准差（按有订单的日期），再用 inventory_kernel 计算
+
+    lead_times: category_lead_times 的结果（以类别为索引，列 交期均值、交期方差），
+                类别没有供应商数据时用 default_lead_time 且不计交期波动
+    只保留订单数不少于 min_orders 的产品；持有成本为0时经济订货量取年需求的 1/12。
+    """
+    products = orders_df.groupby('product_name').agg(
+        订单数=('quantity', 'size'),
+        类别=('product_category', 'first'),
+        平均单价=('unit_price', 'mean'),
+    )
+    products = products[products['订单数'] >= min_orders]
+    daily = orders_df.groupby(['product_name', 'order_date'])['quantity'].sum().groupby(level=0)
+    demand_mean = daily.mean().reindex(products.index).to_numpy()
+    demand_std = daily.std().reindex(products.index).to_numpy()
+
+    lead = lead_times.reindex(products['类别'].to_numpy())
+    lead_mean = lead['交期均值'].fillna(default_lead_time).to_numpy()
+    lead_variance = lead['交期方差'].fillna(0.0).to_numpy()
+    price = products['平均单价'].to_numpy()
+
+    metrics = inventory_kernel(demand_mean, demand_std, lead_mean, price, holding_cost_rate, ordering_cost,
+                               0.0, stats.norm.ppf(service_level), lead_variance)
+    annual_demand = demand_mean * 365
+    return pd.DataFrame({
+        '产品名称': products.index.to_numpy(),
+        '类别': products['类别'].to_numpy(),
+        '平均日需求': demand_mean,
+        '需求标准差': demand_std,
+        '交期均值': lead_mean,
+        '交期标准差': np.sqrt(lead_variance),
+        '安全库存': metrics['安全库存'],
+        '再订货点': metrics['再订货点'],
+        '经济订货量': np.where(np.isnan(metrics['经济订货量']), annual_demand / 12, metrics['经济订货量']),
+        '平均单价': price,
+        '年需求量': annual_demand,
+    })
+
+
+def supplier_safety_stock(skus, suppliers_df, service_level, holding_cost_rate):
+    """对每个 SKU × 同类别候选供应商组合计算安全库存、再订货点和安全库存年持有成本
+
+    skus:          以 SKU 为索引的 DataFrame，列 类别、日均需求、需求标准差、单位成本
+    suppliers_df:  统一供应商表（主营产品、交货周期_数值、准时交货率_数值 等列）
+    service_level: 服务水平（0~1）
+    返回长表，每行一个组合：SKU、供应商序号（suppliers_df 的行号）、店铺名称、交期均值、交期标准差、
+    安全库存、再订货点、安全库存持有成本。
+    """
+    z = stats.norm.ppf(service_level)
+    sku_frame = skus.reset_index(drop=True).assign(sku_row=lambda df: np.arange(len(df)))
+    supplier_frame = suppliers_df.reset_index(drop=True).assign(supplier_row=lambda df: np.arange(len(df)))
+
+    pairs = sku_frame[['sku_row', '类别']].merge(
+        supplier_frame[['supplier_row', '主营产品']], left_on='类别', right_on='主营产品'
+    )[['sku_row', 'supplier_row']]
+
+    lead_mean, lead_variance = supplier_lead_times(supplier_frame)
+    sku_rows = pairs['sku_row'].to_numpy()
+    supplier_rows = pairs['supplier_row'].to_numpy()
+    demand = sku_frame['日均需求'].to_numpy(dtype=float)[sku_rows]
+    lead = lead_mean[supplier_rows]
+
+    ss = combined_safety_stock(z, demand, sku_frame['需求标准差'].to_numpy(dtype=float)[sku_rows],
+                               lead, lead_variance[supplier_rows])
+    result = pd.DataFrame({
+        'SKU': skus.index.to_numpy()[sku_rows],
+        '供应商序号': supplier_rows,
+        '店铺名称': supplier_frame['店铺名称'].to_numpy()[supplier_rows],
+        '交期均值': lead,
+        '交期标准差': np.sqrt(lead_variance[supplier_rows]),
+        '安全库存': ss,
+        '再订货点': demand * lead + ss,
+        '安全库存持有成本': ss * sku_frame['单位成本'].to_numpy(dtype=float)[sku_rows] * holding_cost_rate,
+    })
+    return result[~np.isnan(lead)].reset_index(drop=True)
+
+
+def cheapest_supplier(pairs):
+    """每个 SKU 安全库存持有成本最低的供应商组合（以 SKU 为索引）"""
+    if pairs.empty:
+        return pairs.set_index('SKU')
+    return pairs.loc[pairs.groupby('SKU', sort=False)['安全库存持有成本'].idxmin()].set_index('SKU')
+
+
+def category_lead_times(suppliers_df):
+    """各主营产品类别的供应商平均交期均值和方差（没有指定供应商时的交期假设）"""
+    mean, variance = supplier_lead_times(suppliers_df)
+    return pd.DataFrame({
+        '类别': suppliers_df['主营产品'].to_numpy(),
+        '交期均值': mean,
+        '交期方差': variance,
+    }).dropna().groupby('类别').mean()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+库存蒙特卡洛模拟工具模块
+Vectorized Inventory Simulation
+
+N 条需求路径 × M 个 SKU（或 SKU × 候选策略）同时模拟，只对天数做一次 Python 循环：
+每天先收到到期的在途订单，再按现有库存满足需求（缺货部分损失，不延期交付），
+最后按库存位置（现有库存 + 在途）和补货策略下单，每笔订单独立抽样交期。
+支持 (R, Q) 再订货点/固定批量、(s, S) 最小/最大库存 和 周期盘点 (T, S) 策略。
+输出每条路径的满足率、是否缺货、平均库存、订货次数以及持有/订货/缺货成本，
+summarize_simulation 汇总为各列的均值与分位数。
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _column_values(value, n_columns, dtype=float):
+    return np.broadcast_to(np.asarray(value, dtype=dtype), (n_columns,)).copy()
+
+
+def simulate_inventory(demand, reorder_point, order_quantity=None, order_up_to=None, review_period=1,
+                       lead_time=7, lead_time_std=0.0, initial_inventory=None, holding_cost=0.0,
+                       ordering_cost=0.0, stockout_cost=0.0, columns=None, seed=42, level_quantiles=None):
+    """批量模拟库存策略
+
+    demand:            [路径数, SKU数, 天数] 需求样本
+    columns:           可选 [列数] 每列对应的 SKU 序号，同一 SKU 的多组策略共享需求样本（公共随机数）；
+                       缺省每个 SKU 一列
+    reorder_point:     [列数] 再订货点，盘点日库存位置 ≤ 再订货点时下单
+    order_quantity:    [列数] 每次订货量 Q（(R, Q) 策略）
+    order_up_to:       [列数] 订货至水平 S，给出时订货量 = S - 库存位置（(s, S) / (T, S) 策略）
+    review_period:     [列数] 盘点周期（天），1 为连续盘点
+    lead_time:         [列数] 交期均值（天）；lead_time_std 为交期标准差，每笔订单独立抽样，取整且至少1天
+    initial_inventory: [列数] 期初现有库存，缺省为 再订货点 + 订货量
+    holding_cost:      [列数] 每件每天持有成本；ordering_cost 为每笔订单成本；stockout_cost 为每件缺货成本
+    level_quantiles:   可选分位数元组，给出时额外返回每天现有库存的分位数 [天数, 分位数个数, 列数]
+
+    返回 dict，除 level_quantiles 外均为 [路径数, 列数]：
+    fill_rate, stockout, stockout_days, average_inventory, orders,
+    holding_cost, ordering_cost, stockout_cost, total_cost
+    """
+    demand = np.asarray(demand, dtype=float)
+    n_paths, n_skus, n_days = demand.shape
+    columns = np.arange(n_skus) if columns is None else np.asarray(columns, dtype=np.intp)
+    n_columns = len(columns)
+
+    if order_quantity is None and order_up_to is None:
+        raise ValueError("需要给出 order_quantity 或 order_up_to")
+    reorder_point = _column_values(reorder_point, n_columns)
+    quantity = None if order_quantity is None else _column_values(order_quantity, n_columns)
+    up_to = None if order_up_to is None else _column_values(order_up_to, n_columns)
+    review = np.maximum(_column_values(review_period, n_columns, np.intp), 1)
+    lead_mean = _column_values(lead_time, n_columns)
+    lead_std = _column_values(lead_time_std, n_columns)
+    if initial_inventory is None:
+        initial_inventory = reorder_point + (quantity if quantity is not None else up_to - reorder_point)
+
+    # 在途订单按到货日放入环形数组，长度覆盖最长的交期
+    horizon = int(np.ceil(np.max(lead_mean + 4 * lead_std))) + 2
+    pipeline = np.zeros((horizon, n_paths, n_columns))
+    rng = np.random.default_rng(seed)
+    random_lead = bool(np.any(lead_std > 0))
+    fixed_lead = np.clip(np.rint(lead_mean), 1, horizon - 1).astype(np.intp)
+    path_index = np.arange(n_paths)[:, None]
+    column_index = np.arange(n_columns)[None, :]
+
+    on_hand = np.broadcast_to(_column_values(initial_inventory, n_columns), (n_paths, n_columns)).copy()
+    on_order = np.zeros((n_paths, n_columns))
+    total_demand = np.zeros((n_paths, n_columns))
+    total_served = np.zeros((n_paths, n_columns))
+    stockout_days = np.zeros((n_paths, n_columns))
+    inventory_sum = np.zeros((n_paths, n_columns))
+    orders = np.zeros((n_paths, n_columns))
+    levels = [] if level_quantiles is not None else None
+
+    for day in range(n_days):
+        # 到货
+        slot = day % horizon
+        arrived = pipeline[slot]
+        on_hand += arrived
+        on_order -= arrived
+        pipeline[slot] = 0.0
+
+        # 满足需求，缺货部分损失
+        daily = demand[:, columns, day]
+        served = np.minimum(on_hand, daily)
+        on_hand -= served
+        total_demand += daily
+        total_served += served
+        stockout_days += served < daily
+
+        # 盘点日按库存位置下单
+        position = on_hand + on_order
+        trigger = (position <= reorder_point) & (day % review == 0)
+        if up_to is not None:
+            order = np.where(trigger, np.maximum(up_to - position, 0.0), 0.0)
+        else:
+            order = np.where(trigger, quantity, 0.0)
+        if order.any():
+            if random_lead:
+                lead = np.clip(np.rint(lead_mean + lead_std * rng.standard_normal((n_paths, n_columns))),
+                               1, horizon - 1).astype(np.intp)
+            else:
+                lead = np.broadcast_to(fixed_lead, (n_paths, n_columns))
+            pipeline[(day + lead) % horizon, path_index, column_index] += order
+            on_order += order
+            orders += order > 0
+
+        inventory_sum += on_hand
+        if levels is not None:
+            levels.append(np.quantile(on_hand, level_quantiles, axis=0))
+
+    average_inventory = inventory_sum / n_days
+    shortage = total_demand - total_served
+    holding = average_inventory * n_days * _column_values(holding_cost, n_columns)
+    ordering = orders * _column_values(ordering_cost, n_columns)
+    stockout = shortage * _column_values(stockout_cost, n_columns)
+
+    result = {
+        'fill_rate': np.divide(total_served, total_demand, out=np.ones_like(total_demand), where=total_demand > 0),
+        'stockout': stockout_days > 0,
+        'stockout_days': stockout_days,
+        'average_inventory': average_inventory,
+        'orders': orders,
+        'holding_cost': holding,
+        'ordering_cost': ordering,
+        'stockout_cost': stockout,
+        'total_cost': holding + ordering + stockout,
+    }
+    if levels is not None:
+        result['level_quantiles'] = np.stack(levels)
+    return result
+
+
+def summarize_simulation(result, index=None, quantiles=(0.05, 0.95)):
+    """把模拟结果汇总为每列一行：满足率、缺货概率、平均库存和总成本的均值与分位数"""
+    low, high = quantiles
+    fill_rate = result['fill_rate']
+    total_cost = result['total_cost']
+    return pd.DataFrame({
+        '满足率均值': fill_rate.mean(axis=0),
+        f'满足率P{low * 100:.0f}': np.quantile(fill_rate, low, axis=0),
+        '缺货概率': result['stockout'].mean(axis=0),
+        '平均缺货天数': result['stockout_days'].mean(axis=0),
+        '平均库存': result['average_inventory'].mean(axis=0),
+        '平均订货次数': result['orders'].mean(axis=0),
+        '总成本均值': total_cost.mean(axis=0),
+        f'总成本P{low * 100:.0f}': np.quantile(total_cost, low, axis=0),
+        f'总成本P{high * 100:.0f}': np.quantile(total_cost, high, axis=0),
+    }, index=index)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+供应商页面解析工具模块
+Supplier Page Parser
+
+直接用 lxml 的预编译 XPath 解析 1688 / 阿里巴巴的供应商列表页和店铺详情页（公司简介、诚信档案），
+不经过 BeautifulSoup 的树遍历。批量页面可放到进程池中并行解析，
+benchmark() 以 data/html_fixtures 下保存的页面测量每秒解析页数，用于估算爬取所需的解析进程数。
+
+用法：python -m utils.listing_parser [重复次数] [进程数]
+"""
+
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import etree, html
+
+FIXTURE_DIR = 'data/html_fixtures'
+
+# 样例页面：文件名 -> (页面类型, 平台, 类别)
+FIXTURES = {
+    'alibaba_supplier_search.html': ('listing', '阿里巴巴', "Women's T-shirt"),
+    '1688_company_search.html': ('listing', '1688', '女装'),
+    'alibaba_company_profile.html': ('profile', '阿里巴巴', None),
+    '1688_credit_detail.html': ('profile', '1688', None),
+}
+
+# 页面数不少于该值时才使用进程池（进程启动和传输页面的开销大于解析少量页面的耗时）
+PARALLEL_MIN_PAGES = 32
+
+
+def _class(name):
+    """匹配 class 属性中包含某个类名的 XPath 条件"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _xpath(expr):
+    return etree.XPath(expr, smart_strings=False)
+
+
+# 列表页：每个平台一个店铺卡片选择器，以及卡片内各字段相对卡片的 XPath
+LISTING_XPATHS = {
+    '阿里巴巴': {
+        'card': f"//div[{_class('factory-card')}]",
+        'store_id': "string(@data-company-id)",
+        'name': f"string(.//a[{_class('company-name')}])",
+        'url': f"string(.//a[{_class('company-name')}]/@href)",
+        'years': f"string(.//*[{_class('join-year')}])",
+        'location': f"string(.//*[{_class('location')}])",
+        'rating': f"string(.//*[{_class('review-score')}])",
+        'reviews': f"string(.//*[{_class('review-count')}])",
+        'products': f"string(.//*[{_class('main-products')}]/span)",
+        'response_time': f"string(.//*[{_class('reply-time')}]/b)",
+        'tags': f".//*[{_class('service-tags')}]/*[{_class('tag')}]/text()",
+        'trade_assurance': f"boolean(.//*[{_class('trade-assurance')}])",
+    },
+    '1688': {
+        'card': f"//div[{_class('company-item')}]",
+        'store_id': "string(@data-member-id)",
+        'name': f"string(.//*[{_class('company-name')}]/a/@title)",
+        'url': f"string(.//*[{_class('company-name')}]/a/@href)",
+        'years': f"string(.//*[{_class('cxt-year')}])",
+        'location': f"string(.//*[{_class('location')}])",
+        'rating': f"string(.//*[{_class('service-score')}]/em)",
+        'reviews': f"string(.//*[{_class('trade-count')}]/em)",
+        'products': f"string(.//*[{_class('main-product')}])",
+        'min_order': f"string(.//*[{_class('min-order')}])",
+        'capacity': f"string(.//*[{_class('capacity')}])",
+        'delivery_time': f"string(.//*[{_class('delivery')}])",
+        'certifications': f".//*[{_class('certs')}]/*[{_class('cert')}]/text()",
+        'tags': f".//*[{_class('service-tags')}]/*[{_class('tag')}]/text()",
+    },
+}
+
+_LISTING = {
+    platform: {field: _xpath(expr) for field, expr in fields.items()}
+    for platform, fields in LISTING_XPATHS.items()
+}
+
+# 详情页：基本信息表格（th/td）和表现指标（label/value）统一抽取为 {标签: 文本}
+_PROFILE_LABELS = _xpath(
+    f"//table[{_class('company-basic-info')}]//tr/th | "
+    f"//*[{_class('performance')}]//*[{_class('metric')}]/*[{_class('label')}]"
+)
+_PROFILE_VALUE = _xpath("string(following-sibling::*[1])")
+
+# 详情页标签 -> 字段
+PROFILE_FIELDS = {
+    '所在地区': 'location',
+    '月产能': 'capacity',
+    '最小起订量': 'min_order',
+    '平均交货期': 'delivery_time',
+    '认证': 'certifications',
+    '准时交货率': 'on_time_rate',
+    '退货率': 'return_rate',
+    '合作年限': 'cooperation_years',
+    '平均回复时间': 'response_time',
+}
+
+_NUMBER = re.compile(r'\d[\d,]*(?:\.\d+)?')
+_LIST_SEPARATORS = re.compile(r'\s*[,，、;；]\s*')
+
+
+def _number(text, kind=float):
+    """提取文本中的第一个数字（去掉千分位逗号），没有数字时返回 None"""
+    match = _NUMBER.search(text or '')
+    return kind(match.group().replace(',', '')) if match else None
+
+
+def _split(text):
+    return [value for value in _LIST_SEPARATORS.split((text or '').strip()) if value]
+
+
+def _province(text):
+    """'CN · Guangdong'、'广东 广州市'、'Guangdong, China' 统一取省份部分"""
+    text = (text or '').replace('CN ·', '').replace(', China', '').strip()
+    return text.split()[0] if text else None
+
+
+def _document(page):
+    return html.fromstring(page.encode('utf-8') if isinstance(page, str) else page)
+
+
+def parse_listing(page, platform, category=None):
+    """解析列表页，返回供应商记录列表（字段与模拟爬取的记录一致，页面上没有的字段为 None）"""
+    xpaths = _LISTING[platform]
+    suppliers = []
+    for card in xpaths['card'](_document(page)):
+        text = {field: xpaths[field](card) for field in xpaths if field != 'card'}
+        products = text['products'].split('：', 1)[-1]
+        url = text['url'].strip()
+        supplier = {
+            'platform': platform,
+            'store_id': text['store_id'].strip(),
+            'name': text['name'].strip(),
+            'category': category,
+            'location': _province(text['location']),
+            'years': _number(text['years'], int),
+            'rating': _number(text['rating']),
+            'reviews': _number(text['reviews'], int),
+            'min_order': _number(text.get('min_order'), int),
+            'capacity': _number(text.get('capacity'), int),
+            'delivery_time': _number(text.get('delivery_time'), int),
+            'certifications': [c.strip() for c in text.get('certifications', [])],
+            'price_level': None,
+            'quality_level': None,
+            'products': ', '.join(_split(products)),
+            'tags': [tag.strip() for tag in text['tags']],
+            'url': f'https:{url}' if url.startswith('//') else url,
+        }
+        if text.get('response_time'):
+            supplier['response_time'] = text['response_time'].strip()
+        if 'trade_assurance' in text:
+            supplier['export_experience'] = True
+            supplier['trade_assurance'] = text['trade_assurance']
+        suppliers.append(supplier)
+    return suppliers
+
+
+def parse_profile(page, platform=None):
+    """解析店铺详情页，返回 合作年限、退货率、准时交货率 等字段"""
+    document = _document(page)
+    detail = {}
+    for label in _PROFILE_LABELS(document):
+        field = PROFILE_FIELDS.get(label.text_content().strip())
+        if field is None:
+            continue
+        value = _PROFILE_VALUE(label).strip()
+        if field == 'certifications':
+            detail[field] = _split(value)
+        elif field == 'location':
+            detail[field] = _province(value)
+        elif field == 'response_time':
+            detail[field] = value
+        elif field in ('on_time_rate', 'return_rate'):
+            detail[field] = _number(value)
+        else:
+            detail[field] = _number(value, int)
+    return detail
+
+
+def parse_page(kind, platform, page, category=None):
+    """按页面类型解析：listing 返回供应商列表，profile 返回详情字典"""
+    if kind == 'listing':
+        return parse_listing(page, platform, category)
+    return parse_profile(page, platform)
+
+
+def _parse_task(task):
+    return parse_page(*task)
+
+
+def parse_pages(tasks, workers=None, chunksize=8):
+    """批量解析 [(页面类型, 平台, HTML, 类别)]，按输入顺序返回解析结果
+
+    页面数达到 PARALLEL_MIN_PAGES 且 workers 不为 1 时使用进程池，否则在当前进程解析。
+    """
+    tasks = list(tasks)
+    if workers == 1 or len(tasks) < PARALLEL_MIN_PAGES:
+        return [_parse_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_parse_task, tasks, chunksize=chunksize))
+
+
+def load_fixtures(fixture_dir=FIXTURE_DIR):
+    """读取样例页面，返回 [(页面类型, 平台, HTML, 类别)]"""
+    tasks = []
+    for name, (kind, platform, category) in FIXTURES.items():
+        path = os.path.join(fixture_dir, name)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                tasks.append((kind, platform, f.read(), category))
+    return tasks
+
+
+def benchmark(fixture_dir=FIXTURE_DIR, repeat=500, workers=None):
+    """用样例页面测量单进程与进程池的解析速度（页/秒）"""
+    tasks = load_fixtures(fixture_dir) * repeat
+    results = {'pages': len(tasks), 'cpus': os.cpu_count()}
+
+    start = time.perf_counter()
+    serial = parse_pages(tasks, workers=1)
+    results['serial_pages_per_sec'] = len(tasks) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    parallel = parse_pages(tasks, workers=workers, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count()))))
+    results['parallel_pages_per_sec'] = len(tasks) / (time.perf_counter() - start)
+
+    results['suppliers_per_page'] = sum(len(r) for r in serial if isinstance(r, list)) / max(1, len(serial))
+    results['consistent'] = serial == parallel
+    return results
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    results = benchmark(repeat=repeat, workers=workers)
+    print(f"📄 页面数: {results['pages']}（CPU 核数 {results['cpus']}）")
+    print(f"🐢 单进程: {results['serial_pages_per_sec']:.0f} 页/秒")
+    print(f"🚀 进程池: {results['parallel_pages_per_sec']:.0f} 页/秒")
+    print(f"✅ 结果一致: {results['consistent']}")
+
+
+if __name__ == "__main__":
+    main()
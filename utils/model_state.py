@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量模型状态文件工具模块
+Versioned Model State Files
+
+增量检测器/分类器的状态以 pickle 保存，文件中同时记录状态格式版本、类名、构造参数和附加信息
+（如序列维度、滚动天数）。读取时任一项与当前不一致、或文件无法读取，都视为没有状态，由调用方重新构建，
+避免旧格式的状态文件导致异常，或在参数变化后静默沿用旧状态。
+"""
+
+import os
+import pickle
+
+
+def save_state(model, path, params, meta=None):
+    """保存模型状态（model.STATE_VERSION 为状态格式版本）"""
+    payload = {
+        'version': model.STATE_VERSION,
+        'class': type(model).__name__,
+        'params': params,
+        'meta': meta or {},
+        'state': model.__dict__,
+    }
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def load_state(cls, path, params, meta=None):
+    """读取模型状态；文件不存在、无法读取，或版本、类名、参数、附加信息不一致时返回 None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get('version') != cls.STATE_VERSION \
+            or payload.get('class') != cls.__name__ or payload.get('params') != params \
+            or payload.get('meta') != (meta or {}):
+        return None
+    model = cls.__new__(cls)
+    model.__dict__.update(payload['state'])
+    return model
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多区域库存规划工具模块
+Multi-Location Inventory Planning
+
+按 SKU × 区域仓 规划库存，需求取需求立方体中各区域的按日销量 [SKU, 区域, 天数]：
+    分仓模式  各区域仓直接向供应商补货，补货提前期 = 供应商交期 + 跨境调拨时间；
+    集中模式  国内中心仓向供应商补货，按全部区域的合计需求（含区域间相关性）持有安全库存，
+              区域仓只对调拨时间持有安全库存（风险分担）。
+区域间需求相关系数缺省由需求立方体估计（regional_correlation），也可给定假设值做情景分析。
+两种模式的安全库存、再订货点、经济订货量都以 [SKU, 区域] 数组一次算出（utils.inventory_metrics.inventory_kernel），
+区域数或 SKU 数增加时不需要逐个循环。
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from utils.demand_cube import build_demand_matrix
+from utils.inventory_metrics import inventory_kernel
+
+# 中心仓到各区域仓的调拨时间（天），按运输方式
+TRANSFER_LEAD_TIMES = {
+    '海运': {'北美': 30, '欧洲': 35, '亚洲': 10, '澳洲': 20, '南美': 40},
+    '空运': {'北美': 7, '欧洲': 7, '亚洲': 4, '澳洲': 6, '南美': 10},
+}
+
+# 调拨时间的变异系数（标准差 / 均值），按运输方式
+TRANSFER_LEAD_CV = {'海运': 0.2, '空运': 0.1}
+
+# 没有配置调拨时间的区域使用的缺省值（天）
+DEFAULT_TRANSFER_LEAD_TIME = 21
+
+
+def regional_demand(orders_df, sku_col='product_name', location_col='customer_region'):
+    """按日的 SKU × 区域 需求立方体，返回 (需求 [SKU数, 区域数, 天数], SKU 索引, 区域索引)"""
+    matrix = build_demand_matrix(orders_df, [sku_col, location_col])
+    skus = pd.Index(sorted(orders_df[sku_col].unique()), name=sku_col)
+    locations = pd.Index(sorted(orders_df[location_col].unique()), name=location_col)
+    full = matrix.reindex(pd.MultiIndex.from_product([skus, locations]), fill_value=0.0)
+    return full.to_numpy().reshape(len(skus), len(locations), -1), skus, locations
+
+
+def transfer_lead_times(locations, transport='海运'):
+    """各区域的调拨时间均值和方差 [区域数]"""
+    days = TRANSFER_LEAD_TIMES[transport]
+    mean = np.array([days.get(location, DEFAULT_TRANSFER_LEAD_TIME) for location in locations], dtype=float)
+    return mean, (TRANSFER_LEAD_CV[transport] * mean) ** 2
+
+
+def regional_correlation(demand):
+    """各 SKU 区域间按日需求的相关系数矩阵 [SKU数, 区域数, 区域数]（没有波动的区域与其他区域的相关系数取0）"""
+    demand = np.asarray(demand, dtype=float)
+    centered = demand - demand.mean(axis=2, keepdims=True)
+    covariance = centered @ centered.transpose(0, 2, 1) / max(demand.shape[2] - 1, 1)
+    std = np.sqrt(np.diagonal(covariance, axis1=1, axis2=2))
+    scale = std[:, :, None] * std[:, None, :]
+    correlation = np.divide(covariance, scale, out=np.zeros_like(covariance), where=scale > 0)
+    diagonal = np.arange(demand.shape[1])
+    correlation[:, diagonal, diagonal] = 1.0
+    return correlation
+
+
+def plan_network(demand, lead_mean, lead_variance, transfer_mean, transfer_variance, unit_cost,
+                 holding_cost_rate, ordering_cost, service_level, positions=0.0, correlation=None):
+    """分仓与集中两种模式的库存参数
+
+    demand:        [SKU数, 区域数, 天数] 按日需求
+    lead_mean:     [SKU数] 供应商交期均值；lead_variance 为交期方差
+    transfer_mean: [区域数] 调拨时间均值；transfer_variance 为调拨时间方差
+    unit_cost:     [SKU数] 单位成本
+    positions:     [SKU数, 区域数] 各区域仓的库存位置（现有 + 在途），缺省为0
+    correlation:   区域间需求相关系数，[SKU数, 区域数, 区域数]、[区域数, 区域数] 或标量（两两相同）；
+                   缺省由 demand 估计（regional_correlation），此时中心仓需求标准差即合计需求的标准差
+    返回 dict：
+        regional  分仓模式 [SKU数, 区域数] 的 日均需求、需求标准差、调拨时间、补货提前期、库存位置、安全库存、
+                  再订货点、经济订货量、建议补货量，以及集中模式下区域仓的 集中模式安全库存、集中模式再订货点
+        central   集中模式中心仓 [SKU数] 的 日均需求、需求标准差、平均相关系数、安全库存、再订货点、经济订货量
+    """
+    demand = np.asarray(demand, dtype=float)
+    z = stats.norm.ppf(service_level)
+    lead_mean = np.asarray(lead_mean, dtype=float)[:, None]
+    lead_variance = np.asarray(lead_variance, dtype=float)[:, None]
+    transfer_mean = np.asarray(transfer_mean, dtype=float)[None, :]
+    transfer_variance = np.asarray(transfer_variance, dtype=float)[None, :]
+    unit_cost = np.asarray(unit_cost, dtype=float)
+    positions = np.broadcast_to(np.asarray(positions, dtype=float), demand.shape[:2])
+
+    demand_mean = demand.mean(axis=2)
+    demand_std = demand.std(axis=2, ddof=1)
+
+    # 分仓模式：区域仓直接向供应商补货
+    replenishment_lead = lead_mean + transfer_mean
+    direct = inventory_kernel(demand_mean, demand_std, replenishment_lead, unit_cost[:, None], holding_cost_rate,
+                              ordering_cost, positions, z, lead_variance + transfer_variance)
+    order = np.where(positions <= direct['再订货点'],
+                     np.maximum(direct['再订货点'] + direct['经济订货量'] - positions, 0.0), 0.0)
+
+    # 集中模式：区域仓只覆盖调拨时间，中心仓按合计需求覆盖供应商交期
+    regional = inventory_kernel(demand_mean, demand_std, np.broadcast_to(transfer_mean, demand_mean.shape),
+                                unit_cost[:, None], holding_cost_rate, ordering_cost, positions, z, transfer_variance)
+    n_locations = demand.shape[1]
+    if correlation is None:
+        correlation = regional_correlation(demand)
+    elif np.ndim(correlation) == 0:
+        correlation = np.full((n_locations, n_locations), float(correlation))
+        np.fill_diagonal(correlation, 1.0)
+    correlation = np.broadcast_to(np.asarray(correlation, dtype=float), demand_std.shape + (n_locations,))
+    central_mean = demand_mean.sum(axis=1)
+    central_std = np.sqrt(np.maximum(np.einsum('si,sij,sj->s', demand_std, correlation, demand_std), 0.0))
+    pairs = max(n_locations * (n_locations - 1), 1)
+    mean_correlation = (correlation.sum(axis=(1, 2)) - np.trace(correlation, axis1=1, axis2=2)) / pairs
+    central = inventory_kernel(central_mean, central_std, lead_mean[:, 0], unit_cost, holding_cost_rate,
+                               ordering_cost, 0.0, z, lead_variance[:, 0])
+
+    return {
+        'regional': {
+            '日均需求': demand_mean,
+            '需求标准差': demand_std,
+            '调拨时间': np.broadcast_to(transfer_mean, demand_mean.shape),
+            '补货提前期': np.broadcast_to(replenishment_lead, demand_mean.shape),
+            '库存位置': positions,
+            '安全库存': direct['安全库存'],
+            '再订货点': direct['再订货点'],
+            '经济订货量': direct['经济订货量'],
+            '建议补货量': order,
+            '集中模式安全库存': regional['安全库存'],
+            '集中模式再订货点': regional['再订货点'],
+        },
+        'central': {
+            '日均需求': central_mean,
+            '需求标准差': central_std,
+            '平均相关系数': mean_correlation,
+            '安全库存': central['安全库存'],
+            '再订货点': central['再订货点'],
+            '经济订货量': central['经济订货量'],
+        },
+    }
+
+
+def network_tables(plan, skus, locations, unit_cost):
+    """把 plan_network 的结果整理为 (SKU × 区域 长表, 每个 SKU 的风险分担对比表)
+
+    需求聚合系数 = 合计需求标准差 / 各区域需求标准差之和，越小说明区域间需求互补、风险分担收益越大；
+    调拨时间较长时，中心仓与区域仓分别缓冲会抵消这部分收益。推荐模式 取安全库存较少的一种，
+    节省数量、节省比例、节省金额 为推荐模式相对分仓模式的节省（推荐分仓时为0，不报负的节省）。
+    """
+    regional = plan['regional']
+    n_skus, n_locations = regional['安全库存'].shape
+    location_table = pd.DataFrame({
+        'SKU': np.repeat(skus.to_numpy(), n_locations),
+        '区域': np.tile(locations.to_numpy(), n_skus),
+        **{name: np.asarray(values).ravel() for name, values in regional.items()},
+    })
+
+    decentralized = regional['安全库存'].sum(axis=1)
+    pooled = plan['central']['安全库存'] + regional['集中模式安全库存'].sum(axis=1)
+    unit_cost = np.asarray(unit_cost, dtype=float)
+    regional_std = regional['需求标准差'].sum(axis=1)
+    saving = np.maximum(decentralized - pooled, 0.0)
+    pooling_table = pd.DataFrame({
+        '平均相关系数': plan['central']['平均相关系数'],
+        '需求聚合系数': np.divide(plan['central']['需求标准差'], regional_std,
+                            out=np.ones_like(regional_std), where=regional_std > 0),
+        '分仓安全库存': decentralized,
+        '中心仓安全库存': plan['central']['安全库存'],
+        '区域仓安全库存': regional['集中模式安全库存'].sum(axis=1),
+        '集中模式安全库存': pooled,
+        '推荐模式': np.where(pooled < decentralized, '集中', '分仓'),
+        '节省数量': saving,
+        '节省比例': np.divide(saving, decentralized, out=np.zeros_like(decentralized), where=decentralized > 0),
+        '节省金额': saving * unit_cost,
+    }, index=skus)
+    return location_table, pooling_table
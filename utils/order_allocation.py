@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+采购订单分配优化工具模块
+Order Allocation Optimizer
+
+把全品类各 SKU 的补货量一次性分配给多个供应商：一个批量混合整数规划（scipy.optimize.milp，稀疏约束矩阵），
+- 变量：每个可行的 (SKU, 供应商) 组合的采购量 x、是否下单 y（0/1），以及每个 SKU 的缺口 u；
+- 约束：交期不超过上限（不满足的组合直接不建变量）、供应商月产能在所有 SKU 间共享、
+  下单时采购量不低于最小起订量；
+- 目标：采购成本 + 风险成本（延迟交货、退货）+ 每笔订单的固定订货成本 + 缺口惩罚。
+补货量是硬性需求，最小起订量高于补货量时按起订量采购（记为超量采购）。
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+
+# 价格等级对应的采购单价系数（相对 SKU 基准采购成本）
+PRICE_LEVEL_FACTORS = {1: 0.9, 2: 1.0, 3: 1.15}
+
+# 每笔采购订单的固定成本（与库存规划页面的订货成本假设一致）
+ORDERING_COST = 50.0
+
+# 未满足补货量的单位惩罚（$/件）：远高于任何采购成本，缺口只在产能或交期不足时出现
+SHORTAGE_PENALTY = 1000.0
+
+
+def build_arcs(skus, suppliers, max_lead_time=None):
+    """生成可行的 (SKU, 供应商) 组合
+
+    skus:      DataFrame，列 类别、补货量、单位成本，可选 最长交期
+    suppliers: 统一供应商表（需 主营产品、月产能_数值、最小起订量_数值、交货周期_数值 等数值列）
+    同类别、交期满足要求、最小起订量不超过月产能的组合才建变量。
+    """
+    sku_frame = skus.reset_index(drop=True).assign(sku_row=lambda df: np.arange(len(df)))
+    supplier_frame = suppliers.reset_index(drop=True).assign(supplier_row=lambda df: np.arange(len(df)))
+
+    arcs = sku_frame[['sku_row', '类别']].merge(
+        supplier_frame[['supplier_row', '主营产品']], left_on='类别', right_on='主营产品'
+    )[['sku_row', 'supplier_row']]
+
+    lead = supplier_frame['交货周期_数值'].to_numpy()[arcs['supplier_row']]
+    limit = sku_frame['最长交期'].to_numpy()[arcs['sku_row']] if '最长交期' in sku_frame.columns \
+        else np.full(len(arcs), np.inf if max_lead_time is None else max_lead_time)
+    capacity = supplier_frame['月产能_数值'].to_numpy()[arcs['supplier_row']]
+    moq = supplier_frame['最小起订量_数值'].fillna(0).to_numpy()[arcs['supplier_row']]
+
+    feasible = (lead <= limit) & (capacity > 0) & (moq <= capacity)
+    return arcs[feasible].reset_index(drop=True)
+
+
+def arc_costs(skus, suppliers, arcs, stockout_cost):
+    """每个组合的单位采购成本和单位风险成本
+
+    风险成本 = 延迟交货概率 × 缺货成本 + 退货率 × 单位采购成本。
+    """
+    supplier_rows = arcs['supplier_row'].to_numpy()
+    base_cost = skus['单位成本'].to_numpy()[arcs['sku_row'].to_numpy()]
+
+    level = suppliers['价格等级_数值'].to_numpy()[supplier_rows] if '价格等级_数值' in suppliers.columns \
+        else np.full(len(arcs), 2)
+    factor = pd.Series(level).map(PRICE_LEVEL_FACTORS).fillna(1.0).to_numpy()
+    unit_cost = base_cost * factor
+
+    on_time = suppliers['准时交货率_数值'].to_numpy()[supplier_rows] / 100 \
+        if '准时交货率_数值' in suppliers.columns else np.ones(len(arcs))
+    return_rate = suppliers['退货率_数值'].to_numpy()[supplier_rows] / 100 \
+        if '退货率_数值' in suppliers.columns else np.zeros(len(arcs))
+    risk_cost = np.nan_to_num(1 - on_time) * stockout_cost + np.nan_to_num(return_rate) * unit_cost
+    return unit_cost, risk_cost
+
+
+def top_candidates(sku_of, arc_cost, max_candidates):
+    """每个 SKU 只保留成本最低的 max_candidates 个供应商组合，返回保留掩码"""
+    order = np.lexsort((arc_cost, sku_of))
+    group_start = np.r_[0, np.flatnonzero(np.diff(sku_of[order])) + 1]
+    rank = np.arange(len(order)) - np.repeat(group_start, np.diff(np.r_[group_start, len(order)]))
+    keep = np.zeros(len(order), dtype=bool)
+    keep[order[rank < max_candidates]] = True
+    return keep
+
+
+def transport_support(sku_of, supplier_of, arc_cost, demand, capacity):
+    """求解不含最小起订量的运输问题线性规划（只有需求和产能约束），返回有采购量的组合掩码
+
+    用于筛选候选组合：产能紧张时，便宜的供应商被多个 SKU 共享，仅按成本取前几名会漏掉必要的备选供应商。
+    """
+    n_sku, n_arc = len(demand), len(sku_of)
+    used_suppliers, capacity_row = np.unique(supplier_of, return_inverse=True)
+    arc_index = np.arange(n_arc)
+
+    # 变量 [x (n_arc), u (n_sku)]；-Σx - u <= -补货量，Σx <= 产能
+    matrix = sparse.vstack([
+        sparse.coo_matrix((-np.ones(n_arc + n_sku), (np.r_[sku_of, np.arange(n_sku)], np.r_[arc_index, n_arc + np.arange(n_sku)])),
+                          shape=(n_sku, n_arc + n_sku)),
+        sparse.coo_matrix((np.ones(n_arc), (capacity_row, arc_index)), shape=(len(used_suppliers), n_arc + n_sku)),
+    ]).tocsr()
+    result = linprog(np.r_[arc_cost, np.full(n_sku, SHORTAGE_PENALTY)], A_ub=matrix,
+                     b_ub=np.r_[-demand, capacity[used_suppliers]], bounds=(0, None), method='highs')
+    if result.x is None:
+        return np.zeros(n_arc, dtype=bool)
+    return result.x[:n_arc] > 1e-6
+
+
+def allocate_orders(skus, suppliers, stockout_cost=10.0, ordering_cost=ORDERING_COST, max_lead_time=None,
+                    capacity_share=1.0, max_candidates=10, integral=True, time_limit=30, mip_gap=1e-3):
+    """全品类采购分配：一次求解
+
+    skus 为以 SKU 为索引的 DataFrame（列 类别、补货量、单位成本，可选 最长交期）；
+    capacity_share 为本次采购可占用的供应商月产能比例；
+    max_candidates 为每个 SKU 参与混合整数规划的候选供应商数（按单独采购全部补货量的成本取最低的若干个，
+    再加上运输问题线性规划中有采购量的组合），大品类下可把整数变量数控制在 SKU 数的常数倍；
+    integral=False 时求解线性松弛（不强制最小起订量的 0/1 决策，速度更快，用于估算下界）；
+    达到 time_limit 时返回当前最好的可行解，求解信息中的 gap 为与下界的相对差距。
+
+    返回 (分配明细, SKU 汇总, 求解信息 dict)。
+    """
+    suppliers = suppliers.reset_index(drop=True)
+    arcs = build_arcs(skus, suppliers, max_lead_time)
+    unit_cost, risk_cost = arc_costs(skus, suppliers, arcs, stockout_cost)
+    demand = skus['补货量'].to_numpy(dtype=float)
+    capacity = suppliers['月产能_数值'].to_numpy(dtype=float) * capacity_share
+
+    start = time.perf_counter()
+    if max_candidates:
+        sku_of, supplier_of = arcs['sku_row'].to_numpy(), arcs['supplier_row'].to_numpy()
+        # 按单独向该供应商采购全部补货量的成本排序（含最小起订量导致的超量采购和订货成本）
+        moq = suppliers['最小起订量_数值'].fillna(0).to_numpy(dtype=float)[supplier_of]
+        solo_cost = (unit_cost + risk_cost) * np.maximum(demand[sku_of], moq) + ordering_cost
+        keep = top_candidates(sku_of, solo_cost, max_candidates)
+        keep |= transport_support(sku_of, supplier_of, unit_cost + risk_cost, demand, capacity)
+        arcs, unit_cost, risk_cost = arcs[keep].reset_index(drop=True), unit_cost[keep], risk_cost[keep]
+    n_sku, n_arc = len(skus), len(arcs)
+
+    sku_of = arcs['sku_row'].to_numpy()
+    supplier_of = arcs['supplier_row'].to_numpy()
+    moq = suppliers['最小起订量_数值'].fillna(0).to_numpy(dtype=float)[supplier_of]
+
+    # 单个组合的采购上限：补货量（不足最小起订量时按起订量采购），且不超过供应商产能
+    upper = np.minimum(np.maximum(demand[sku_of], moq), capacity[supplier_of])
+
+    # 变量排列：[x (n_arc), y (n_arc), u (n_sku)]
+    cost = np.concatenate([unit_cost + risk_cost, np.full(n_arc, ordering_cost),
+                           np.full(n_sku, SHORTAGE_PENALTY)])
+    arc_index = np.arange(n_arc)
+    used_suppliers, capacity_row = np.unique(supplier_of, return_inverse=True)
+
+    # 约束 1：Σx + u >= 补货量（每个 SKU 一行）
+    demand_rows = sparse.coo_matrix(
+        (np.ones(n_arc + n_sku), (np.r_[sku_of, np.arange(n_sku)], np.r_[arc_index, 2 * n_arc + np.arange(n_sku)])),
+        shape=(n_sku, 2 * n_arc + n_sku)
+    )
+    # 约束 2：每个供应商所有 SKU 的采购量之和 <= 可用产能
+    capacity_rows = sparse.coo_matrix(
+        (np.ones(n_arc), (capacity_row, arc_index)), shape=(len(used_suppliers), 2 * n_arc + n_sku)
+    )
+    # 约束 3、4：moq·y <= x <= 上限·y
+    link_cols = np.r_[arc_index, n_arc + arc_index]
+    moq_rows = sparse.coo_matrix(
+        (np.r_[np.ones(n_arc), -moq], (np.r_[arc_index, arc_index], link_cols)), shape=(n_arc, 2 * n_arc + n_sku)
+    )
+    upper_rows = sparse.coo_matrix(
+        (np.r_[np.ones(n_arc), -upper], (np.r_[arc_index, arc_index], link_cols)), shape=(n_arc, 2 * n_arc + n_sku)
+    )
+
+    matrix = sparse.vstack([demand_rows, capacity_rows, moq_rows, upper_rows]).tocsr()
+    lower_bound = np.r_[demand, np.full(len(used_suppliers), -np.inf), np.zeros(n_arc), np.full(n_arc, -np.inf)]
+    upper_bound = np.r_[np.full(n_sku, np.inf), capacity[used_suppliers], np.full(n_arc, np.inf), np.zeros(n_arc)]
+
+    integrality = np.r_[np.zeros(n_arc), np.ones(n_arc) if integral else np.zeros(n_arc), np.zeros(n_sku)]
+    bounds = Bounds(np.zeros(2 * n_arc + n_sku), np.r_[upper, np.ones(n_arc), demand])
+
+    result = milp(cost, constraints=LinearConstraint(matrix, lower_bound, upper_bound),
+                  integrality=integrality, bounds=bounds,
+                  options={'time_limit': time_limit, 'mip_rel_gap': mip_gap})
+    info = {
+        'status': result.status,
+        'message': result.message,
+        'objective': result.fun,
+        'gap': getattr(result, 'mip_gap', None),
+        'variables': len(cost),
+        'constraints': matrix.shape[0],
+        'elapsed': time.perf_counter() - start,
+    }
+    if result.x is None:
+        return pd.DataFrame(), pd.DataFrame(), info
+
+    quantity = result.x[:n_arc]
+    shortfall = result.x[2 * n_arc:]
+    chosen = quantity > 1e-6
+
+    sku_names = skus.index.to_numpy()
+    allocations = pd.DataFrame({
+        'SKU': sku_names[sku_of[chosen]],
+        '供应商': suppliers['店铺名称'].to_numpy()[supplier_of[chosen]],
+        '平台来源': suppliers['平台来源'].to_numpy()[supplier_of[chosen]] if '平台来源' in suppliers.columns else None,
+        '采购量': np.round(quantity[chosen]),
+        '单位采购成本': unit_cost[chosen],
+        '单位风险成本': risk_cost[chosen],
+        '交货周期': suppliers['交货周期_数值'].to_numpy()[supplier_of[chosen]],
+    })
+    allocations['采购金额'] = allocations['采购量'] * allocations['单位采购成本']
+
+    allocated = np.bincount(sku_of, weights=quantity, minlength=n_sku)
+    summary = pd.DataFrame({
+        '补货量': demand,
+        '分配量': np.round(allocated),
+        '缺口': np.round(shortfall),
+        '超量采购': np.round(np.maximum(allocated - demand, 0)),
+        '供应商数': np.bincount(sku_of[chosen], minlength=n_sku),
+        '采购金额': np.bincount(sku_of, weights=quantity * unit_cost, minlength=n_sku),
+        '风险成本': np.bincount(sku_of, weights=quantity * risk_cost, minlength=n_sku),
+    }, index=skus.index)
+    info['suppliers_used'] = len(np.unique(supplier_of[chosen]))
+    return allocations, summary, info
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+补货策略优化工具模块
+Inventory Policy Optimizer
+
+对每个 SKU 在候选策略网格上做蒙特卡洛模拟（utils.inventory_simulation），
+取模拟期 持有 + 订货 + 缺货 成本均值最小的策略：
+    RQ  再订货点 R / 固定订货量 Q（连续盘点）
+    sS  再订货点 s / 订货至 S（连续盘点）
+    TS  盘点周期 T / 订货至 S（周期盘点）
+同一 SKU 的所有候选共享同一组需求路径（公共随机数），成本差异不受抽样噪声左右。
+模拟工作量（候选列 × 路径数 × 天数）够大且有多个 CPU 时按列分块放到进程池中评估，
+需求样本放在共享内存里，各进程直接映射读取、不复制。
+
+用法（夜间全品类优化）：python -m utils.policy_optimizer [策略] [路径数] [进程数]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from utils.inventory_simulation import simulate_inventory
+
+POLICY_TYPES = {
+    'RQ': '(R, Q) 再订货点 / 订货量',
+    'sS': '(s, S) 再订货点 / 订货至',
+    'TS': '(T, S) 盘点周期 / 订货至',
+}
+
+# 再订货点（或订货至水平）= 期望需求 + k × 需求标准差，k 的候选值
+SAFETY_FACTORS = (-1.0, -0.5, 0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0)
+
+# 订货量候选：经济订货量的倍数
+QUANTITY_FACTORS = (0.5, 0.75, 1.0, 1.5, 2.0)
+
+# 周期盘点的盘点周期候选（天）
+REVIEW_PERIODS = (1, 3, 7, 14, 28)
+
+# 每个评估任务的候选列数（控制在途数组 [交期, 路径数, 列数] 的内存）
+CHUNK_COLUMNS = 512
+
+# 模拟单元数（候选列 × 路径数 × 天数）不少于该值时才使用进程池。
+# 实测（43 个 SKU、1935 个候选、200 路径 × 90 天 ≈ 3500 万单元）：串行 2.7 秒，
+# 进程池启动和分块传递的固定开销约 0.5 秒；两个进程各分一半时，约 1600 万单元起并行才更快。
+# 1000 路径 × 180 天的夜间优化（约 3.5 亿单元）串行 30 秒。
+PARALLEL_MIN_CELLS = 16_000_000
+
+OPTIMAL_POLICY_FILE = 'data/optimal_policies.csv'
+
+
+def policy_grid(skus, demand_mean, demand_std, policy='RQ', safety_factors=SAFETY_FACTORS,
+                quantity_factors=QUANTITY_FACTORS, review_periods=REVIEW_PERIODS, ordering_cost=50.0):
+    """生成候选策略长表，每行一个 SKU × 候选
+
+    skus:        以 SKU 为索引的 DataFrame，列 交期均值、交期标准差、日持有成本
+    demand_mean: [SKU数] 日需求均值；demand_std 为日需求标准差
+    返回列：SKU序号、再订货点、订货量（RQ）、订货至（sS / TS）、盘点周期
+    """
+    if policy not in POLICY_TYPES:
+        raise ValueError(f"未知的策略类型: {policy}")
+    lead_mean = skus['交期均值'].to_numpy(dtype=float)
+    lead_variance = skus['交期标准差'].to_numpy(dtype=float) ** 2
+    holding = skus['日持有成本'].to_numpy(dtype=float)
+    demand_mean = np.asarray(demand_mean, dtype=float)
+    demand_std = np.asarray(demand_std, dtype=float)
+    n_skus = len(skus)
+    factors = np.asarray(safety_factors, dtype=float)
+
+    if policy == 'TS':
+        # 保护期 = 盘点周期 + 交期
+        periods = np.asarray(review_periods, dtype=float)
+        sku_row, period, factor = (a.ravel() for a in np.meshgrid(np.arange(n_skus), periods, factors, indexing='ij'))
+        protection = period + lead_mean[sku_row]
+        spread = np.sqrt(protection * demand_std[sku_row] ** 2 + demand_mean[sku_row] ** 2 * lead_variance[sku_row])
+        up_to = np.maximum(demand_mean[sku_row] * protection + factor * spread, 0.0)
+        return pd.DataFrame({'SKU序号': sku_row, '再订货点': up_to, '订货量': np.nan,
+                             '订货至': up_to, '盘点周期': period.astype(int)})
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eoq = np.sqrt(2 * demand_mean * ordering_cost / np.where(holding > 0, holding, np.nan))
+    eoq = np.where(np.isfinite(eoq), eoq, demand_mean * 30)
+    sku_row, factor, multiple = (a.ravel() for a in np.meshgrid(
+        np.arange(n_skus), factors, np.asarray(quantity_factors, dtype=float), indexing='ij'))
+    spread = np.sqrt(lead_mean[sku_row] * demand_std[sku_row] ** 2 + demand_mean[sku_row] ** 2 * lead_variance[sku_row])
+    reorder_point = np.maximum(demand_mean[sku_row] * lead_mean[sku_row] + factor * spread, 0.0)
+    quantity = np.maximum(eoq[sku_row] * multiple, 1.0)
+    return pd.DataFrame({
+        'SKU序号': sku_row,
+        '再订货点': reorder_point,
+        '订货量': quantity if policy == 'RQ' else np.nan,
+        '订货至': np.nan if policy == 'RQ' else reorder_point + quantity,
+        '盘点周期': 1,
+    })
+
+
+def _evaluate(demand, grid, lead_mean, lead_std, holding, ordering_cost, stockout_cost, seed):
+    """模拟一块候选，返回 [列数, 4]：总成本、满足率、缺货概率、平均库存（路径均值）"""
+    sku_row = grid['SKU序号'].to_numpy()
+    quantity = grid['订货量'].to_numpy()
+    up_to = grid['订货至'].to_numpy()
+    fixed = ~np.isnan(quantity)
+    result = simulate_inventory(
+        demand,
+        grid['再订货点'].to_numpy(),
+        order_quantity=quantity if fixed.all() else None,
+        order_up_to=None if fixed.all() else up_to,
+        review_period=grid['盘点周期'].to_numpy(),
+        lead_time=lead_mean[sku_row],
+        lead_time_std=lead_std[sku_row],
+        holding_cost=holding[sku_row],
+        ordering_cost=ordering_cost,
+        stockout_cost=stockout_cost,
+        columns=sku_row,
+        seed=seed,
+    )
+    return np.stack([result['total_cost'].mean(axis=0), result['fill_rate'].mean(axis=0),
+                     result['stockout'].mean(axis=0), result['average_inventory'].mean(axis=0)], axis=1)
+
+
+# 工作进程中映射的共享需求样本
+_shared = {}
+
+
+def _attach_demand(name, shape, dtype):
+    block = shared_memory.SharedMemory(name=name)
+    _shared['block'] = block
+    _shared['demand'] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _evaluate_shared(task):
+    grid, params = task
+    return _evaluate(_shared['demand'], grid, **params)
+
+
+def evaluate_grid(demand, skus, grid, ordering_cost=50.0, stockout_cost=10.0, workers=None,
+                  chunk_columns=CHUNK_COLUMNS, seed=42, min_parallel_cells=PARALLEL_MIN_CELLS):
+    """评估候选策略，返回 grid 增加 总成本、满足率、缺货概率、平均库存 四列的新表
+
+    demand:  [路径数, SKU数, 天数] 需求样本，SKU 顺序与 skus 一致
+    workers: 进程数，缺省为 CPU 核数；大于 1 且 候选数 × 路径数 × 天数 达到 min_parallel_cells 时，
+             需求样本放入共享内存并用进程池分块评估。
+    """
+    demand = np.ascontiguousarray(demand, dtype=float)
+    params = {
+        'lead_mean': skus['交期均值'].to_numpy(dtype=float),
+        'lead_std': skus['交期标准差'].to_numpy(dtype=float),
+        'holding': skus['日持有成本'].to_numpy(dtype=float),
+        'ordering_cost': ordering_cost,
+        'stockout_cost': stockout_cost,
+        'seed': seed,
+    }
+    grid = grid.reset_index(drop=True)
+    chunks = [grid.iloc[start:start + chunk_columns] for start in range(0, len(grid), chunk_columns)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(grid) * demand.shape[0] * demand.shape[2] < min_parallel_cells:
+        outcomes = [_evaluate(demand, chunk, **params) for chunk in chunks]
+    else:
+        block = shared_memory.SharedMemory(create=True, size=demand.nbytes)
+        try:
+            np.ndarray(demand.shape, dtype=demand.dtype, buffer=block.buf)[:] = demand
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_demand,
+                                     initargs=(block.name, demand.shape, demand.dtype)) as pool:
+                outcomes = list(pool.map(_evaluate_shared, [(chunk, params) for chunk in chunks]))
+        finally:
+            block.close()
+            block.unlink()
+
+    values = np.concatenate(outcomes) if outcomes else np.zeros((0, 4))
+    return grid.assign(总成本=values[:, 0], 满足率=values[:, 1], 缺货概率=values[:, 2], 平均库存=values[:, 3])
+
+
+def optimize_policies(demand, skus, policy='RQ', ordering_cost=50.0, stockout_cost=10.0, baseline=None,
+                      workers=None, seed=42, min_parallel_cells=PARALLEL_MIN_CELLS, **grid_kwargs):
+    """在需求样本上为每个 SKU 搜索成本最低的补货策略
+
+    demand:   [路径数, SKU数, 天数] 需求样本
+    skus:     以 SKU 为索引的 DataFrame，列 交期均值、交期标准差、日持有成本
+    baseline: 可选的现行策略（以 SKU 为索引，列 再订货点、订货量），RQ 策略下一并评估，
+              结果中的 现行成本 即其模拟成本
+    workers、min_parallel_cells 见 evaluate_grid。
+    返回 (每个 SKU 的最优策略表, 全部候选的评估表)。
+    """
+    demand = np.asarray(demand, dtype=float)
+    daily = demand.transpose(1, 0, 2).reshape(demand.shape[1], -1)
+    grid = policy_grid(skus, daily.mean(axis=1), daily.std(axis=1), policy,
+                       ordering_cost=ordering_cost, **grid_kwargs)
+    grid['现行策略'] = False
+    if baseline is not None and policy == 'RQ':
+        current = baseline.reindex(skus.index)
+        grid = pd.concat([grid, pd.DataFrame({
+            'SKU序号': np.arange(len(skus)),
+            '再订货点': current['再订货点'].to_numpy(dtype=float),
+            '订货量': current['订货量'].to_numpy(dtype=float),
+            '订货至': np.nan,
+            '盘点周期': 1,
+            '现行策略': True,
+        })], ignore_index=True).dropna(subset=['再订货点', '订货量'])
+
+    evaluated = evaluate_grid(demand, skus, grid, ordering_cost, stockout_cost, workers=workers, seed=seed,
+                              min_parallel_cells=min_parallel_cells)
+    evaluated.insert(0, 'SKU', skus.index.to_numpy()[evaluated['SKU序号'].to_numpy()])
+
+    best = evaluated.loc[evaluated.groupby('SKU序号')['总成本'].idxmin()].set_index('SKU')
+    best.insert(0, '策略', POLICY_TYPES[policy])
+    current_cost = evaluated[evaluated['现行策略']].set_index('SKU')['总成本']
+    best['现行成本'] = current_cost.reindex(best.index)
+    best = best.drop(columns=['SKU序号', '现行策略']).reindex(skus.index)
+    return best, evaluated.drop(columns='现行策略')
+
+
+def catalog_inputs(orders_df, suppliers_df, horizon, n_paths=1000, holding_cost_rate=0.25, block_size=7, seed=42):
+    """全品类优化的输入：残差自助法需求样本 [路径数, SKU数, 天数] 与 SKU 参数表
+
+    需求样本为 趋势 + 周季节点预测 叠加去趋势残差（utils.probabilistic_forecast.forecast_paths）。
+
+    交期取产品所属类别供应商的平均交期均值和方差（utils.inventory_metrics.category_lead_times）。
+    """
+    from utils.demand_cube import build_demand_matrix
+    from utils.inventory_metrics import category_lead_times
+    from utils.probabilistic_forecast import forecast_paths
+
+    demand = build_demand_matrix(orders_df, 'product_name')
+    _, paths = forecast_paths(demand.to_numpy(dtype=float), horizon, n_paths=n_paths, block_size=block_size, seed=seed)
+
+    products = orders_df.groupby('product_name').agg(类别=('product_category', 'first'),
+                                                     单价=('unit_price', 'mean')).reindex(demand.index)
+    lead = category_lead_times(suppliers_df).reindex(products['类别'].to_numpy())
+    skus = pd.DataFrame({
+        '类别': products['类别'].to_numpy(),
+        '交期均值': lead['交期均值'].fillna(lead['交期均值'].mean()).to_numpy(),
+        '交期标准差': np.sqrt(lead['交期方差'].fillna(0.0).to_numpy()),
+        '日持有成本': products['单价'].to_numpy() * holding_cost_rate / 365,
+    }, index=demand.index)
+    return paths, skus
+
+
+def main():
+    from utils.order_allocation import ORDERING_COST
+    from utils.supplier_data import load_supplier_table
+    from utils.supplier_performance import apply_performance, load_kpis
+
+    policy = sys.argv[1] if len(sys.argv) > 1 else 'RQ'
+    n_paths = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    orders_df = pd.read_csv('data/enhanced_customer_orders.csv', parse_dates=['order_date'])
+    suppliers_df = apply_performance(load_supplier_table(), load_kpis())
+    demand, skus = catalog_inputs(orders_df, suppliers_df, horizon=180, n_paths=n_paths)
+
+    start = time.perf_counter()
+    best, evaluated = optimize_policies(demand, skus, policy, ORDERING_COST, stockout_cost=10.0, workers=workers)
+    elapsed = time.perf_counter() - start
+
+    best.to_csv(OPTIMAL_POLICY_FILE, encoding='utf-8-sig')
+    print(f"📦 SKU数: {len(skus)}，候选策略: {len(evaluated)}，路径数: {n_paths}（CPU 核数 {os.cpu_count()}）")
+    print(f"⏱️ 耗时: {elapsed:.1f} 秒")
+    print(f"💰 最优策略总成本: ${best['总成本'].sum():,.0f}，平均满足率 {best['满足率'].mean():.1%}")
+    print(f"✅ 已保存到 {OPTIMAL_POLICY_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+概率预测工具模块
+Probabilistic Forecast Utilities
+
+基于残差块自助法（block bootstrap）的批量概率预测：
+所有序列、所有模拟路径在一次数组运算中完成，不做逐序列的 Python 循环。
+季节项只在历史覆盖至少 MIN_SEASONAL_CYCLES 个完整周期时使用（不足时退回周季节或不加季节项），
+并按每个相位的观测数收缩，避免季节项记住样本、残差偏小导致区间过窄。
+"""
+
+import numpy as np
+
+# 默认输出的分位数（P10 / P50 / P90）
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+
+# 周季节周期（天）
+WEEKLY_PERIOD = 7
+
+# 使用某个季节周期至少需要的完整周期数
+MIN_SEASONAL_CYCLES = 3
+
+# 季节项收缩强度：相位均值乘以 n / (n + SEASONAL_SHRINKAGE)，n 为该相位的观测数
+SEASONAL_SHRINKAGE = 2.0
+
+
+def effective_seasonal_period(seasonal_period, n_obs):
+    """历史长度不足 MIN_SEASONAL_CYCLES 个周期时退回周季节，仍不足时返回 1（无季节项）
+
+    seasonal_period ≤ 1 表示不加季节项；周季节本身不足时也不会退回。
+    """
+    seasonal_period = int(seasonal_period)
+    for period in (seasonal_period, min(seasonal_period, WEEKLY_PERIOD)):
+        if period > 1 and period * MIN_SEASONAL_CYCLES <= n_obs:
+            return period
+    return 1
+
+
+def seasonal_trend_fit(history, periods, seasonal_period=365):
+    """对多条序列同时拟合 线性趋势 + 季节项
+
+    history 为 [序列数, 天数] 的二维数组，返回 (样本内拟合值, 未来点预测)。
+    季节项取去趋势后各相位的均值，按相位观测数收缩；实际使用的周期见 effective_seasonal_period。
+    """
+    y = np.atleast_2d(np.asarray(history, dtype=float))
+    n_series, n_obs = y.shape
+    x = np.arange(n_obs)
+
+    # 线性趋势（最小二乘闭式解，一次算完所有序列）
+    x_centered = x - x.mean()
+    denom = np.sum(x_centered ** 2)
+    slope = (y - y.mean(axis=1, keepdims=True)) @ x_centered / denom if denom > 0 else np.zeros(n_series)
+    intercept = y.mean(axis=1) - slope * x.mean()
+
+    # 季节项：去趋势后按相位求均值，再按相位观测数收缩
+    period = effective_seasonal_period(seasonal_period, n_obs)
+    phase = x % period
+    phase_onehot = np.zeros((n_obs, period))
+    phase_onehot[x, phase] = 1.0
+    counts = phase_onehot.sum(axis=0)
+    detrended = y - intercept[:, None] - slope[:, None] * x
+    seasonal = (detrended @ phase_onehot) / counts
+    seasonal = (seasonal - seasonal.mean(axis=1, keepdims=True)) * counts / (counts + SEASONAL_SHRINKAGE)
+
+    fitted = intercept[:, None] + slope[:, None] * x + seasonal[:, phase]
+
+    future_x = np.arange(n_obs, n_obs + periods)
+    forecast = intercept[:, None] + slope[:, None] * future_x + seasonal[:, future_x % period]
+
+    return fitted, forecast
+
+
+def block_bootstrap_paths(point_forecast, residuals, n_paths=1000, block_size=7, seed=42,
+                          non_negative=True):
+    """残差块自助法生成模拟路径
+
+    point_forecast: [序列数, 预测天数] 点预测
+    residuals:      [序列数, 历史天数] 样本内残差
+    返回 [路径数, 序列数, 预测天数] 的模拟需求路径。
+    """
+    point = np.atleast_2d(np.asarray(point_forecast, dtype=float))
+    resid = np.atleast_2d(np.asarray(residuals, dtype=float))
+    n_series, horizon = point.shape
+    n_obs = resid.shape[1]
+
+    block_size = max(1, min(int(block_size), n_obs))
+    n_blocks = int(np.ceil(horizon / block_size))
+
+    # 为每条路径、每条序列随机抽取若干个连续残差块的起点
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, n_obs - block_size + 1, size=(n_paths, n_series, n_blocks))
+    offsets = (starts[..., None] + np.arange(block_size)).reshape(n_paths, n_series, -1)[..., :horizon]
+
+    sampled = resid[np.arange(n_series)[None, :, None], offsets]
+    paths = point[None, :, :] + sampled
+
+    if non_negative:
+        np.maximum(paths, 0, out=paths)
+
+    return paths
+
+
+def forecast_quantiles(paths, quantiles=DEFAULT_QUANTILES):
+    """从模拟路径中计算逐日分位数，返回 [分位数个数, 序列数, 预测天数]"""
+    return np.quantile(paths, quantiles, axis=0)
+
+
+def forecast_paths(history, periods, n_paths=1000, block_size=7, seasonal_period=WEEKLY_PERIOD, seed=42):
+    """趋势+季节点预测叠加去趋势残差的块自助法，返回 (点预测 [序列数, 预测天数], 路径 [路径数, 序列数, 预测天数])"""
+    y = np.atleast_2d(np.asarray(history, dtype=float))
+    fitted, point = seasonal_trend_fit(y, periods, seasonal_period)
+    paths = block_bootstrap_paths(point, y - fitted, n_paths=n_paths, block_size=block_size, seed=seed)
+    return point, paths
+
+
+def probabilistic_forecast(history, periods, quantiles=DEFAULT_QUANTILES, n_paths=1000,
+                           block_size=7, seasonal_period=365, seed=42):
+    """批量概率预测：趋势+季节点预测，叠加残差块自助法得到分位数
+
+    返回 (点预测 [序列数, 预测天数], 分位数 [分位数个数, 序列数, 预测天数])。
+    """
+    point, paths = forecast_paths(history, periods, n_paths, block_size, seasonal_period, seed)
+    return np.maximum(point, 0), forecast_quantiles(paths, quantiles)
+
+
+def lead_time_demand_quantiles(paths, lead_times, service_levels):
+    """计算提前期内累计需求的分位数，用于直接设定再订货点
+
+    paths 为 [路径数, 序列数, 预测天数]；lead_times、service_levels 可为标量或按序列给出。
+    返回 (提前期需求分位数, 提前期需求均值)，均为长度为序列数的数组。
+    """
+    n_paths, n_series, horizon = paths.shape
+    lead_times = np.broadcast_to(np.clip(np.asarray(lead_times, dtype=int), 1, horizon), (n_series,))
+    service_levels = np.broadcast_to(np.asarray(service_levels, dtype=float), (n_series,))
+
+    # 累计需求后按各序列的提前期取值
+    cumulative = np.cumsum(paths, axis=2)
+    index = np.broadcast_to((lead_times - 1)[None, :, None], (n_paths, n_series, 1))
+    lead_time_demand = np.take_along_axis(cumulative, index, axis=2)[..., 0]
+
+    # 不同序列服务水平可能不同：排序后按位置取分位数
+    sorted_demand = np.sort(lead_time_demand, axis=0)
+    position = np.clip(np.ceil(service_levels * n_paths).astype(int) - 1, 0, n_paths - 1)
+    quantile = sorted_demand[position, np.arange(n_series)]
+
+    return quantile, lead_time_demand.mean(axis=0)
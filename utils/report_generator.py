@@ -23,6 +23,7 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 import matplotlib.pyplot as plt
 import seaborn as sns
 import warnings
+from utils.anomaly_detection import anomaly_summary, detect_anomalies
 warnings.filterwarnings('ignore')
 
 class ReportGenerator:
@@ -243,7 +244,13 @@ class ReportGenerator:
         # 1. 时间序列分析
         story.append(Paragraph("1. 时间序列分析", self.heading_style))
         
-        analysis_text = """
+        # 对总销量和各产品的每日序列做异常检测
+        daily_total = df.groupby('date')['sales'].sum().to_frame('全部产品').T
+        daily_product = df.pivot_table(index='product', columns='date', values='sales', aggfunc='sum', fill_value=0)
+        anomalies = detect_anomalies(pd.concat([daily_total, daily_product]).fillna(0))
+        summary = anomaly_summary(anomalies)
+        
+        analysis_text = f"""
         通过对历史销售数据的时间序列分析，我们识别出以下关键模式：
         
         <b>趋势分析：</b>
@@ -252,7 +259,7 @@ class ReportGenerator:
         • 周期性：每周销售模式稳定，周末销售表现优于工作日
         
         <b>异常检测：</b>
-        • 识别出3个显著的销售异常点，主要与促销活动相关
+        • 识别出{summary['total']}个显著的销售异常点（激增{summary['spike']}个，骤降{summary['drop']}个）
         • 节假日效应明显，建议提前备货
         • 外部事件（如疫情）对销售模式产生短期影响
         """
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 响应磁盘缓存
+On-Disk Response Cache
+
+按内容寻址保存抓取结果：
+- objects/ 下的文件以返回内容的 sha256 命名（gzip 压缩的 JSON），相同内容只存一份；
+- requests/ 下每个请求（平台 + URL + 参数的指纹）一个索引文件，记录内容哈希和抓取时间。
+读取时超过有效期（TTL）的条目视为未命中。开发时反复解析同一批页面，只有第一次真正访问网络。
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils.async_crawler import request_fingerprint
+
+RESPONSE_CACHE_DIR = 'data/http_cache'
+
+# 缺省有效期（秒）
+DEFAULT_TTL = 24 * 3600
+
+
+def _write_atomic(path, data):
+    """先写临时文件再改名，中途中断不会留下半个文件（临时文件按进程和线程区分，可并发写入）"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class ResponseCache:
+    """内容寻址的响应缓存
+
+    ttl 为缺省有效期（秒），get 时可按请求单独指定；构造时传 None 表示永不过期。
+    """
+
+    def __init__(self, root=RESPONSE_CACHE_DIR, ttl=DEFAULT_TTL):
+        self.root = root
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'writes': 0}
+
+    def _index_path(self, fingerprint):
+        return os.path.join(self.root, 'requests', fingerprint[:2], f'{fingerprint}.json')
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], f'{digest}.json.gz')
+
+    def _entry(self, request):
+        path = self._index_path(request_fingerprint(request))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, request, ttl=None):
+        """读取缓存的返回内容，未命中或已过期时返回 None
+
+        ttl 缺省使用缓存的有效期，传 float('inf') 表示忽略有效期。
+        """
+        ttl = self.ttl if ttl is None else ttl
+        entry = self._entry(request)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        if ttl is not None and time.time() - entry['fetched_at'] > ttl:
+            self.stats['expired'] += 1
+            return None
+
+        try:
+            with gzip.open(self._object_path(entry['content']), 'rb') as f:
+                payload = json.loads(f.read().decode('utf-8'))
+        except (OSError, ValueError):
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return payload
+
+    def put(self, request, payload):
+        """保存返回内容（须可 JSON 序列化，如 HTML 文本、字典或列表）"""
+        body = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            _write_atomic(object_path, gzip.compress(body))
+
+        entry = {
+            'platform': request.platform,
+            'url': request.url,
+            'params': request.params,
+            'content': digest,
+            'fetched_at': time.time(),
+        }
+        _write_atomic(self._index_path(request_fingerprint(request)),
+                      json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+        self.stats['writes'] += 1
+
+    def prune(self, ttl=None):
+        """删除过期的索引条目以及不再被引用的内容文件，返回删除的文件数"""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        referenced = set()
+        removed = 0
+
+        index_root = os.path.join(self.root, 'requests')
+        for folder, _, files in os.walk(index_root):
+            for name in files:
+                path = os.path.join(folder, name)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    entry = None
+                if entry is None or (ttl is not None and now - entry['fetched_at'] > ttl):
+                    os.remove(path)
+                    removed += 1
+                else:
+                    referenced.add(entry['content'])
+
+        object_root = os.path.join(self.root, 'objects')
+        for folder, _, files in os.walk(object_root):
+            for name in files:
+                if name.split('.')[0] not in referenced:
+                    os.remove(os.path.join(folder, name))
+                    removed += 1
+        return removed
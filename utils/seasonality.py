@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+季节性检测工具模块
+Seasonality Detection Utilities
+
+对全部 SKU × 地区 序列做一次批量 FFT 周期图，识别主导周期（周/月/季度促销/年），
+生成每条序列的季节性画像，供预测引擎选择季节周期。
+画像保存时附带源数据指纹（旁路文件 <画像文件>.sha1），源数据变化后读取返回空表，调用方重新检测。
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# 候选季节周期（天）
+SEASON_CANDIDATES = {
+    'weekly': 7,
+    'monthly': 30.44,
+    'quarterly': 91.31,
+    'yearly': 365.25,
+}
+
+SEASON_LABELS = {
+    'weekly': '周度',
+    'monthly': '月度',
+    'quarterly': '季度促销',
+    'yearly': '年度',
+    'none': '无明显季节性',
+}
+
+PROFILE_FILE = 'data/season_profiles.csv'
+
+
+def periodogram(history, detrend=True):
+    """批量计算周期图
+
+    history 为 [序列数, 天数] 的数组，返回 (频率, 功率谱)，已去掉直流分量。
+    """
+    y = np.atleast_2d(np.asarray(history, dtype=float))
+    n_obs = y.shape[1]
+
+    if detrend and n_obs > 1:
+        # 去除线性趋势，避免趋势能量泄漏到低频
+        x = np.arange(n_obs) - (n_obs - 1) / 2
+        slope = (y @ x) / np.sum(x ** 2)
+        y = y - y.mean(axis=1, keepdims=True) - slope[:, None] * x
+    else:
+        y = y - y.mean(axis=1, keepdims=True)
+
+    power = np.abs(np.fft.rfft(y, axis=1)) ** 2
+    freqs = np.fft.rfftfreq(n_obs, d=1.0)
+
+    return freqs[1:], power[:, 1:]
+
+
+def seasonality_profiles(history, index=None, candidates=SEASON_CANDIDATES, tolerance=0.1, min_strength=0.1):
+    """生成季节性画像
+
+    每个候选周期的强度为其基频附近频带功率占总功率的比例；
+    强度最高且不低于 min_strength 的候选周期作为推荐季节周期（需大致覆盖两个完整周期）。
+    """
+    y = np.atleast_2d(np.asarray(history, dtype=float))
+    n_series, n_obs = y.shape
+    freqs, power = periodogram(y)
+
+    total_power = power.sum(axis=1)
+    total_power = np.where(total_power > 0, total_power, 1.0)
+
+    profile = pd.DataFrame(index=index if index is not None else pd.RangeIndex(n_series))
+
+    if freqs.size == 0:
+        profile['dominant_period'] = np.nan
+        profile['season_type'] = 'none'
+        profile['season_period'] = 0
+        return profile
+
+    peak = power.argmax(axis=1)
+    profile['dominant_period'] = 1.0 / freqs[peak]
+    profile['dominant_strength'] = power[np.arange(n_series), peak] / total_power
+
+    names = list(candidates)
+    strengths = np.zeros((n_series, len(names)))
+    for j, name in enumerate(names):
+        period = candidates[name]
+        if n_obs < 1.9 * period:
+            continue
+        f0 = 1.0 / period
+        band = np.abs(freqs - f0) <= tolerance * f0
+        band[np.abs(freqs - f0).argmin()] = True
+        strengths[:, j] = power[:, band].sum(axis=1) / total_power
+        profile[f'{name}_strength'] = strengths[:, j]
+
+    best = strengths.argmax(axis=1)
+    has_season = strengths[np.arange(n_series), best] >= min_strength
+    periods = np.array([int(round(candidates[name])) for name in names])
+
+    profile['season_type'] = np.where(has_season, np.array(names)[best], 'none')
+    profile['season_period'] = np.where(has_season, periods[best], 0)
+
+    return profile
+
+
+def seasonal_period_for(history):
+    """检测单条序列的季节周期，无明显季节性或不足14天时返回1（即不加季节项）"""
+    values = np.asarray(history, dtype=float)
+    if len(values) < 14:
+        return 1
+    profile = seasonality_profiles(values[None, :])
+    period = int(profile['season_period'].iloc[0])
+    return period if period > 0 else 1
+
+
+def data_fingerprint(*arrays):
+    """源数据指纹：数组内容（含形状）的 sha1"""
+    digest = hashlib.sha1()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str(array.shape).encode('utf-8'))
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def file_fingerprint(path):
+    """源文件指纹：文件内容的 sha1"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _fingerprint_path(path):
+    return f'{path}.sha1'
+
+
+def save_season_profiles(profile, path=PROFILE_FILE, fingerprint=None):
+    """保存季节性画像，fingerprint 为生成画像所用源数据的指纹"""
+    profile.to_csv(path, encoding='utf-8')
+    if fingerprint is not None:
+        with open(_fingerprint_path(path), 'w', encoding='utf-8') as f:
+            f.write(fingerprint)
+
+
+def load_season_profiles(path=PROFILE_FILE, fingerprint=None):
+    """读取季节性画像，文件不存在或与 fingerprint（源数据指纹）不一致时返回空表"""
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    if fingerprint is not None:
+        try:
+            with open(_fingerprint_path(path), 'r', encoding='utf-8') as f:
+                saved = f.read().strip()
+        except OSError:
+            saved = None
+        if saved != fingerprint:
+            return pd.DataFrame()
+    profile = pd.read_csv(path, encoding='utf-8')
+    index_cols = [col for col in profile.columns if col not in _profile_value_columns(profile)]
+    return profile.set_index(index_cols) if index_cols else profile
+
+
+def _profile_value_columns(profile):
+    return [col for col in profile.columns
+            if col in ('dominant_period', 'dominant_strength', 'season_type', 'season_period') or col.endswith('_strength')]
+
+
+def main():
+    """季节性画像任务 - 对全部 产品 × 地区 序列批量检测"""
+    import time
+    from utils.demand_cube import build_demand_matrix
+
+    orders_file = 'data/enhanced_customer_orders.csv'
+    orders_df = pd.read_csv(orders_file)
+    matrix = build_demand_matrix(orders_df, ['product_name', 'customer_region'])
+
+    start = time.perf_counter()
+    profile = seasonality_profiles(matrix.to_numpy(), index=matrix.index)
+    elapsed = time.perf_counter() - start
+
+    save_season_profiles(profile, fingerprint=file_fingerprint(orders_file))
+
+    print(f"✅ 完成 {len(profile)} 条序列的季节性检测，用时 {elapsed * 1000:.1f} 毫秒")
+    print(profile['season_type'].map(SEASON_LABELS).value_counts().to_dict())
+
+    return profile
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Skyline（帕累托前沿）筛选工具模块
+Skyline (Pareto Frontier) Utilities
+
+在价格、质量、交期、产能等指标上找出不被任何其他供应商支配的供应商集合。
+采用 sort-filter-skyline 算法：先按单调评分排序，保证支配者一定排在被支配者之前，
+再按块用 NumPy 广播比较：每块得到的新前沿点立即过滤掉剩余候选中被其支配的点。
+"""
+
+import numpy as np
+
+
+def _dominated_by(candidates, reference):
+    """返回 candidates 中被 reference 任一点支配的掩码（所有指标均已转换为越小越好）"""
+    if len(reference) == 0 or len(candidates) == 0:
+        return np.zeros(len(candidates), dtype=bool)
+    # 逐指标累积比较，避免在长度很短的指标轴上做三维归约
+    no_worse = np.ones((len(candidates), len(reference)), dtype=bool)
+    better = np.zeros((len(candidates), len(reference)), dtype=bool)
+    for k in range(candidates.shape[1]):
+        ref = reference[None, :, k]
+        cand = candidates[:, k, None]
+        no_worse &= ref <= cand
+        better |= ref < cand
+    return np.any(no_worse & better, axis=1)
+
+
+def skyline_mask(values, maximize=None, block_size=512):
+    """计算 skyline 掩码
+
+    values:   [方案数, 指标数] 数值矩阵
+    maximize: [指标数] 布尔掩码，True 表示越大越好，缺省全部越小越好
+    返回长度为方案数的布尔数组，True 表示不被任何其他方案支配。
+    含 NaN 的方案不参与比较，也不进入前沿。
+    """
+    x = np.asarray(values, dtype=float)
+    n_options, n_criteria = x.shape
+    if maximize is not None:
+        x = np.where(np.asarray(maximize, dtype=bool), -x, x)
+
+    valid = ~np.isnan(x).any(axis=1)
+    rows = np.flatnonzero(valid)
+    mask = np.zeros(n_options, dtype=bool)
+    if rows.size == 0:
+        return mask
+
+    # 各指标缩放到 [0, 1] 后求和作为单调评分：支配者的评分一定更小
+    points = x[rows]
+    low, high = points.min(axis=0), points.max(axis=0)
+    scaled = (points - low) / np.where(high > low, high - low, 1.0)
+    order = np.argsort(scaled.sum(axis=1), kind='stable')
+    points = points[order]
+
+    frontier = []
+    while len(points):
+        block, block_index = points[:block_size], order[:block_size]
+        points, order = points[block_size:], order[block_size:]
+
+        # 块内互相比较得到新的前沿点（更早的前沿点已在上一轮过滤掉其支配的点）
+        keep = ~_dominated_by(block, block)
+        new_points = block[keep]
+        frontier.append(block_index[keep])
+
+        # 用新前沿点过滤剩余候选，候选集通常在前几块后就急剧缩小
+        remaining = ~_dominated_by(points, new_points)
+        points, order = points[remaining], order[remaining]
+
+    mask[rows[np.concatenate(frontier)]] = True
+    return mask
+
+
+def skyline(df, criteria, block_size=512):
+    """返回 DataFrame 中的 skyline 供应商
+
+    criteria 为 {列名: 'min' 或 'max'}，如 {'单价': 'min', '质量评分': 'max'}。
+    """
+    columns = list(criteria)
+    maximize = [criteria[column] == 'max' for column in columns]
+    mask = skyline_mask(df[columns].to_numpy(dtype=float), maximize, block_size)
+    return df[mask]
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+供应商数据整理工具模块
+Unified Supplier Table Utilities
+
+把本地供应商表、爬取的供应商表、亚马逊供应商表和阿里巴巴供应商列表页数据合并为统一供应商表，
+并把 "22077件"、"26天"、"92.3%"、"15年"、"5,842" 这类文本字段解析为数值列（列名加 _数值 后缀）。
+"""
+
+import os
+
+import pandas as pd
+
+from utils.entity_resolution import assign_supplier_ids, merge_duplicates
+
+LOCAL_SUPPLIER_FILE = 'data/enhanced_supplier_data.csv'
+CRAWLED_SUPPLIER_FILE = 'data/crawled_suppliers.csv'
+ALIBABA_LISTING_FILE = 'data/供应商数据.csv'
+AMAZON_SUPPLIER_FILE = 'data/亚马逊数据.xlsx - 供应商数据.csv'
+
+# 本地数据的平台来源标记
+LOCAL_PLATFORM = '本地'
+
+# 阿里巴巴列表页数据的平台来源标记
+ALIBABA_PLATFORM = '阿里巴巴'
+
+# 亚马逊供应商表的平台来源标记
+AMAZON_PLATFORM = '亚马逊'
+
+# 阿里巴巴列表页的英文产品类目对应的主营产品
+LISTING_CATEGORIES = {
+    "Women's T-shirt": '女装',
+    "Women's shorts": '女装',
+    "Women's pants": '女装',
+    "woman's coat": '女装',
+}
+
+# 需要解析为数值的文本列
+NUMERIC_COLUMNS = ['店铺年份', '店铺评论数量', '月产能', '最小起订量', '交货周期', '合作年限', '退货率', '准时交货率']
+
+# 等级列的数值映射（数值越大等级越高）
+PRICE_LEVELS = {'低价': 1, '中价': 2, '高价': 3}
+QUALITY_LEVELS = {'标准': 1, '优质': 2, '精品': 3}
+
+# 统一供应商表上的 Skyline 指标：价格、质量、交期、产能
+SUPPLIER_SKYLINE_CRITERIA = {
+    '价格等级_数值': 'min',
+    '店铺评分': 'max',
+    '交货周期_数值': 'min',
+    '月产能_数值': 'max',
+}
+
+# 英文省份名称及带城市的地区名统一为中文省份
+REGION_ALIASES = {
+    'Guangdong': '广东',
+    'Zhejiang': '浙江',
+    'Jiangsu': '江苏',
+    'Fujian': '福建',
+    'Shandong': '山东',
+}
+PROVINCES = ['广东', '浙江', '江苏', '福建', '山东']
+
+
+def parse_numeric(series):
+    """去掉千分位逗号和 件/天/年/% 等单位后转为浮点数，无法解析的记为 NaN"""
+    text = series.astype(str).str.replace(',', '', regex=False)
+    text = text.str.replace(r'[件天年%]', '', regex=True).str.strip()
+    return pd.to_numeric(text, errors='coerce')
+
+
+def normalize_region(series):
+    """统一地区写法：英文省名转中文，'广东广州' 这类地区取省份"""
+    region = series.astype(str).str.strip().replace(REGION_ALIASES)
+    for province in PROVINCES:
+        region = region.mask(region.str.startswith(province), province)
+    return region
+
+
+def normalize_supplier_table(df):
+    """为供应商表补充数值列、等级数值列和统一的省份列"""
+    table = df.copy()
+
+    for column in NUMERIC_COLUMNS:
+        if column in table.columns:
+            table[f'{column}_数值'] = parse_numeric(table[column])
+
+    if '价格等级' in table.columns:
+        table['价格等级_数值'] = table['价格等级'].map(PRICE_LEVELS)
+    if '质量等级' in table.columns:
+        table['质量等级_数值'] = table['质量等级'].map(QUALITY_LEVELS)
+    if '所在地区' in table.columns:
+        table['所在省份'] = normalize_region(table['所在地区'])
+
+    return table
+
+
+def load_listing_table(listing_file=ALIBABA_LISTING_FILE):
+    """读取阿里巴巴供应商列表页数据（GBK 编码），整理为统一供应商表的列
+
+    店铺id 改名为 店铺ID，英文产品类目映射为 主营产品，保留 店铺标签 等原始列。
+    """
+    listing = pd.read_csv(listing_file, encoding='gbk').rename(columns={'店铺id': '店铺ID'})
+    listing['店铺ID'] = listing['店铺ID'].astype(str)
+    listing['主营产品'] = listing['产品类目'].map(LISTING_CATEGORIES)
+    listing['平台来源'] = ALIBABA_PLATFORM
+    return listing
+
+
+def load_amazon_table(amazon_file=AMAZON_SUPPLIER_FILE):
+    """读取亚马逊供应商表（只有 店铺名称、店铺年份、店铺评分、店铺评论数量，没有店铺ID）"""
+    amazon = pd.read_csv(amazon_file)
+    amazon['平台来源'] = AMAZON_PLATFORM
+    return amazon
+
+
+def load_supplier_table(local_file=LOCAL_SUPPLIER_FILE, crawled_file=CRAWLED_SUPPLIER_FILE, listing_file=None,
+                        amazon_file=None, resolve=False):
+    """读取并合并本地与爬取的供应商数据，返回统一供应商表
+
+    listing_file 给出时一并读取阿里巴巴供应商列表页（含店铺标签、店铺ID，但没有产能、交期等数值字段），
+    amazon_file 给出时一并读取亚马逊供应商表。
+    resolve=True 时做实体识别（见 utils.entity_resolution）：同一供应商的多条记录合并为一行，
+    增加 供应商ID、重复记录数、数据来源 列，本地数据优先。
+    """
+    frames = []
+    if os.path.exists(local_file):
+        local = pd.read_csv(local_file)
+        if '平台来源' not in local.columns:
+            local['平台来源'] = LOCAL_PLATFORM
+        frames.append(local)
+    if crawled_file and os.path.exists(crawled_file):
+        frames.append(pd.read_csv(crawled_file))
+    if amazon_file and os.path.exists(amazon_file):
+        frames.append(load_amazon_table(amazon_file))
+    if listing_file and os.path.exists(listing_file):
+        frames.append(load_listing_table(listing_file))
+
+    if not frames:
+        return pd.DataFrame()
+
+    table = normalize_supplier_table(pd.concat(frames, ignore_index=True))
+    if resolve:
+        table = merge_duplicates(table, assign_supplier_ids(table))
+    return table
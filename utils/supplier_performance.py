@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+供应商履约表现日志
+Supplier Performance Log
+
+采购收货记录和爬取快照（准时交货率、退货率、店铺评分、报价交期）只追加写入 SQLite，
+同时在内存中按天分桶的环形缓冲区上维护 30/90/365 天滚动 KPI：
+每条事件只更新一个桶和各窗口的累计量，日期推进时减去滑出窗口的那一天，
+不需要重新扫描历史。准时率、次品率、交期均值/方差优先使用收货记录，
+窗口内没有收货记录的供应商退回使用爬取快照。
+
+爬取快照由 supplier_crawler 每次爬取后写入；采购收货记录从 CSV 导入：
+用法：python -m utils.supplier_performance 收货记录.csv
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+PERFORMANCE_LOG_FILE = 'data/supplier_performance.db'
+
+# 滚动窗口（天），环形缓冲区长度取最长的窗口
+WINDOWS = (30, 90, 365)
+
+# 每日桶内的累计量
+FIELDS = [
+    '收货次数',
+    '准时次数', '考核次数',
+    '次品数量', '收货数量',
+    '交期和', '交期平方和', '交期次数',
+    '快照准时率和', '快照准时率次数',
+    '快照退货率和', '快照退货率次数',
+    '评分和', '评分次数',
+    '报价交期和', '报价交期平方和', '报价交期次数',
+]
+_F = {name: i for i, name in enumerate(FIELDS)}
+
+# 计数类字段（窗口合计经反复加减后取整，避免浮点误差被当成有观测）
+_COUNTS = ['收货次数', '准时次数', '考核次数', '次品数量', '收货数量', '交期次数',
+           '快照准时率次数', '快照退货率次数', '评分次数', '报价交期次数']
+
+# 写入 TOPSIS、采购分配和安全库存所用供应商表的窗口
+DEFAULT_WINDOW = 90
+
+# 收货记录表的必需列（供应商由 平台来源 + 店铺ID / 店铺名称 标识，见 performance_keys）
+RECEIPT_COLUMNS = ['下单日期', '收货日期', '收货数量']
+
+
+def _day(value):
+    """日期 -> 天序号"""
+    return pd.Timestamp(value).toordinal()
+
+
+def _observe(vector, value, total, count, squares=None):
+    """把一个观测值累加到 (和, 次数[, 平方和])，缺失值跳过"""
+    if value is None or pd.isna(value):
+        return
+    value = float(value)
+    vector[_F[total]] += value
+    vector[_F[count]] += 1
+    if squares is not None:
+        vector[_F[squares]] += value * value
+
+
+def _ratio(numerator, denominator):
+    return np.divide(numerator, denominator, out=np.full(numerator.shape, np.nan), where=denominator > 0)
+
+
+def _variance(total, squares, count):
+    """由和与平方和计算样本方差（不足两个观测时为 NaN）"""
+    variance = np.divide(squares - np.divide(total ** 2, count, out=np.zeros_like(total), where=count > 0),
+                         count - 1, out=np.full(total.shape, np.nan), where=count > 1)
+    return np.maximum(variance, 0.0, where=~np.isnan(variance), out=variance)
+
+
+class RollingKPI:
+    """多个供应商的滚动窗口累计量
+
+    ring[供应商, 天 % 环长, 字段] 保存每天的累计量，totals[供应商, 窗口, 字段] 保存各窗口的合计。
+    新事件 O(1) 更新；时钟每推进一天，各窗口减去滑出窗口那天的桶并清空最旧的桶。
+    """
+
+    def __init__(self, windows=WINDOWS):
+        self.windows = tuple(sorted(windows))
+        self.ring_days = self.windows[-1]
+        self.keys = {}
+        self.names = []
+        self.ring = np.zeros((0, self.ring_days, len(FIELDS)))
+        self.totals = np.zeros((0, len(self.windows), len(FIELDS)))
+        self.today = None
+
+    def _row(self, key):
+        row = self.keys.get(key)
+        if row is not None:
+            return row
+        row = len(self.names)
+        if row == len(self.ring):
+            # 容量翻倍扩展
+            capacity = max(16, 2 * row)
+            self.ring = np.concatenate([self.ring, np.zeros((capacity - row,) + self.ring.shape[1:])])
+            self.totals = np.concatenate([self.totals, np.zeros((capacity - row,) + self.totals.shape[1:])])
+        self.keys[key] = row
+        self.names.append(key)
+        return row
+
+    def advance(self, day):
+        """把时钟推进到 day（天序号），更早的日期不回退"""
+        if self.today is None:
+            self.today = day
+            return
+        if day <= self.today:
+            return
+        if day - self.today >= self.ring_days:
+            self.ring[:] = 0.0
+            self.totals[:] = 0.0
+        else:
+            for t in range(self.today + 1, day + 1):
+                # 第 t - w 天滑出窗口 w；最长窗口滑出的正是将被新的一天复用的桶
+                for k, window in enumerate(self.windows):
+                    self.totals[:, k] -= self.ring[:, (t - window) % self.ring_days]
+                self.ring[:, t % self.ring_days] = 0.0
+        self.today = day
+
+    def add(self, key, day, vector):
+        """累加一条事件；早于最长窗口的事件忽略，返回是否计入"""
+        if self.today is None or day > self.today:
+            self.advance(day)
+        age = self.today - day
+        if age >= self.ring_days:
+            return False
+        row = self._row(key)
+        self.ring[row, day % self.ring_days] += vector
+        for k, window in enumerate(self.windows):
+            if age < window:
+                self.totals[row, k] += vector
+        return True
+
+    def kpis(self, as_of=None):
+        """各供应商的滚动 KPI 表（索引为供应商键，比率为百分数）"""
+        if as_of is not None:
+            self.advance(_day(as_of))
+        n = len(self.names)
+        columns = {}
+        for k, window in enumerate(self.windows):
+            t = {name: self.totals[:n, k, i] for name, i in _F.items()}
+            t.update({name: np.rint(t[name]) for name in _COUNTS})
+            receipts_on_time = _ratio(t['准时次数'], t['考核次数']) * 100
+            receipts_defect = _ratio(t['次品数量'], t['收货数量']) * 100
+            receipts_lead = _ratio(t['交期和'], t['交期次数'])
+            receipts_variance = _variance(t['交期和'], t['交期平方和'], t['交期次数'])
+
+            columns[f'收货次数_{window}天'] = np.rint(t['收货次数']).astype(int)
+            columns[f'准时率_{window}天'] = np.where(
+                t['考核次数'] > 0, receipts_on_time, _ratio(t['快照准时率和'], t['快照准时率次数']))
+            columns[f'次品率_{window}天'] = np.where(
+                t['收货数量'] > 0, receipts_defect, _ratio(t['快照退货率和'], t['快照退货率次数']))
+            columns[f'交期均值_{window}天'] = np.where(
+                t['交期次数'] > 0, receipts_lead, _ratio(t['报价交期和'], t['报价交期次数']))
+            columns[f'交期方差_{window}天'] = np.where(
+                t['交期次数'] > 1, receipts_variance,
+                _variance(t['报价交期和'], t['报价交期平方和'], t['报价交期次数']))
+            columns[f'店铺评分_{window}天'] = _ratio(t['评分和'], t['评分次数'])
+        return pd.DataFrame(columns, index=pd.Index(self.names, name='供应商键'))
+
+
+def performance_keys(df):
+    """供应商表每行对应的日志键：平台来源:店铺ID，没有店铺ID时用店铺名称"""
+    platform = df['平台来源'].fillna('本地').astype(str) if '平台来源' in df.columns else pd.Series('本地', index=df.index)
+    if '店铺ID' in df.columns:
+        store = df['店铺ID'].where(df['店铺ID'].notna(), df['店铺名称'])
+    else:
+        store = df['店铺名称']
+    return platform + ':' + store.astype(str)
+
+
+class SupplierPerformanceLog:
+    """只追加的供应商履约日志（SQLite），打开时回放最长窗口内的事件重建滚动 KPI"""
+
+    def __init__(self, path=PERFORMANCE_LOG_FILE, windows=WINDOWS):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS performance_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                supplier TEXT NOT NULL,
+                event_date TEXT NOT NULL,
+                source TEXT NOT NULL,
+                quantity REAL,
+                defective REAL,
+                lead_time REAL,
+                on_time INTEGER,
+                on_time_rate REAL,
+                return_rate REAL,
+                rating REAL,
+                recorded_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_performance_date ON performance_log (event_date);
+        """)
+        self.rolling = RollingKPI(windows)
+        self._replay()
+
+    def close(self):
+        self.conn.close()
+
+    def _replay(self):
+        latest = self.conn.execute("SELECT MAX(event_date) FROM performance_log").fetchone()[0]
+        if latest is None:
+            return
+        start = (pd.Timestamp(latest) - pd.Timedelta(days=self.rolling.ring_days - 1)).strftime('%Y-%m-%d')
+        rows = self.conn.execute(
+            "SELECT supplier, event_date, source, quantity, defective, lead_time, on_time, "
+            "on_time_rate, return_rate, rating FROM performance_log WHERE event_date >= ? ORDER BY event_date, seq",
+            (start,)
+        )
+        for row in rows:
+            self._apply(*row)
+
+    def _apply(self, supplier, event_date, source, quantity, defective, lead_time, on_time,
+               on_time_rate, return_rate, rating):
+        vector = np.zeros(len(FIELDS))
+        if source == 'receipt':
+            vector[_F['收货次数']] = 1
+            _observe(vector, on_time, '准时次数', '考核次数')
+            if quantity is not None and not pd.isna(quantity):
+                vector[_F['收货数量']] = quantity
+                vector[_F['次品数量']] = defective or 0.0
+            _observe(vector, lead_time, '交期和', '交期次数', '交期平方和')
+        else:
+            _observe(vector, on_time_rate, '快照准时率和', '快照准时率次数')
+            _observe(vector, return_rate, '快照退货率和', '快照退货率次数')
+            _observe(vector, lead_time, '报价交期和', '报价交期次数', '报价交期平方和')
+        _observe(vector, rating, '评分和', '评分次数')
+        return self.rolling.add(supplier, _day(event_date), vector)
+
+    def _append(self, events):
+        """写入日志并更新滚动 KPI；events 为 (供应商键, 日期, 来源, 数量, 次品, 交期, 是否准时, 准时率, 退货率, 评分)"""
+        recorded_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        events = [(str(supplier), pd.Timestamp(event_date).strftime('%Y-%m-%d'), *rest)
+                  for supplier, event_date, *rest in events]
+        self.conn.executemany(
+            "INSERT INTO performance_log (supplier, event_date, source, quantity, defective, lead_time, on_time, "
+            "on_time_rate, return_rate, rating, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(*event, recorded_at) for event in events]
+        )
+        self.conn.commit()
+        for event in events:
+            self._apply(*event)
+        return len(events)
+
+    def record_receipts(self, receipts_df):
+        """从收货记录表批量记录收货，返回记录数
+
+        列：店铺名称 或 店铺ID、下单日期、收货日期、收货数量，可选 平台来源、次品数量、承诺到货日期。
+        """
+        missing = [column for column in RECEIPT_COLUMNS if column not in receipts_df.columns]
+        if missing:
+            raise ValueError(f"收货记录缺少列: {missing}")
+        table = receipts_df.dropna(subset=RECEIPT_COLUMNS)
+
+        received = pd.to_datetime(table['收货日期'])
+        lead_time = (received - pd.to_datetime(table['下单日期'])).dt.days
+        defective = table['次品数量'].fillna(0) if '次品数量' in table.columns else pd.Series(0, index=table.index)
+        if '承诺到货日期' in table.columns:
+            promised = pd.to_datetime(table['承诺到货日期'])
+            on_time = (received <= promised).astype(int).astype(object).where(promised.notna(), None)
+        else:
+            on_time = pd.Series(None, index=table.index, dtype=object)
+
+        n = len(table)
+        return self._append(list(zip(
+            performance_keys(table), received, ['receipt'] * n, table['收货数量'].astype(float).tolist(),
+            defective.astype(float).tolist(), lead_time.astype(float).tolist(), on_time.tolist(),
+            [None] * n, [None] * n, [None] * n
+        )))
+
+    def record_snapshots(self, suppliers_df, observed_at=None):
+        """从统一供应商表批量记录快照，缺省使用 爬取时间 列（没有时取当天），返回记录数"""
+        table = suppliers_df
+        if not any(column.endswith('_数值') for column in table.columns):
+            from utils.supplier_data import normalize_supplier_table
+            table = normalize_supplier_table(table)
+
+        if observed_at is not None:
+            dates = pd.Series(pd.Timestamp(observed_at), index=table.index)
+        elif '爬取时间' in table.columns:
+            dates = pd.to_datetime(table['爬取时间'], errors='coerce').fillna(pd.Timestamp.now())
+        else:
+            dates = pd.Series(pd.Timestamp.now(), index=table.index)
+
+        def column(name):
+            values = table[name] if name in table.columns else pd.Series(np.nan, index=table.index)
+            return pd.to_numeric(values, errors='coerce').astype(object).where(values.notna(), None)
+
+        return self._append(list(zip(
+            performance_keys(table), dates, ['snapshot'] * len(table), [None] * len(table), [None] * len(table),
+            column('交货周期_数值'), [None] * len(table),
+            column('准时交货率_数值'), column('退货率_数值'), column('店铺评分')
+        )))
+
+    def kpis(self, as_of=None):
+        """各供应商的滚动 KPI 表，见 RollingKPI.kpis"""
+        return self.rolling.kpis(as_of)
+
+
+def apply_performance(suppliers_df, kpis, window=DEFAULT_WINDOW, keys=None):
+    """把滚动 KPI 写回供应商表
+
+    增加 准时率/次品率/交期均值/交期方差/收货次数 的窗口列以及 交期标准差_数值，
+    并用有数据的 KPI 覆盖 准时交货率_数值、退货率_数值、交货周期_数值、店铺评分，
+    使 TOPSIS、采购分配和安全库存计算直接读取滚动表现。keys 缺省为 performance_keys。
+    """
+    table = suppliers_df.copy()
+    if kpis is None or kpis.empty or table.empty:
+        return table
+
+    keys = performance_keys(table) if keys is None else pd.Series(keys, index=table.index).astype(str)
+    names = ['收货次数', '准时率', '次品率', '交期均值', '交期方差', '店铺评分']
+    rolling = kpis.reindex(keys.to_numpy())[[f'{name}_{window}天' for name in names]]
+    rolling.index = table.index
+    rolling.columns = [f'{name}_{window}天' for name in names]
+    for column in rolling.columns:
+        table[column] = rolling[column]
+    table[f'收货次数_{window}天'] = table[f'收货次数_{window}天'].fillna(0).astype(int)
+    table['交期标准差_数值'] = np.sqrt(rolling[f'交期方差_{window}天'])
+
+    overrides = {
+        '准时交货率_数值': f'准时率_{window}天',
+        '退货率_数值': f'次品率_{window}天',
+        '交货周期_数值': f'交期均值_{window}天',
+        '店铺评分': f'店铺评分_{window}天',
+    }
+    for target, source in overrides.items():
+        if target in table.columns:
+            table[target] = rolling[source].where(rolling[source].notna(), table[target])
+    return table
+
+
+def load_kpis(path=PERFORMANCE_LOG_FILE, as_of=None):
+    """读取日志中的滚动 KPI；日志文件不存在时返回 None（不创建文件）"""
+    if not os.path.exists(path):
+        return None
+    log = SupplierPerformanceLog(path)
+    try:
+        return log.kpis(as_of)
+    finally:
+        log.close()
+
+
+def main():
+    receipts_file = sys.argv[1]
+    path = sys.argv[2] if len(sys.argv) > 2 else PERFORMANCE_LOG_FILE
+
+    receipts = pd.read_csv(receipts_file)
+    log = SupplierPerformanceLog(path)
+    try:
+        count = log.record_receipts(receipts)
+        kpis = log.kpis()
+    finally:
+        log.close()
+
+    window = DEFAULT_WINDOW
+    received = kpis[kpis[f'收货次数_{window}天'] > 0]
+    print(f"📦 已导入 {count} 条收货记录，{len(received)} 家供应商近{window}天有收货")
+    print(received[[f'收货次数_{window}天', f'准时率_{window}天', f'次品率_{window}天',
+                    f'交期均值_{window}天']].round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
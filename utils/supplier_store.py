@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+供应商增量存储工具模块
+Incremental Supplier Store
+
+以 平台 + 店铺ID 为主键把爬取的供应商记录存入 SQLite，并保存内容哈希和详情页抓取时间：
+增量爬取时只需对比哈希即可找出新增和变化的供应商，只写入变化的记录，
+同时记录店铺评分、准时交货率的历史变化。查询和写入只访问本次爬取到的主键，
+耗时与本次爬取量成正比，与库中供应商总数无关。
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+SUPPLIER_STORE_FILE = 'data/supplier_store.db'
+
+# 主键列
+KEY_COLUMNS = ['平台来源', '店铺ID']
+
+# 需要记录历史变化的指标
+HISTORY_COLUMNS = ['店铺评分', '准时交货率']
+
+# 不参与内容哈希的列（每次爬取都会变化）
+VOLATILE_COLUMNS = ['爬取时间']
+
+# 按主键批量查询时每批的主键数（SQLite 单条语句的参数个数有上限）
+KEY_BATCH_SIZE = 400
+
+
+def content_hash(record, columns=None):
+    """对记录内容计算稳定的哈希（忽略爬取时间等易变字段）"""
+    fields = columns if columns is not None else sorted(k for k in record if k not in VOLATILE_COLUMNS)
+    payload = json.dumps({k: record.get(k) for k in fields}, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class SupplierStore:
+    """基于 SQLite 的供应商存储，支持按主键 upsert 和变化历史"""
+
+    def __init__(self, path=SUPPLIER_STORE_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS suppliers (
+                platform TEXT NOT NULL,
+                store_id TEXT NOT NULL,
+                listing_hash TEXT,
+                detail_fetched TEXT,
+                content_hash TEXT NOT NULL,
+                record TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                last_changed TEXT NOT NULL,
+                PRIMARY KEY (platform, store_id)
+            );
+            CREATE TABLE IF NOT EXISTS supplier_history (
+                platform TEXT NOT NULL,
+                store_id TEXT NOT NULL,
+                changed_at TEXT NOT NULL,
+                field TEXT NOT NULL,
+                old_value TEXT,
+                new_value TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_history_key ON supplier_history (platform, store_id);
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(suppliers)")}
+        if 'detail_fetched' not in columns:
+            # 旧库没有详情页抓取时间，视为最后一次变化时抓取
+            self.conn.execute("ALTER TABLE suppliers ADD COLUMN detail_fetched TEXT")
+            self.conn.execute("UPDATE suppliers SET detail_fetched = last_changed")
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def _select(self, columns, keys):
+        """按主键分批查询 suppliers 表，返回 {(平台, 店铺ID): 列值元组}"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(keys), KEY_BATCH_SIZE):
+            batch = keys[start:start + KEY_BATCH_SIZE]
+            placeholders = ", ".join(["(?, ?)"] * len(batch))
+            rows = self.conn.execute(
+                f"SELECT platform, store_id, {columns} FROM suppliers "
+                f"WHERE (platform, store_id) IN (VALUES {placeholders})",
+                [value for key in batch for value in key]
+            )
+            for platform, store_id, *values in rows:
+                found[(platform, store_id)] = tuple(values)
+        return found
+
+    def listing_states(self, keys):
+        """已入库店铺的 {(平台, 店铺ID): (列表页内容哈希, 详情页抓取时间)}，只查询给定的主键"""
+        return self._select("listing_hash, detail_fetched", keys)
+
+    def touch(self, keys, seen_at=None):
+        """未变化的供应商只更新最后出现时间"""
+        seen_at = seen_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.conn.executemany(
+            "UPDATE suppliers SET last_seen = ? WHERE platform = ? AND store_id = ?",
+            [(seen_at, platform, store_id) for platform, store_id in keys]
+        )
+        self.conn.commit()
+
+    def upsert(self, records, listing_hashes=None, seen_at=None):
+        """写入新增或变化的供应商记录
+
+        records 为按统一供应商表列名组织的 dict 列表（须含 平台来源、店铺ID），均为本次抓取过详情页的店铺；
+        listing_hashes 为 {(平台, 店铺ID): 列表页哈希}，用于下次增量爬取时跳过未变化的店铺。
+        返回 {'new': 新增数, 'changed': 变化数, 'unchanged': 未变化数}。
+        """
+        seen_at = seen_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        listing_hashes = listing_hashes or {}
+        stats = {'new': 0, 'changed': 0, 'unchanged': 0}
+
+        keys = [(str(r['平台来源']), str(r['店铺ID'])) for r in records]
+        existing = self._select("content_hash, record", keys)
+
+        history = []
+        for key, record in zip(keys, records):
+            digest = content_hash(record)
+            listing_hash = listing_hashes.get(key)
+            body = json.dumps(record, ensure_ascii=False, default=str)
+
+            if key not in existing:
+                stats['new'] += 1
+                self.conn.execute(
+                    "INSERT INTO suppliers (platform, store_id, listing_hash, detail_fetched, content_hash, record, "
+                    "first_seen, last_seen, last_changed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*key, listing_hash, seen_at, digest, body, seen_at, seen_at, seen_at)
+                )
+                history.extend((*key, seen_at, field, None, str(record.get(field))) for field in HISTORY_COLUMNS)
+                continue
+
+            old_digest, old_body = existing[key]
+            if old_digest == digest:
+                stats['unchanged'] += 1
+                self.conn.execute(
+                    "UPDATE suppliers SET last_seen = ?, detail_fetched = ?, listing_hash = COALESCE(?, listing_hash) "
+                    "WHERE platform = ? AND store_id = ?",
+                    (seen_at, seen_at, listing_hash, *key)
+                )
+                continue
+
+            stats['changed'] += 1
+            self.conn.execute(
+                "UPDATE suppliers SET listing_hash = COALESCE(?, listing_hash), content_hash = ?, record = ?, "
+                "last_seen = ?, last_changed = ?, detail_fetched = ? WHERE platform = ? AND store_id = ?",
+                (listing_hash, digest, body, seen_at, seen_at, seen_at, *key)
+            )
+            old_record = json.loads(old_body)
+            for field in HISTORY_COLUMNS:
+                old_value, new_value = old_record.get(field), record.get(field)
+                if str(old_value) != str(new_value):
+                    history.append((*key, seen_at, field, str(old_value), str(new_value)))
+
+        self.conn.executemany("INSERT INTO supplier_history VALUES (?, ?, ?, ?, ?, ?)", history)
+        self.conn.commit()
+        return stats
+
+    def to_dataframe(self):
+        """导出当前全部供应商记录"""
+        records = [json.loads(body) for (body,) in self.conn.execute(
+            "SELECT record FROM suppliers ORDER BY platform, store_id")]
+        return pd.DataFrame(records)
+
+    def history(self, platform=None, store_id=None):
+        """查询评分、准时交货率的变化历史"""
+        query = "SELECT platform, store_id, changed_at, field, old_value, new_value FROM supplier_history"
+        params = []
+        if platform is not None and store_id is not None:
+            query += " WHERE platform = ? AND store_id = ?"
+            params = [platform, store_id]
+        query += " ORDER BY changed_at"
+        return pd.read_sql_query(query, self.conn, params=params).rename(columns={
+            'platform': '平台来源', 'store_id': '店铺ID', 'changed_at': '变化时间',
+            'field': '指标', 'old_value': '原值', 'new_value': '新值'
+        })
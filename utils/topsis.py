@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TOPSIS 多准则决策工具模块
+Batched TOPSIS Utilities
+
+一次广播计算即可对 多个权重情景 × 多个供应商集合 给出全部相对接近度。
+支持效益型（越大越好）和成本型（越小越好，如单价、交货周期）指标。
+
+加权后的理想解可以拆成 w_j × 标准化理想值（权重非负），因此
+到正/负理想解的距离平方 = 逐指标距离平方矩阵 @ w²，
+多组权重只是一次矩阵乘法，不需要为每个情景复制加权矩阵。
+决策矩阵不变、只调整权重时，可缓存 ideal_distances 的结果，
+每次只做矩阵-向量乘法，再用 top_k 部分选择排名靠前的方案。
+"""
+
+import numpy as np
+
+
+def benefit_mask(criteria, cost_criteria=()):
+    """根据成本型指标列表生成 效益型=True / 成本型=False 的掩码"""
+    cost_criteria = set(cost_criteria)
+    return np.array([criterion not in cost_criteria for criterion in criteria])
+
+
+def normalize_weights(weights):
+    """权重归一化，总和为0时退化为等权"""
+    w = np.asarray(weights, dtype=float)
+    total = w.sum(axis=-1, keepdims=True)
+    equal = np.full_like(w, 1.0 / w.shape[-1])
+    return np.where(total > 0, w / np.where(total > 0, total, 1.0), equal)
+
+
+def _group_reduce(values, groups, n_groups, func, initial):
+    """按组做逐列归约（sum / max / min），返回 [组数, 指标数]"""
+    out = np.full((n_groups, values.shape[1]), initial, dtype=float)
+    func.at(out, groups, values)
+    return out
+
+
+def ideal_distances(matrix, benefit=None, groups=None, mask=None):
+    """计算标准化后各方案到正/负理想解的逐指标距离平方
+
+    matrix: [..., 方案数, 指标数] 决策矩阵，前导维度表示多个独立的供应商集合
+    benefit: [指标数] 布尔掩码，False 表示成本型指标，缺省全部为效益型
+    groups:  [方案数] 组编号（如产品类别），各组独立标准化和确定理想解（仅二维矩阵）
+    mask:    [..., 方案数] 有效方案掩码，用于补齐长度不同的供应商集合
+
+    返回 (到正理想解距离平方, 到负理想解距离平方)，形状均与 matrix 相同。
+    """
+    x = np.asarray(matrix, dtype=float)
+    n_criteria = x.shape[-1]
+    benefit = np.ones(n_criteria, dtype=bool) if benefit is None else np.asarray(benefit, dtype=bool)
+
+    if groups is not None:
+        if x.ndim != 2:
+            raise ValueError("按组计算时决策矩阵必须为二维")
+        groups = np.asarray(groups)
+        n_groups = int(groups.max()) + 1 if groups.size else 0
+
+        norms = np.sqrt(_group_reduce(x ** 2, groups, n_groups, np.add, 0.0))
+        normalized = x / np.where(norms > 0, norms, 1.0)[groups]
+        col_max = _group_reduce(normalized, groups, n_groups, np.maximum, -np.inf)[groups]
+        col_min = _group_reduce(normalized, groups, n_groups, np.minimum, np.inf)[groups]
+    else:
+        valid = np.ones(x.shape[:-1], dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        valid = valid[..., None]
+
+        norms = np.sqrt(np.sum(np.where(valid, x ** 2, 0.0), axis=-2, keepdims=True))
+        normalized = x / np.where(norms > 0, norms, 1.0)
+        col_max = np.max(np.where(valid, normalized, -np.inf), axis=-2, keepdims=True)
+        col_min = np.min(np.where(valid, normalized, np.inf), axis=-2, keepdims=True)
+
+    # 效益型指标的正理想解取最大值，成本型取最小值
+    best = np.where(benefit, col_max, col_min)
+    worst = np.where(benefit, col_min, col_max)
+
+    return (normalized - best) ** 2, (normalized - worst) ** 2
+
+
+def closeness_from_distances(d2_best, d2_worst, weights):
+    """由逐指标距离平方和权重计算相对接近度
+
+    weights 为 [指标数] 时返回 [..., 方案数]；
+    为 [情景数, 指标数] 时返回 [..., 方案数, 情景数]。
+    """
+    w2 = np.asarray(weights, dtype=float) ** 2
+
+    # 情景数较多时结果矩阵很大，尽量原地计算避免多余的临时数组
+    distance_best = d2_best @ w2.T
+    distance_worst = d2_worst @ w2.T
+    np.sqrt(np.maximum(distance_best, 0, out=distance_best), out=distance_best)
+    np.sqrt(np.maximum(distance_worst, 0, out=distance_worst), out=distance_worst)
+
+    total = np.add(distance_best, distance_worst, out=distance_best)
+    closeness = np.divide(distance_worst, total, out=distance_worst, where=total > 0)
+    # 所有方案完全相同时无法区分，接近度记为0.5
+    closeness[total <= 0] = 0.5
+    return closeness
+
+
+def topsis_closeness(matrix, weights, benefit=None, groups=None, mask=None):
+    """批量 TOPSIS：返回所有供应商在所有权重情景下的相对接近度
+
+    weights 可为单个权重向量 [指标数] 或权重矩阵 [情景数, 指标数]。
+    其余参数见 ideal_distances。
+    """
+    d2_best, d2_worst = ideal_distances(matrix, benefit, groups, mask)
+    closeness = closeness_from_distances(d2_best, d2_worst, weights)
+
+    if mask is not None and groups is None:
+        valid = np.asarray(mask, dtype=bool)
+        if closeness.ndim > valid.ndim:
+            valid = valid[..., None]
+        closeness = np.where(valid, closeness, np.nan)
+
+    return closeness
+
+
+def top_k(scores, k):
+    """用 np.argpartition 选出评分最高的 k 个方案，不对全部方案排序
+
+    返回 (方案序号, 排名)：序号按评分从高到低排列，
+    排名与 pandas rank(ascending=False, method='min') 一致（并列取最小名次）。
+    """
+    scores = np.asarray(scores, dtype=float)
+    k = max(0, min(int(k), scores.size))
+    if k == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+
+    candidates = np.argpartition(-scores, k - 1)[:k] if k < scores.size else np.arange(scores.size)
+    order = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+    # 评分严格更高的方案必然都在前 k 个之中，名次 = 1 + 严格更高的方案数
+    top = -scores[order]
+    return order, np.searchsorted(top, top, side='left') + 1
+
+
+def sample_weights(base_weights, n_samples=5000, concentration=50.0, seed=42):
+    """在给定权重附近按 Dirichlet 分布抽样权重向量
+
+    concentration 越大，抽样权重越集中在 base_weights 附近；
+    权重为0的指标保持为0。返回 [样本数, 指标数]。
+    """
+    base = normalize_weights(base_weights)
+    active = base > 0
+    rng = np.random.default_rng(seed)
+
+    samples = np.zeros((n_samples, base.size))
+    samples[:, active] = rng.dirichlet(concentration * base[active], size=n_samples)
+    return samples
+
+
+def rank_scores(scores):
+    """把 [方案数, 情景数] 的评分转换为逐情景排名（1为最优）"""
+    order = np.argsort(-scores, axis=0, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, scores.shape[0] + 1)[:, None], axis=0)
+    return ranks
+
+
+def weight_sensitivity(matrix, base_weights, benefit=None, n_samples=5000, concentration=50.0,
+                       top_k=3, seed=42, distances=None):
+    """蒙特卡洛权重敏感性分析
+
+    返回 (汇总表, 排名分布)：
+    汇总表每行一个方案，含 base_rank, mean_rank, rank_std, rank_p5, rank_p95, prob_top1, prob_top_k；
+    排名分布为 [方案数, 方案数] 数组，第 i 行第 r 列为方案 i 排在第 r+1 名的概率。
+    distances 为已缓存的 ideal_distances 结果（可只取部分方案的行），给出时忽略 matrix 和 benefit。
+    """
+    d2_best, d2_worst = ideal_distances(matrix, benefit) if distances is None else distances
+    n_options = d2_best.shape[0]
+
+    base = normalize_weights(base_weights)
+    samples = sample_weights(base, n_samples, concentration, seed)
+    scores = closeness_from_distances(d2_best, d2_worst, np.vstack([base, samples]))
+    ranks = rank_scores(scores)
+    base_rank, sampled_ranks = ranks[:, 0], ranks[:, 1:]
+
+    # 每个方案各名次出现的频率
+    distribution = np.zeros((n_options, n_options))
+    np.add.at(distribution, (np.repeat(np.arange(n_options), n_samples), sampled_ranks.ravel() - 1), 1.0)
+    distribution /= n_samples
+
+    summary = {
+        'base_rank': base_rank,
+        'mean_rank': sampled_ranks.mean(axis=1),
+        'rank_std': sampled_ranks.std(axis=1),
+        'rank_p5': np.percentile(sampled_ranks, 5, axis=1),
+        'rank_p95': np.percentile(sampled_ranks, 95, axis=1),
+        'prob_top1': (sampled_ranks == 1).mean(axis=1),
+        'prob_top_k': (sampled_ranks <= top_k).mean(axis=1),
+    }
+    return summary, distribution
+
+
+def rank_reversal_points(matrix, base_weights, benefit=None, n_grid=101, distances=None):
+    """逐个指标扫描权重，找出首选方案发生变化的临界权重
+
+    对每个指标 j，把其权重从0扫描到1，其余指标按原比例分配剩余权重；
+    所有指标、所有网格点一次批量打分。
+    返回列表，每项为 (指标序号, 临界权重, 变化前首选方案序号, 变化后首选方案序号)。
+    distances 含义同 weight_sensitivity。
+    """
+    d2_best, d2_worst = ideal_distances(matrix, benefit) if distances is None else distances
+    base = normalize_weights(base_weights)
+    n_criteria = base.size
+    grid = np.linspace(0.0, 1.0, n_grid)
+
+    # 构造 [指标数, 网格点数, 指标数] 的权重扫描
+    scans = np.empty((n_criteria, n_grid, n_criteria))
+    for j in range(n_criteria):
+        others = base.copy()
+        others[j] = 0.0
+        others = others / others.sum() if others.sum() > 0 else np.full(n_criteria, 1.0 / max(n_criteria - 1, 1))
+        others[j] = 0.0
+        scans[j] = (1.0 - grid)[:, None] * others + grid[:, None] * np.eye(n_criteria)[j]
+
+    scores = closeness_from_distances(d2_best, d2_worst, scans.reshape(-1, n_criteria))
+    leaders = scores.argmax(axis=0).reshape(n_criteria, n_grid)
+
+    points = []
+    for j, k in zip(*np.nonzero(leaders[:, 1:] != leaders[:, :-1])):
+        points.append((int(j), float((grid[k] + grid[k + 1]) / 2), int(leaders[j, k]), int(leaders[j, k + 1])))
+    return points